@@ -3,19 +3,42 @@
 # ----------------------------------------------------------------------------#
 
 import json
+import re
 from datetime import datetime
+from itertools import groupby
 
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
+from flask import Flask, render_template, stream_template, request, Response, flash, redirect, url_for, abort, jsonify
+from markupsafe import Markup
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
-import logging
-from logging import Formatter, FileHandler
 from flask_wtf import Form
 from config import SQLALCHEMY_DATABASE_URI
 from forms import *
 from flask_migrate import Migrate
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from flask.cli import AppGroup
+import click
+from models import db, Venue, Artist, Show, City, venue_genres, artist_genres
+import counters
+import rollups
+import lookups
+import search
+import details
+import edits
+import validators
+import availability
+import geo
+import geocoding
+from formatting import format_datetime, format_datetimes
+from cache import fragment_cache
+from pagination import paginate, count_capped
+from validators import conditional
+from request_logging import init_logging
+from profiler import SQLProfiler
+from routing import init_routing
+from templating import init_templates, precompile
+from pool import pool_stats
+import importer
 
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -25,116 +48,24 @@ app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
 app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
-db = SQLAlchemy(app)
+db.init_app(app)
+init_routing(app, db)
 
 migrate = Migrate(app, db)
+fragment_cache.init_app(app)
+init_templates(app)
+sql_profiler = SQLProfiler(app)
 
-print('#DEBUG connected to db => ', app.config['SQLALCHEMY_DATABASE_URI'])
-
-# ----------------------------------------------------------------------------#
-# Models.
-# ----------------------------------------------------------------------------#
-
-
-venue_genres = db.Table('venue_genures',
-                        db.Column('venue_id', db.Integer, db.ForeignKey('venues.id'), primary_key=True),
-                        db.Column('genre_id', db.Integer, db.ForeignKey('genres.id'), primary_key=True)
-                        )
-
-artist_genres = db.Table('artist_genres',
-                         db.Column('artist_id', db.Integer, db.ForeignKey('artists.id'), primary_key=True),
-                         db.Column('genre_id', db.Integer, db.ForeignKey('genres.id'), primary_key=True)
-                         )
-
-
-class Venue(db.Model):
-    __tablename__ = 'venues'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city_id = db.Column(db.Integer, db.ForeignKey('cities.id'), nullable=False)
-    address = db.Column(db.String(120), nullable=False)
-    phone = db.Column(db.String(120), nullable=False)
-    image_link = db.Column(db.String(500))
-    facebook_link = db.Column(db.String(120))
-    website = db.Column(db.String(120))
-    seeking_description = db.Column(db.String(120), nullable=True)
-    seeking_talent = db.Column(db.Boolean, nullable=True)
-
-    # ******************* Relationships ******************* #
-    genres = db.relationship('Genre', secondary=venue_genres, backref=db.backref('venue_genres', lazy=True))
-    shows = db.relationship('Show', backref='venue_shows', lazy=True)
-
-    # def __repr__(self):
-    #     return f'<Venue id: {self.id}, name: {self.name}, city: {self.city}>'
-
-
-class Artist(db.Model):
-    __tablename__ = 'artists'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city_id = db.Column(db.Integer, db.ForeignKey('cities.id'), nullable=False)
-    phone = db.Column(db.String(120), nullable=False)
-    image_link = db.Column(db.String(500))
-    facebook_link = db.Column(db.String(120))
-    website = db.Column(db.String(120))
-    seeking_description = db.Column(db.String(120), nullable=True)
-    seeking_venue = db.Column(db.Boolean, nullable=True)
-
-    # ******************* Relationships ******************* #
-
-    genres = db.relationship('Genre', secondary=artist_genres, backref=db.backref('artist_genres', lazy=True))
-    shows = db.relationship('Show', backref='artist_shows', lazy=True)
-
-
-class Show(db.Model):
-    __tablename__ = 'shows'
-
-    id = db.Column(db.Integer, primary_key=True)
-    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable=False)
-    start_time = db.Column(db.TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
-
-    def __repr__(self):
-        return f'<Show id: {self.id}, venue_id: {self.venue_id}, artist_id:' \
-               f' {self.artist_id}, start_time: {self.start_time}>'
-
-
-class City(db.Model):
-    __tablename__ = 'cities'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-    state = db.Column(db.String(2), nullable=True)
-
-    city_artist = db.relationship('Artist', backref='city', lazy=True)
-    city_venue = db.relationship('Venue', backref='city', lazy=True)
-
-    def __repr__(self):
-        return f'<City id: {self.id}, name: {self.name}, state: {self.state}>'
-
-
-class Genre(db.Model):
-    __tablename__ = 'genres'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-
+init_logging(app)
+app.logger.debug('connected to db %s', make_url(SQLALCHEMY_DATABASE_URI).render_as_string(hide_password=True))
+if app.config['SQLALCHEMY_BINDS'].get('replica'):
+    app.logger.debug('reading GET requests from replica %s',
+                     make_url(app.config['SQLALCHEMY_BINDS']['replica']).render_as_string(hide_password=True))
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
-
-
 app.jinja_env.filters['datetime'] = format_datetime
 
 
@@ -151,95 +82,122 @@ def index():
 #  ----------------------------------------------------------------
 
 @app.route('/venues')
+@conditional(validators.venues_page)
 def venues():
-    all_venues = Venue.query.all()
-    data = []
-
-    for venue in all_venues:
-        item_index = next((i for i, item in enumerate(data) if venue.city.name == item['city']), None)
-        num_of_upcoming_shows = Show.query.filter(
-            (Show.venue_id == venue.id) & (Show.start_time > datetime.now())).count()
+    return render_template('pages/venues.html', areas=get_venue_areas())
 
-        venue_item = {
-            'id': str(venue.id),
-            'name': venue.name,
-            "num_upcoming_shows": num_of_upcoming_shows,
-        }
 
-        if item_index:
-            data[item_index]['venues'].append(venue_item)
-        else:
-            city_item = {
-                'city': venue.city.name,
-                'state': venue.city.state,
-                'venues': [venue_item]
-            }
+def get_venue_areas():
+    # upcoming show counts are denormalized on Venue (see counters.py); rows come back
+    # ordered by city so they can be grouped in a single pass
+    rows = db.session.query(City.id.label('city_id'), City.name.label('city'), City.state,
+                            Venue.id, Venue.name, Venue.num_upcoming_shows) \
+        .join(Venue, Venue.city_id == City.id) \
+        .order_by(City.state, City.name, City.id, Venue.name, Venue.id).all()
 
-            data.append(city_item)
-    return render_template('pages/venues.html', areas=data)
+    data = []
+    for city_id, city_rows in groupby(rows, key=lambda row: row.city_id):
+        city_rows = list(city_rows)
+        data.append({
+            'city': city_rows[0].city,
+            'state': city_rows[0].state,
+            'venues': [{
+                'id': str(row.id),
+                'name': row.name,
+                'num_upcoming_shows': row.num_upcoming_shows,
+            } for row in city_rows]
+        })
+    return data
 
 
-@app.route('/venues/search', methods=['POST'])
+@app.route('/venues/search', methods=['GET', 'POST'])
 def search_venues():
     # search for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
 
-    search_term = request.form.get('search_term', '')
-    venus = Venue.query.join(Show) \
-        .filter(Venue.name.contains(search_term) & (Show.start_time >= datetime.now())).all()
+    search_term = request.values.get('search_term', '')
+    matches, order = search.search_venues(search_term)
+    page = paginate(matches, order, lambda v: (v.score, v.id))
 
     response = {
-        "count": len(venus),
-        "data": list(map(lambda v: {'id': v.id, 'name': v.name, 'num_upcoming_shows': len(v.shows)}, venus))
+        "count": count_capped(matches, app.config['SEARCH_COUNT_CAP']),
+        "data": list(map(lambda v: {'id': v.id, 'name': v.name, 'num_upcoming_shows': v.num_upcoming_shows},
+                         page.items))
     }
 
-    return render_template('pages/search_venues.html', results=response, search_term=search_term)
+    return render_template('pages/search_venues.html', results=response, search_term=search_term,
+                           page=page, count_cap=app.config['SEARCH_COUNT_CAP'])
+
+
+@app.route('/venues/availability')
+def venue_availability():
+    # venues of a city with no show between start and end, e.g.
+    # /venues/availability?city=San Francisco&state=CA&start=2026-11-01T18:00&end=2026-11-01T23:00
+    try:
+        start = availability.parse_time(request.args['start'])
+        end = availability.parse_time(request.args['end'])
+        city = lookups.city_key(request.args['city'], request.args.get('state'))
+    except (KeyError, ValueError, OverflowError):
+        return jsonify({'error': 'city, start and end are required, with ISO 8601 times'}), 400
+    if end <= start:
+        return jsonify({'error': 'end must be after start'}), 400
+
+    city_id = lookups.cities.resolve([city], create=False).get(city)
+    if city_id is None:
+        venues, page = [], None
+    else:
+        page = paginate(availability.free_venues(city_id, start, end), [Venue.name, Venue.id],
+                        lambda v: (v.name, v.id))
+        venues = [{'id': row.id, 'name': row.name} for row in page.items]
+
+    return jsonify({
+        'city': request.args['city'],
+        'state': request.args.get('state'),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'venues': venues,
+        'next_cursor': page.next_cursor if page else None,
+    })
+
+
+@app.route('/venues/nearby')
+def venues_nearby():
+    # venues within radius_km of a point, nearest first, e.g. /venues/nearby?lat=37.77&lng=-122.42&radius_km=5
+    try:
+        latitude, longitude = float(request.args['lat']), float(request.args['lng'])
+        radius = float(request.args.get('radius_km', 10))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lng are required, radius_km is in kilometres'}), 400
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return jsonify({'error': 'lat must be within [-90, 90] and lng within [-180, 180]'}), 400
+    if not 0 < radius <= app.config['NEARBY_MAX_RADIUS_KM']:
+        return jsonify({'error': f"radius_km must be above 0 and at most {app.config['NEARBY_MAX_RADIUS_KM']}"}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    return jsonify({
+        'lat': latitude,
+        'lng': longitude,
+        'radius_km': radius,
+        'venues': geo.nearby(latitude, longitude, radius, limit),
+    })
 
 
 @app.route('/venues/<int:venue_id>')
+@conditional(validators.venue_page)
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
+    page = fragment_cache.get_or_render('venue', venue_id, lambda: render_venue_fragment(venue_id))
+    if page is None:
+        abort(404)
 
-    venue = Venue.query.get(venue_id)
-    genres = list(map(lambda v: v.name, venue.genres))
-    city = venue.city
-
-    past_shows = Show.query.join(Artist).filter(
-        (Show.start_time < datetime.utcnow()) & (Show.venue_id == venue_id)).all()
-
-    for i, show in enumerate(past_shows, start=0):
-        print('#DEBUG data date => ', past_shows[i].start_time)
-        past_shows[i].start_time = show.start_time.strftime("%m/%d/%Y, %H:%M:%S")
-
-    upcoming_shows = Show.query.join(Artist).filter(
-        (Show.start_time >= datetime.utcnow()) & (Show.venue_id == venue_id)).all()
-
-    for i, show in enumerate(upcoming_shows, start=0):
-        print('#DEBUG data date => ', upcoming_shows[i].start_time)
-        upcoming_shows[i].start_time = show.start_time.strftime("%m/%d/%Y, %H:%M:%S")
-
-    data = {
-        "id": venue.id,
-        "name": venue.name,
-        "genres": genres,
-        "address": venue.address,
-        "city": city.name,
-        "state": city.state,
-        "phone": venue.phone,
-        "website": venue.website,
-        "facebook_link": venue.facebook_link,
-        "seeking_talent": venue.seeking_talent,
-        "seeking_description": venue.seeking_description,
-        "image_link": venue.image_link,
-        "past_shows": past_shows,
-        "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcoming_shows),
-    }
+    return render_template('pages/show_venue.html', venue=page)
 
-    print(data)
 
-    return render_template('pages/show_venue.html', venue=data)
+def render_venue_fragment(venue_id):
+    data = details.venue_details(venue_id)
+    if data is None:
+        return None
+    return {'name': data['name'], 'html': Markup(render_template('fragments/show_venue.html', venue=data))}
 
 
 #  Create Venue
@@ -257,27 +215,24 @@ def create_venue_submission():
     data = request.form
     genres = data.getlist('genres')
     try:
-        city = City.query.filter_by(name=data['city'].strip().lower()).first()
-
-        if city is None:
-            new_city = City(name=data['city'].strip().lower(), state=data['state'])
-            db.session.add(new_city)
-            city = City.query.filter_by(name=data['city'].strip().lower()).first()
+        city_key = lookups.city_key(data['city'], data['state'])
+        city_id = lookups.resolve_cities([city_key])[city_key]
+        genre_ids = lookups.resolve_genres(genres)
 
         new_venue = Venue(name=data['name'],
-                          city_id=city.id,
+                          city_id=city_id,
                           facebook_link=data['facebook_link'],
                           address=data['address'],
                           phone=data['phone'])
-        for item in genres:
-            genre = Genre.query.filter_by(name=item).first()
-            if genre:
-                new_venue.genres.append(genre)
-            else:
-                new_venue.genres.append(Genre(name=item))
-
         db.session.add(new_venue)
+        db.session.flush()
+        if genre_ids:
+            db.session.execute(venue_genres.insert(), [{'venue_id': new_venue.id, 'genre_id': genre_id}
+                                                       for genre_id in genre_ids.values()])
+        venue_id = new_venue.id
+        search.index_venues([venue_id])
         db.session.commit()
+        fragment_cache.invalidate('venue', venue_id)
         flash('Venue ' + request.form['name'] + ' was successfully listed!')
     except:
         db.session.rollback()
@@ -288,137 +243,168 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@app.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
-    # TODO: Complete this endpoint for taking a venue_id, and using
-    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+    if db.session.query(Venue.id).filter(Venue.id == venue_id).first() is None:
+        abort(404)
 
-    # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
-    # clicking that button delete it from the db then redirect the user to the homepage
-    return None
+    # set-based: the venue's shows and genre links are never loaded into the session
+    venue_shows = Show.venue_id == venue_id
+    artist_ids = venue_artist_ids(venue_id)
+    success = True
+    try:
+        # artists lose the shows they had at this venue
+        counters.remove_shows(venue_shows)
+        rollups.remove_shows(venue_shows)
+        rollups.forget('venue', venue_id)
+        search.remove_venues([venue_id])
+        availability.remove_periods(venue_shows)
+        db.session.execute(Show.__table__.delete().where(venue_shows))
+        db.session.execute(venue_genres.delete().where(venue_genres.c.venue_id == venue_id))
+        db.session.execute(Venue.__table__.delete().where(Venue.id == venue_id))
+        validators.record_deletion()
+        db.session.commit()
+        invalidate_venue_pages(venue_id, artist_ids)
+        flash('Venue was successfully deleted!')
+    except:
+        db.session.rollback()
+        success = False
+        flash('An error occurred. Venue could not be deleted.')
+    finally:
+        db.session.close()
+
+    return jsonify({'success': success, 'redirect': url_for('index')})
 
 
 #  Artists
 #  ----------------------------------------------------------------
 @app.route('/artists')
+@conditional(validators.artists_page)
 def artists():
-    data = db.session.query(Artist.id, Artist.name)
-    return render_template('pages/artists.html', artists=data)
+    page = paginate(db.session.query(Artist.id, Artist.name), [Artist.name, Artist.id], lambda a: (a.name, a.id))
+    return render_template('pages/artists.html', artists=page.items, page=page)
 
 
-@app.route('/artists/search', methods=['POST'])
+@app.route('/artists/search', methods=['GET', 'POST'])
 def search_artists():
     # search for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
 
-    search_term = request.form.get('search_term', '')
-    artists = Artist.query.join(Show) \
-        .filter(Artist.name.contains(search_term) & (Show.start_time >= datetime.now())).all()
+    search_term = request.values.get('search_term', '')
+    matches, order = search.search_artists(search_term)
+    page = paginate(matches, order, lambda a: (a.score, a.id))
 
     response = {
-        "count": len(artists),
-        "data": list(map(lambda v: {'id': v.id, 'name': v.name, 'num_upcoming_shows': len(v.shows)}, artists))
+        "count": count_capped(matches, app.config['SEARCH_COUNT_CAP']),
+        "data": list(map(lambda v: {'id': v.id, 'name': v.name, 'num_upcoming_shows': v.num_upcoming_shows},
+                         page.items))
     }
 
-    return render_template('pages/search_artists.html', results=response,
-                           search_term=request.form.get('search_term', ''))
+    return render_template('pages/search_artists.html', results=response, search_term=search_term,
+                           page=page, count_cap=app.config['SEARCH_COUNT_CAP'])
 
 
 @app.route('/artists/<int:artist_id>')
+@conditional(validators.artist_page)
 def show_artist(artist_id):
-    # shows the venue page with the given venue_id
-    artist = Artist.query.get(artist_id)
-    genres = list(map(lambda a: a.name, artist.genres))
-    city = artist.city
-
-    past_shows = Show.query.join(Artist) \
-        .filter((Show.start_time < datetime.utcnow()) & (Show.artist_id == artist_id)).all()
-
-    for i, show in enumerate(past_shows, start=0):
-        past_shows[i].start_time = show.start_time.strftime("%m/%d/%Y, %H:%M:%S")
-
-    upcoming_shows = Show.query.join(Artist) \
-        .filter((Show.start_time >= datetime.utcnow()) & (Show.artist_id == artist_id)).all()
-
-    for i, show in enumerate(upcoming_shows, start=0):
-        upcoming_shows[i].start_time = show.start_time.strftime("%m/%d/%Y, %H:%M:%S")
-
-    data = {
-        "id": artist.id,
-        "name": artist.name,
-        "genres": genres,
-        "city": city.name,
-        "state": city.state,
-        "phone": artist.phone,
-        "website": artist.website,
-        "facebook_link": artist.facebook_link,
-        "image_link": artist.image_link,
-        "seeking_venue": artist.seeking_venue,
-        "seeking_description": artist.seeking_description,
-        "past_shows": past_shows,
-        "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcoming_shows),
-    }
+    # shows the artist page with the given artist_id
+    page = fragment_cache.get_or_render('artist', artist_id, lambda: render_artist_fragment(artist_id))
+    if page is None:
+        abort(404)
 
-    return render_template('pages/show_artist.html', artist=data)
+    return render_template('pages/show_artist.html', artist=page)
+
+
+def render_artist_fragment(artist_id):
+    data = details.artist_details(artist_id)
+    if data is None:
+        return None
+    return {'name': data['name'], 'html': Markup(render_template('fragments/show_artist.html', artist=data))}
+
+
+def invalidate_venue_pages(venue_id, artist_ids=None):
+    # artist pages show the names of the venues they play at
+    if artist_ids is None:
+        artist_ids = venue_artist_ids(venue_id)
+    fragment_cache.invalidate('venue', venue_id)
+    fragment_cache.invalidate('artist', *artist_ids)
+
+
+def invalidate_artist_pages(artist_id):
+    venue_ids = [row.venue_id for row in db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()]
+    fragment_cache.invalidate('artist', artist_id)
+    fragment_cache.invalidate('venue', *venue_ids)
+
+
+def venue_artist_ids(venue_id):
+    return [row.artist_id for row in db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()]
 
 
 #  Update
 #  ----------------------------------------------------------------
 @app.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
-    form = ArtistForm()
-    artist = {
-        "id": 4,
-        "name": "Guns N Petals",
-        "genres": ["Rock n Roll"],
-        "city": "San Francisco",
-        "state": "CA",
-        "phone": "326-123-5000",
-        "website": "https://www.gunsnpetalsband.com",
-        "facebook_link": "https://www.facebook.com/GunsNPetals",
-        "seeking_venue": True,
-        "seeking_description": "Looking for shows to perform at in the San Francisco Bay Area!",
-        "image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80"
-    }
-    # TODO: populate form with fields from artist with ID <artist_id>
+    artist = edits.form_data(Artist, artist_id)
+    if artist is None:
+        abort(404)
+    form = ArtistForm(data=artist)
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
 @app.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
-    # TODO: take values from the form submitted, and update existing
-    # artist record with ID <artist_id> using the new attributes
+    try:
+        changed = edits.save(Artist, artist_id, request.form.get('version', type=int), request.form)
+        db.session.commit()
+        # venue pages list their artists by name and image
+        if changed & {'name', 'image_link'}:
+            invalidate_artist_pages(artist_id)
+        elif changed:
+            fragment_cache.invalidate('artist', artist_id)
+        flash('Artist ' + request.form.get('name', '') + ' was successfully updated!')
+    except edits.EditConflict:
+        db.session.rollback()
+        flash('This artist was changed by someone else in the meantime. Please review it and submit again.')
+        return redirect(url_for('edit_artist', artist_id=artist_id))
+    except:
+        db.session.rollback()
+        flash('An error occurred. Artist could not be updated.')
+    finally:
+        db.session.close()
 
     return redirect(url_for('show_artist', artist_id=artist_id))
 
 
 @app.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
-    form = VenueForm()
-    venue = {
-        "id": 1,
-        "name": "The Musical Hop",
-        "genres": ["Jazz", "Reggae", "Swing", "Classical", "Folk"],
-        "address": "1015 Folsom Street",
-        "city": "San Francisco",
-        "state": "CA",
-        "phone": "123-123-1234",
-        "website": "https://www.themusicalhop.com",
-        "facebook_link": "https://www.facebook.com/TheMusicalHop",
-        "seeking_talent": True,
-        "seeking_description": "We are on the lookout for a local artist to play every two weeks. Please call us.",
-        "image_link": "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60"
-    }
-    # TODO: populate form with values from venue with ID <venue_id>
+    venue = edits.form_data(Venue, venue_id)
+    if venue is None:
+        abort(404)
+    form = VenueForm(data=venue)
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 
 @app.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
-    # TODO: take values from the form submitted, and update existing
-    # venue record with ID <venue_id> using the new attributes
+    try:
+        changed = edits.save(Venue, venue_id, request.form.get('version', type=int), request.form)
+        db.session.commit()
+        # artist pages list their venues by name and image
+        if changed & {'name', 'image_link'}:
+            invalidate_venue_pages(venue_id)
+        elif changed:
+            fragment_cache.invalidate('venue', venue_id)
+        flash('Venue ' + request.form.get('name', '') + ' was successfully updated!')
+    except edits.EditConflict:
+        db.session.rollback()
+        flash('This venue was changed by someone else in the meantime. Please review it and submit again.')
+        return redirect(url_for('edit_venue', venue_id=venue_id))
+    except:
+        db.session.rollback()
+        flash('An error occurred. Venue could not be updated.')
+    finally:
+        db.session.close()
+
     return redirect(url_for('show_venue', venue_id=venue_id))
 
 
@@ -438,25 +424,20 @@ def create_artist_submission():
     data = request.form
     genres = data.getlist('genres')
     try:
-        city = City.query.filter_by(name=data['city'].strip().lower()).first()
-
-        if city is None:
-            new_city = City(name=data['city'].strip().lower(), state=data['state'])
-            db.session.add(new_city)
-            city = City.query.filter_by(name=data['city'].strip().lower()).first()
+        city_key = lookups.city_key(data['city'], data['state'])
+        city_id = lookups.resolve_cities([city_key])[city_key]
+        genre_ids = lookups.resolve_genres(genres)
 
         new_artist = Artist(name=data['name'],
-                          city_id=city.id,
+                          city_id=city_id,
                           facebook_link=data['facebook_link'],
                           phone=data['phone'])
-        for item in genres:
-            genre = Genre.query.filter_by(name=item).first()
-            if genre:
-                new_artist.genres.append(genre)
-            else:
-                new_artist.genres.append(Genre(name=item))
-
         db.session.add(new_artist)
+        db.session.flush()
+        if genre_ids:
+            db.session.execute(artist_genres.insert(), [{'artist_id': new_artist.id, 'genre_id': genre_id}
+                                                        for genre_id in genre_ids.values()])
+        search.index_artists([new_artist.id])
         db.session.commit()
         flash('Artist ' + request.form['name'] + ' was successfully listed!')
 
@@ -477,27 +458,52 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 @app.route('/shows')
+@conditional(validators.shows_page)
 def shows():
-    # displays list of shows at /shows
+    # displays list of shows at /shows, optionally limited to ?from=<date>&to=<date>
+    window = {key: request.args.get(key) for key in ('from', 'to') if request.args.get(key)}
+    try:
+        shows = shows_query(*(datetime.fromisoformat(window[key]) if key in window else None
+                              for key in ('from', 'to')))
+    except ValueError:
+        abort(400)
 
-    shows = db.session.query(Show.venue_id, Show.artist_id, Show.start_time, Artist.name.label('artist_name'),
-                             Artist.image_link.label('artist_image_link'), Venue.name.label('venue_name')) \
-        .join(Artist) \
-        .join(Venue).all()
+    if request.args.get('stream', app.config['SHOWS_STREAMING'], type=lambda value: value.lower() in ('1', 'true')):
+        # render while iterating a server-side cursor, memory stays bounded by the batch size
+        rows = shows.order_by(Show.start_time, Show.id) \
+            .execution_options(yield_per=app.config['SHOWS_STREAM_BATCH'])
+        return Response(stream_template('pages/shows.html', shows=(
+            dict(show_item(show), start_time=format_datetime(show.start_time, 'full')) for show in rows)))
 
-    data = []
-    for i, show in enumerate(shows, start=0):
-        start_date = show.start_time.strftime('%m/%d/%y %H:%M:%S%z')
-        data.append({
-            'venue_id': show.venue_id,
-            'start_time': start_date,
-            'artist_id': show.artist_id,
-            'artist_name': show.artist_name,
-            'artist_image_link': show.artist_image_link,
-            'venue_name': show.venue_name
-        })
+    page = paginate(shows, [Show.start_time, Show.id], lambda s: (s.start_time, s.id))
 
-    return render_template('pages/shows.html', shows=data)
+    start_times = format_datetimes([show.start_time for show in page.items], 'full')
+    data = [dict(show_item(show), start_time=start_time) for show, start_time in zip(page.items, start_times)]
+
+    return render_template('pages/shows.html', shows=data, page=page, pager_args=window)
+
+
+def shows_query(start=None, end=None):
+    shows = db.session.query(Show.id, Show.venue_id, Show.artist_id, Show.start_time, Artist.name.label('artist_name'),
+                             Artist.image_link.label('artist_image_link'), Venue.name.label('venue_name')) \
+        .join(Artist) \
+        .join(Venue)
+    if start:
+        shows = shows.filter(Show.start_time >= start)
+    if end:
+        shows = shows.filter(Show.start_time < end)
+    return shows
+
+
+def show_item(show):
+    return {
+        'venue_id': show.venue_id,
+        'start_time': show.start_time,
+        'artist_id': show.artist_id,
+        'artist_name': show.artist_name,
+        'artist_image_link': show.artist_image_link,
+        'venue_name': show.venue_name
+    }
 
 
 @app.route('/shows/create')
@@ -511,13 +517,20 @@ def create_shows():
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
     try:
-        data = request.form
-
-        new_show = Show(artist_id=data.get('artist_id'), venue_id=data.get('venue_id'),
-                        start_time=data.get('start_time'))
+        row = importer.parse_show(request.form.to_dict())
+    except ValueError as error:
+        flash(f'Show could not be listed: {error}.')
+        return render_template('pages/home.html')
 
+    try:
+        new_show = Show(**row)
         db.session.add(new_show)
+        counters.record_show_created(new_show)
+        rollups.record_show_created(new_show)
+        venue_id, artist_id = new_show.venue_id, new_show.artist_id
         db.session.commit()
+        fragment_cache.invalidate('venue', venue_id)
+        fragment_cache.invalidate('artist', artist_id)
         flash('Show was successfully listed!')
     except:
         db.session.rollback()
@@ -527,6 +540,143 @@ def create_show_submission():
     return render_template('pages/home.html')
 
 
+@app.route('/shows/batch', methods=['POST'])
+def create_shows_batch():
+    # many shows in one transaction, e.g. a partner's schedule:
+    # {"shows": [{"venue_id": 1, "artist_id": 4, "start_time": "2026-05-21T21:30:00Z"}, ...]}
+    data = request.get_json(silent=True)
+    records = data.get('shows') if isinstance(data, dict) else None
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'expected a JSON object with a non-empty "shows" list'}), 400
+    if len(records) > app.config['SHOWS_BATCH_MAX']:
+        return jsonify({'error': f"at most {app.config['SHOWS_BATCH_MAX']} shows per request"}), 413
+
+    try:
+        created, errors = importer.ingest_shows(records)
+    except SQLAlchemyError:
+        db.session.rollback()
+        app.logger.exception('show batch could not be saved')
+        return jsonify({'error': 'the shows could not be saved, none were created'}), 500
+    finally:
+        db.session.close()
+    return jsonify({'created': created, 'errors': errors}), 201 if created else 422
+
+
+#  Analytics
+#  ----------------------------------------------------------------
+
+@app.route('/analytics')
+def analytics():
+    # busiest venues, artists, cities and genres for a month (?period=2026-11) or all time
+    period = request.args.get('period', rollups.ALL)
+    if period != rollups.ALL and not re.fullmatch(r'\d{4}-\d{2}', period):
+        return jsonify({'error': "period must be 'all' or YYYY-MM"}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+
+    return jsonify({
+        'period': period,
+        'busiest_venues': rollups.top('venue', period, limit),
+        'busiest_artists': rollups.top('artist', period, limit),
+        'top_cities': rollups.top('city', period, limit),
+        'most_booked_genres': rollups.top('genre', period, limit),
+    })
+
+
+@app.route('/analytics/<any(venue, artist, city, genre):dimension>/<int:key>')
+def analytics_monthly(dimension, key):
+    # shows per month, e.g. /analytics/city/3
+    return jsonify({'dimension': dimension, 'id': key, 'months': rollups.monthly(dimension, key)})
+
+
+#  Cache
+#  ----------------------------------------------------------------
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(fragment_cache.stats())
+
+
+@app.route('/pool/stats')
+def pool_stats_view():
+    return jsonify({key or 'primary': pool_stats(engine) for key, engine in db.engines.items()})
+
+
+#  Commands
+#  ----------------------------------------------------------------
+
+@app.cli.command('roll-show-counters')
+def roll_show_counters_command():
+    """Move shows that have started since the last run from upcoming to past counters."""
+    moved = counters.roll_shows()
+    click.echo(f'rolled {moved} shows from upcoming to past')
+
+
+@app.cli.command('rebuild-show-counters')
+def rebuild_show_counters_command():
+    """Recompute every venue and artist show counter from the shows table."""
+    counters.rebuild_counters()
+    click.echo('show counters rebuilt')
+
+
+@app.cli.command('rebuild-show-rollups')
+def rebuild_show_rollups_command():
+    """Recompute the analytics rollups from the shows table."""
+    click.echo(f'{rollups.rebuild()} rollup rows written')
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the venue and artist full-text search documents."""
+    search.create_schema()
+    click.echo(f'indexed {search.rebuild(Venue)} venues and {search.rebuild(Artist)} artists')
+
+
+@app.cli.command('geocode-venues')
+@click.option('--batch-size', default=500, show_default=True)
+def geocode_venues_command(batch_size):
+    """Look up coordinates for the venues that have none, with the configured GEOCODER."""
+    located, unplaced = geocoding.geocode_venues(batch_size)
+    click.echo(f'located {located} venues, {unplaced} could not be placed')
+
+
+@app.cli.command('precompile-templates')
+@click.option('--clear', is_flag=True, help='Remove every cached template first, e.g. those of earlier releases.')
+def precompile_templates_command(clear):
+    """Compile every template into the TEMPLATE_CACHE_DIR bytecode cache."""
+    if app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR is not set')
+    names = precompile(app.jinja_env, clear)
+    click.echo(f'compiled {len(names)} templates into {app.config["TEMPLATE_CACHE_DIR"]}')
+
+
+import_cli = AppGroup('import', help='Bulk import venues, artists and shows from CSV or NDJSON files.')
+app.cli.add_command(import_cli)
+
+
+@import_cli.command('venues')
+@click.argument('path')
+@click.option('--batch-size', default=1000, show_default=True)
+def import_venues_command(path, batch_size):
+    """Import venues (name, city, state, address, phone, genres, ...)."""
+    click.echo(importer.import_entities(Venue, path, batch_size).report())
+
+
+@import_cli.command('artists')
+@click.argument('path')
+@click.option('--batch-size', default=1000, show_default=True)
+def import_artists_command(path, batch_size):
+    """Import artists (name, city, state, phone, genres, ...)."""
+    click.echo(importer.import_entities(Artist, path, batch_size).report())
+
+
+@import_cli.command('shows')
+@click.argument('path')
+@click.option('--batch-size', default=5000, show_default=True)
+def import_shows_command(path, batch_size):
+    """Import shows (venue_id, artist_id, start_time)."""
+    click.echo(importer.import_shows(path, batch_size).report())
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
@@ -537,16 +687,6 @@ def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 # ----------------------------------------------------------------------------#
 # Launch.
 # ----------------------------------------------------------------------------#
@@ -0,0 +1,88 @@
+from datetime import timezone
+
+from sqlalchemy import Integer, column, exists, table, text
+
+from formatting import to_datetime
+from models import db, Venue, Show
+
+# ----------------------------------------------------------------------------#
+# Venue availability.
+#
+# A venue is free over [start, end) when none of its shows overlaps that
+# window. Postgres answers the overlap test from a GiST index on
+# (venue_id, tstzrange(start_time, end_time)); SQLite from the show_periods
+# R*Tree, kept in step with the shows table by triggers. The R*Tree stores
+# whole minutes, rounded outwards, so its hits are re-checked against shows.
+# ----------------------------------------------------------------------------#
+
+periods = table('show_periods', column('id', Integer), column('venue_lo', Integer), column('venue_hi', Integer),
+                column('start_min', Integer), column('end_min', Integer))
+
+START_MIN = "CAST(strftime('%s', {0}.start_time) AS INTEGER) / 60"
+END_MIN = "(CAST(strftime('%s', {0}.end_time) AS INTEGER) + 59) / 60"
+
+SQLITE_SCHEMA = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS show_periods USING rtree_i32(id, venue_lo, venue_hi, start_min, end_min)',
+    'CREATE TRIGGER IF NOT EXISTS show_periods_insert AFTER INSERT ON shows BEGIN '
+    'INSERT INTO show_periods VALUES (new.id, new.venue_id, new.venue_id, '
+    f'{START_MIN.format("new")}, {END_MIN.format("new")}); END',
+    'CREATE TRIGGER IF NOT EXISTS show_periods_update AFTER UPDATE OF venue_id, start_time, end_time ON shows BEGIN '
+    'UPDATE show_periods SET venue_lo = new.venue_id, venue_hi = new.venue_id, '
+    f'start_min = {START_MIN.format("new")}, end_min = {END_MIN.format("new")} WHERE id = new.id; END',
+    'CREATE TRIGGER IF NOT EXISTS show_periods_delete AFTER DELETE ON shows BEGIN '
+    'DELETE FROM show_periods WHERE id = old.id; END',
+]
+
+SQLITE_BACKFILL = 'INSERT INTO show_periods SELECT shows.id, shows.venue_id, shows.venue_id, ' \
+                  f'{START_MIN.format("shows")}, {END_MIN.format("shows")} FROM shows ' \
+                  'WHERE NOT EXISTS (SELECT 1 FROM show_periods WHERE show_periods.id = shows.id)'
+
+
+def dialect():
+    return db.session.get_bind().dialect.name
+
+
+def create_schema():
+    # for databases built with db.create_all() rather than the migrations
+    if dialect() != 'sqlite':
+        return
+    for statement in SQLITE_SCHEMA + [SQLITE_BACKFILL]:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def parse_time(value):
+    # naive UTC, the way show times are written
+    return to_datetime(value).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def overlapping_shows(start, end):
+    """Criterion for shows of the outer Venue overlapping [start, end)."""
+    if dialect() == 'postgresql':
+        return exists().where(
+            (Show.venue_id == Venue.id)
+            & db.func.tstzrange(Show.start_time, Show.end_time).op('&&')(db.func.tstzrange(start, end)))
+
+    if dialect() == 'sqlite':
+        start_min = int(start.replace(tzinfo=timezone.utc).timestamp()) // 60
+        end_min = -(-int(end.replace(tzinfo=timezone.utc).timestamp()) // 60)
+        return exists().select_from(periods.join(Show.__table__, Show.id == periods.c.id)).where(
+            (periods.c.venue_lo <= Venue.id) & (periods.c.venue_hi >= Venue.id)
+            & (periods.c.start_min < end_min) & (periods.c.end_min > start_min)
+            & (Show.start_time < end) & (Show.end_time > start))
+
+    return exists().where((Show.venue_id == Venue.id) & (Show.start_time < end) & (Show.end_time > start))
+
+
+def free_venues(city_id, start, end):
+    """Venues of the city with no show overlapping [start, end), as (id, name) rows."""
+    return db.session.query(Venue.id, Venue.name) \
+        .filter(Venue.city_id == city_id) \
+        .filter(~overlapping_shows(start, end))
+
+
+def remove_periods(criterion):
+    # before a bulk delete of shows: one statement for their R*Tree entries instead of
+    # one trigger lookup per deleted show
+    if dialect() == 'sqlite':
+        db.session.execute(periods.delete().where(periods.c.id.in_(db.select(Show.id).where(criterion))))
@@ -0,0 +1,63 @@
+"""Micro-benchmark of the per-row cost of formatting show start times.
+
+Compares the original filter (strftime, then dateutil parse and a fresh babel
+format per row) with formatting.format_datetime and the batch
+formatting.format_datetimes:
+
+    $ python -m benchmarks.formatting --rows 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from formatting import PATTERNS, format_datetime, format_datetimes
+
+
+def legacy(values, format):
+    return [babel.dates.format_datetime(dateutil.parser.parse(value.strftime('%m/%d/%y %H:%M:%S%z')),
+                                        PATTERNS[format])
+            for value in values]
+
+
+def per_row(values, format):
+    return [format_datetime(value, format) for value in values]
+
+
+def batch(values, format):
+    return format_datetimes(values, format)
+
+
+def measure(run, values, format, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(values, format)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / len(values) * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--format', default='full', choices=sorted(PATTERNS))
+    args = parser.parse_args()
+
+    start = datetime(2020, 1, 1)
+    values = [start + timedelta(minutes=37 * i) for i in range(args.rows)]
+    assert legacy(values[:50], args.format) == batch(values[:50], args.format)
+
+    report = {'rows': args.rows, 'format': args.format, 'us_per_row': {
+        name: measure(run, values, args.format, args.repeat)
+        for name, run in (('legacy', legacy), ('format_datetime', per_row), ('format_datetimes', batch))
+    }}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Before/after benchmark for the show, city and genre lookup indexes.
+
+Times the statements that the detail pages (/venues/<id>, /artists/<id>) and
+the create forms issue against the configured database. Run it once before
+and once after `flask db upgrade`, then compare the two reports:
+
+    $ python -m benchmarks.indexes --label before --out before.json
+    $ flask db upgrade
+    $ python -m benchmarks.indexes --label after --out after.json
+    $ python -m benchmarks.indexes --compare before.json after.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import app
+from models import db, Venue, Artist, Show, City, Genre
+
+
+def show_queries(now):
+    return {
+        'venue_past_shows': lambda venue_id, _: Show.query.join(Artist).filter(
+            (Show.start_time < now) & (Show.venue_id == venue_id)).all(),
+        'venue_upcoming_shows': lambda venue_id, _: Show.query.join(Artist).filter(
+            (Show.start_time >= now) & (Show.venue_id == venue_id)).all(),
+        'artist_past_shows': lambda _, artist_id: Show.query.join(Venue).filter(
+            (Show.start_time < now) & (Show.artist_id == artist_id)).all(),
+        'artist_upcoming_shows': lambda _, artist_id: Show.query.join(Venue).filter(
+            (Show.start_time >= now) & (Show.artist_id == artist_id)).all(),
+    }
+
+
+def lookup_queries():
+    return {
+        'city_by_name': lambda city, _: City.query.filter_by(name=city).first(),
+        'genre_by_name': lambda _, genre: Genre.query.filter_by(name=genre).first(),
+    }
+
+
+def sample(column, size):
+    values = [row[0] for row in db.session.query(column).limit(size * 10).all()]
+    return random.sample(values, min(size, len(values))) or [None]
+
+
+def time_query(run, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        for args in params:
+            start = time.perf_counter()
+            run(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'runs': len(timings),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def explain(statement, params):
+    rows = db.session.execute(text('EXPLAIN ' + statement), params).fetchall()
+    return [row[0] for row in rows]
+
+
+def run(label, samples, repeat):
+    now = datetime.utcnow()
+    report = {'label': label, 'dialect': db.engine.dialect.name, 'results': {}, 'plans': {}}
+
+    entity_params = list(zip(sample(Venue.id, samples), sample(Artist.id, samples)))
+    lookup_params = list(zip(sample(City.name, samples), sample(Genre.name, samples)))
+
+    for name, query in show_queries(now).items():
+        report['results'][name] = time_query(query, entity_params, repeat)
+    for name, query in lookup_queries().items():
+        report['results'][name] = time_query(query, lookup_params, repeat)
+
+    if report['dialect'] == 'postgresql':
+        venue_id, artist_id = entity_params[0]
+        city, genre = lookup_params[0]
+        report['plans'] = {
+            'venue_shows': explain('SELECT * FROM shows WHERE venue_id = :id AND start_time >= :now',
+                                   {'id': venue_id, 'now': now}),
+            'artist_shows': explain('SELECT * FROM shows WHERE artist_id = :id AND start_time >= :now',
+                                    {'id': artist_id, 'now': now}),
+            'city_by_name': explain('SELECT * FROM cities WHERE name = :name', {'name': city}),
+            'genre_by_name': explain('SELECT * FROM genres WHERE name = :name', {'name': genre}),
+        }
+    return report
+
+
+def compare(before, after):
+    print(f"{'query':<24}{before['label']:>12}{after['label']:>12}{'speedup':>10}")
+    for name, result in before['results'].items():
+        if name not in after['results']:
+            continue
+        old, new = result['p50_ms'], after['results'][name]['p50_ms']
+        speedup = f'{old / new:.1f}x' if new else '-'
+        print(f'{name:<24}{old:>10.3f}ms{new:>10.3f}ms{speedup:>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--label', default=datetime.utcnow().strftime('%Y%m%d%H%M%S'))
+    parser.add_argument('--samples', type=int, default=50, help='distinct ids/names to query')
+    parser.add_argument('--repeat', type=int, default=5, help='passes over the samples')
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+
+    with app.app_context():
+        report = run(args.label, args.samples, args.repeat)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
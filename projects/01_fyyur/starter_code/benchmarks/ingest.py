@@ -0,0 +1,91 @@
+"""Ingest benchmark: shows per second through POST /shows/batch by batch size.
+
+Sends the same number of shows at each batch size, one request per batch.
+With a batch size of 1 every show pays its own transaction and commit, like
+the show form. Reports shows/s, requests and commits per size as JSON. The
+shows are really created, so point DATABASE_URL at a scratch database:
+
+    $ export DATABASE_URL=sqlite:////tmp/fyyur-bench.db
+    $ python -m benchmarks.ingest --shows 2000 --sizes 1,10,100,1000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+from models import db, Venue, Artist
+
+
+class CommitCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, 'commit', self._count)
+
+    def _count(self, conn):
+        self.count += 1
+
+
+def sample_ids(column, size, rng):
+    ids = [row[0] for row in db.session.query(column).order_by(column).limit(size * 20)]
+    return rng.sample(ids, min(size, len(ids)))
+
+
+def records(rng, venue_ids, artist_ids, count):
+    # far in the future, so they land in the upcoming counters whatever the clock says
+    start = datetime(2099, 1, 1)
+    return [{'venue_id': rng.choice(venue_ids), 'artist_id': rng.choice(artist_ids),
+             'start_time': (start + timedelta(minutes=rng.randrange(500000))).isoformat()}
+            for _ in range(count)]
+
+
+def measure(client, counter, shows, size):
+    commits = counter.count
+    requests = created = 0
+    start = time.perf_counter()
+    for offset in range(0, len(shows), size):
+        response = client.post('/shows/batch', json={'shows': shows[offset:offset + size]})
+        created += response.get_json()['created']
+        requests += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'shows': created,
+        'requests': requests,
+        'commits': counter.count - commits,
+        'seconds': round(elapsed, 3),
+        'shows_per_second': round(created / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shows', type=int, default=2000)
+    parser.add_argument('--sizes', default='1,10,100,1000')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    if max(sizes) > app.config['SHOWS_BATCH_MAX']:
+        parser.error(f"batch sizes are limited to SHOWS_BATCH_MAX ({app.config['SHOWS_BATCH_MAX']})")
+
+    with app.app_context():
+        venue_ids, artist_ids = sample_ids(Venue.id, 100, rng), sample_ids(Artist.id, 100, rng)
+        dialect = db.engine.dialect.name
+    if not venue_ids or not artist_ids:
+        parser.error('the database has no venues or artists, run benchmarks.seed first')
+
+    client = app.test_client()
+    counter = CommitCounter()
+    report = {'dialect': dialect, 'sizes': {}}
+    for size in sizes:
+        report['sizes'][size] = measure(client, counter, records(rng, venue_ids, artist_ids, args.shows), size)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""Route benchmark: latency percentiles and queries per request for every page.
+
+Requests every GET route of app.py (plus the search forms and the paginated
+and streamed listing variants) against the configured database, through the
+Flask test client or, with --server, a local WSGI server in the same process.
+Reports p50/p95/p99 latency, SQL queries per request and peak RSS as JSON.
+Keep one report per commit and compare them to catch regressions:
+
+    $ export DATABASE_URL=sqlite:////tmp/fyyur-bench.db
+    $ python -m benchmarks.routes --label $(git rev-parse --short HEAD) --out before.json
+    $ python -m benchmarks.routes --label $(git rev-parse --short HEAD) --out after.json
+    $ python -m benchmarks.routes --compare before.json after.json
+
+--compare exits with status 1 when a route's p95 grew by more than the
+tolerance or it issues more queries per request than before.
+"""
+import argparse
+import json
+import random
+import re
+import resource
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+from models import db, Venue, Artist, City
+
+# routes that mutate data or only serve tooling are not benchmarked
+SKIPPED_ENDPOINTS = {'static', 'sql_profiler', 'cache_stats'}
+
+# routes that only answer with their query arguments, benchmarked through their variants alone
+ARGUMENT_ENDPOINTS = {'venue_availability', 'venues_nearby'}
+
+
+def availability_args(rng):
+    city = db.session.query(City.name, City.state).join(Venue, Venue.city_id == City.id) \
+        .order_by(City.id).limit(20).all()
+    name, state = rng.choice(city) if city else ('', None)
+    evening = datetime.utcnow().replace(hour=18, minute=0, second=0, microsecond=0) + timedelta(days=7)
+    args = {'city': name, 'start': evening.isoformat(), 'end': (evening + timedelta(hours=5)).isoformat()}
+    if state:
+        args['state'] = state
+    return args
+
+
+def nearby_args(rng, radius_km):
+    placed = db.session.query(Venue.latitude, Venue.longitude).filter(Venue.latitude.isnot(None)) \
+        .order_by(Venue.id).limit(100).all()
+    latitude, longitude = rng.choice(placed) if placed else (37.77, -122.42)
+    return {'lat': latitude, 'lng': longitude, 'radius_km': radius_km}
+
+
+# extra variants of a route on top of the plain GET, as (name, method, query or form data);
+# the data may be a function of the random generator, called once with the database at hand
+VARIANTS = {
+    'search_venues': [('term', 'POST', {'search_term': 'Music'}),
+                      ('prefix', 'POST', {'search_term': 'Ve'})],
+    'search_artists': [('term', 'POST', {'search_term': 'Artist 1'}),
+                       ('prefix', 'POST', {'search_term': 'Ar'})],
+    'artists': [('page_size_200', 'GET', {'page_size': 200})],
+    'shows': [('stream', 'GET', {'stream': 1})],
+    'venue_availability': [('evening', 'GET', availability_args)],
+    'venues_nearby': [('5km', 'GET', lambda rng: nearby_args(rng, 5)),
+                      ('50km', 'GET', lambda rng: nearby_args(rng, 50))],
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, 'after_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def sample_ids(column, size, rng):
+    ids = [row[0] for row in db.session.query(column).order_by(column).limit(size * 20)]
+    return rng.sample(ids, min(size, len(ids)))
+
+
+def cases(rng, samples):
+    ids = {'venue_id': sample_ids(Venue.id, samples, rng), 'artist_id': sample_ids(Artist.id, samples, rng)}
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint in SKIPPED_ENDPOINTS or 'GET' not in rule.methods:
+            continue
+        if any(argument not in ids or not ids[argument] for argument in rule.arguments):
+            print(f'skipping {rule.rule}: no values for {sorted(rule.arguments)}', file=sys.stderr)
+            continue
+
+        urls = [rule.rule]
+        if rule.arguments:
+            urls = [rule.rule.replace(f'<int:{argument}>', str(value))
+                    for argument in rule.arguments for value in ids[argument]]
+        if rule.endpoint not in ARGUMENT_ENDPOINTS:
+            yield rule.rule, 'GET', urls, None
+        for name, method, values in VARIANTS.get(rule.endpoint, []):
+            if callable(values):
+                values = values(rng)
+            if method == 'GET':
+                yield f'{rule.rule} ({name})', 'GET', [f'{url}?{urlencode(values)}' for url in urls], None
+            else:
+                yield f'{rule.rule} ({name})', method, urls, values
+
+
+def client_requester():
+    client = app.test_client()
+
+    def send(method, url, data):
+        response = client.open(url, method=method, data=data)
+        response.get_data()
+        status = response.status_code
+        response.close()
+        return status
+    return send
+
+
+def server_requester():
+    server = make_server('127.0.0.1', 0, app, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    def send(method, url, data):
+        body = urlencode(data).encode() if data else None
+        try:
+            with urllib.request.urlopen(urllib.request.Request(base + url, data=body, method=method)) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+    return send
+
+
+def percentile(timings, fraction):
+    # nearest rank on sorted timings
+    return timings[min(len(timings) - 1, max(0, round(fraction * len(timings)) - 1))]
+
+
+def measure(send, counter, method, urls, data, requests, warmup):
+    for url in urls[:warmup]:
+        send(method, url, data)
+
+    timings, queries, statuses = [], [], {}
+    for n in range(requests):
+        url = urls[n % len(urls)]
+        before = counter.count
+        start = time.perf_counter()
+        status = send(method, url, data)
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count - before)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    timings.sort()
+    return {
+        'requests': requests,
+        'status': statuses,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run(label, requests, samples, warmup, use_server, seed, only=None, exclude=None):
+    rng = random.Random(seed)
+    counter = QueryCounter()
+    with app.app_context():
+        route_cases = [case for case in cases(rng, samples)
+                       if (not only or re.search(only, case[0])) and not (exclude and re.search(exclude, case[0]))]
+        report = {
+            'label': label,
+            'dialect': db.engine.dialect.name,
+            'mode': 'server' if use_server else 'test_client',
+            'rows': {model.__tablename__: db.session.query(model).count() for model in (Venue, Artist)},
+            'routes': {},
+        }
+        db.session.remove()
+
+    send = server_requester() if use_server else client_requester()
+    for name, method, urls, data in route_cases:
+        report['routes'][name] = measure(send, counter, method, urls, data, requests, warmup)
+        print(f"{name:<40}p50 {report['routes'][name]['p50_ms']:>9.2f}ms  "
+              f"p95 {report['routes'][name]['p95_ms']:>9.2f}ms  "
+              f"{report['routes'][name]['queries_per_request']:>6} queries", file=sys.stderr)
+
+    report['peak_rss_kb'] = peak_rss_kb()
+    return report
+
+
+def compare(before, after, tolerance):
+    regressions = []
+    print(f"p95 latency and queries per request, {before['label']} -> {after['label']}")
+    for name, old in before['routes'].items():
+        new = after['routes'].get(name)
+        if new is None:
+            continue
+        slower = new['p95_ms'] > old['p95_ms'] * (1 + tolerance)
+        more_queries = new['queries_per_request'] > old['queries_per_request']
+        flag = '  <-- regression' if slower or more_queries else ''
+        print(f"{name:<40}{old['p95_ms']:>14.2f}ms{new['p95_ms']:>14.2f}ms"
+              f"{old['queries_per_request']:>7} -> {new['queries_per_request']:<4}{flag}")
+        if flag:
+            regressions.append(name)
+    print(f"peak RSS: {before['peak_rss_kb']} kB -> {after['peak_rss_kb']} kB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--label', default=datetime.utcnow().strftime('%Y%m%d%H%M%S'))
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per route')
+    parser.add_argument('--samples', type=int, default=20, help='distinct venue/artist ids per detail route')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed requests per route first')
+    parser.add_argument('--server', action='store_true', help='go through a local WSGI server, not the test client')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', metavar='REGEX', help='benchmark only the routes matching this')
+    parser.add_argument('--exclude', metavar='REGEX', help="skip the routes matching this, e.g. 'stream'")
+    parser.add_argument('--log-level', default='WARNING', help='app log level while benchmarking')
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slowdown when comparing')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            regressions = compare(json.load(before), json.load(after), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    app.logger.setLevel(args.log_level)
+    report = run(args.label, args.requests, args.samples, args.warmup, args.server, args.seed,
+                 args.only, args.exclude)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
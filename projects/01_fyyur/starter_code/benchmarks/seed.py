@@ -0,0 +1,175 @@
+"""Synthetic data generator for benchmarking Fyyur at scale.
+
+Fills the configured database (DATABASE_URL) with cities, genres, venues,
+artists and shows. Rows go in with executemany batches (COPY for shows on
+Postgres); venues are placed by the offline geocoder, and counters, rollups
+and search documents are rebuilt once at the end:
+
+    $ export DATABASE_URL=sqlite:////tmp/fyyur-bench.db
+    $ python -m benchmarks.seed --create --venues 10000 --artists 50000 --shows 2000000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import insert
+
+import availability
+import counters
+import geocoding
+import lookups
+import rollups
+import search
+from app import app
+from forms import VenueForm
+from importer import ImportStats, insert_shows
+from models import db, Venue, Artist, venue_genres, artist_genres
+
+STATES = [value for value, _ in VenueForm.state.kwargs['choices']]
+GENRES = [value for value, _ in VenueForm.genres.kwargs['choices']]
+
+
+def seed_cities(rng, count):
+    keys = [lookups.city_key(f'City {n}', rng.choice(STATES)) for n in range(1, count + 1)]
+    ids = lookups.resolve_cities(keys)
+    db.session.commit()
+    return [ids[key] for key in keys]
+
+
+def seed_genres(count):
+    names = GENRES[:count] + [f'Genre {n}' for n in range(len(GENRES) + 1, count + 1)]
+    ids = lookups.resolve_genres(names)
+    db.session.commit()
+    return list(ids.values())
+
+
+def entity_row(model, rng, n, city_ids):
+    kind = model.__tablename__[:-1]
+    row = {
+        'name': f'{kind.title()} {n}',
+        'city_id': rng.choice(city_ids),
+        'phone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+        'image_link': f'https://example.com/{kind}/{n}.jpg',
+        'facebook_link': f'https://www.facebook.com/{kind}{n}',
+        'website': f'https://{kind}{n}.example.com',
+        'seeking_description': 'Looking for new acts' if n % 3 == 0 else None,
+    }
+    if model is Venue:
+        row.update(address=f'{rng.randint(1, 9999)} Main Street', seeking_talent=n % 3 == 0)
+    else:
+        row.update(seeking_venue=n % 3 == 0)
+    return row
+
+
+def seed_entities(model, rng, count, city_ids, genre_ids, genres_per_entity, batch_size, echo):
+    links, key = {Venue: (venue_genres, 'venue_id'), Artist: (artist_genres, 'artist_id')}[model]
+    table = model.__table__
+    stats = ImportStats(model.__tablename__)
+    ids = []
+
+    for start in range(0, count, batch_size):
+        rows = [entity_row(model, rng, n, city_ids) for n in range(start + 1, min(start + batch_size, count) + 1)]
+        batch_ids = [entity_id for (entity_id,) in db.session.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)]
+        db.session.execute(links.insert(), [
+            {key: entity_id, 'genre_id': genre_id}
+            for entity_id in batch_ids
+            for genre_id in rng.sample(genre_ids, min(genres_per_entity, len(genre_ids)))])
+        db.session.commit()
+        ids.extend(batch_ids)
+        stats.rows += len(batch_ids)
+        echo(stats.report())
+    return ids
+
+
+def show_rows(rng, count, venue_ids, artist_ids, now, past_days, future_days):
+    span = (past_days + future_days) * 86400
+    start = now - timedelta(days=past_days)
+    for _ in range(count):
+        # on the hour, like the shows people enter through the form, and one to four hours long
+        start_time = start + timedelta(hours=rng.randrange(span // 3600))
+        yield {
+            'venue_id': rng.choice(venue_ids),
+            'artist_id': rng.choice(artist_ids),
+            'start_time': start_time,
+            'end_time': start_time + timedelta(hours=rng.randint(1, 4)),
+        }
+
+
+def seed_shows(rows, batch_size, echo):
+    stats = ImportStats('shows')
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return stats
+        insert_shows(batch)
+        db.session.commit()
+        stats.rows += len(batch)
+        echo(stats.report())
+
+
+def seed(args, echo=print):
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    if args.create:
+        db.create_all()
+        search.create_schema()
+        availability.create_schema()
+
+    started = time.perf_counter()
+    city_ids = seed_cities(rng, args.cities)
+    genre_ids = seed_genres(args.genres)
+    venue_ids = seed_entities(Venue, rng, args.venues, city_ids, genre_ids, args.genres_per_entity,
+                              args.batch_size, echo)
+    artist_ids = seed_entities(Artist, rng, args.artists, city_ids, genre_ids, args.genres_per_entity,
+                               args.batch_size, echo)
+    shows = seed_shows(show_rows(rng, args.shows, venue_ids, artist_ids, now, args.past_days, args.future_days),
+                       args.show_batch_size, echo)
+
+    # the offline stand-in, whatever GEOCODER is configured: City n gets a made-up centre
+    geocoding.geocode_venues(args.batch_size, echo, geocoding.LocalGeocoder(spread_km=20))
+
+    echo('rebuilding show counters, rollups and search documents')
+    counters.rebuild_counters(now)
+    rollups.rebuild()
+    search.rebuild(Venue)
+    search.rebuild(Artist)
+
+    return {
+        'database': db.engine.url.render_as_string(hide_password=True),
+        'seed': args.seed,
+        'cities': len(city_ids),
+        'genres': len(genre_ids),
+        'venues': len(venue_ids),
+        'artists': len(artist_ids),
+        'shows': shows.rows,
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--create', action='store_true', help='create missing tables first (no migrations)')
+    parser.add_argument('--cities', type=int, default=500)
+    parser.add_argument('--genres', type=int, default=len(GENRES))
+    parser.add_argument('--venues', type=int, default=2000)
+    parser.add_argument('--artists', type=int, default=10000)
+    parser.add_argument('--shows', type=int, default=1000000)
+    parser.add_argument('--genres-per-entity', type=int, default=2)
+    parser.add_argument('--past-days', type=int, default=730, help='oldest show, in days before now')
+    parser.add_argument('--future-days', type=int, default=365, help='latest show, in days after now')
+    parser.add_argument('--batch-size', type=int, default=1000, help='venues/artists per transaction')
+    parser.add_argument('--show-batch-size', type=int, default=20000, help='shows per transaction')
+    parser.add_argument('--seed', type=int, default=1, help='random seed, for reproducible datasets')
+    args = parser.parse_args()
+
+    with app.app_context():
+        summary = seed(args)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Startup benchmark: first-render latency of a new worker, with and without the template bytecode cache.
+
+A fresh worker has no template in memory. Each measured request starts from
+an emptied fragment cache and, but for warm, an emptied in-memory template
+cache, then reports:
+
+* compile: no bytecode cache, every template is parsed and compiled;
+* bytecode: templates are loaded from a precompiled bytecode cache;
+* warm: templates already in memory, the steady state.
+
+Also times loading every template under templates/ both ways, which is the
+compile cost alone, without the database:
+
+    $ export DATABASE_URL=sqlite:////tmp/fyyur-bench.db
+    $ python -m benchmarks.templates --repeat 20
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+from app import app
+from cache import fragment_cache
+from models import db, Venue, Artist
+from templating import TemplateBytecodeCache, precompile
+
+MODES = ('compile', 'bytecode', 'warm')
+
+
+def pages():
+    venue_id = db.session.query(Venue.id).order_by(Venue.id).limit(1).scalar()
+    artist_id = db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar()
+    urls = ['/', '/venues', '/artists', '/shows', '/venues/create', '/shows/create']
+    if venue_id is not None:
+        urls += [f'/venues/{venue_id}', f'/venues/{venue_id}/edit']
+    if artist_id is not None:
+        urls += [f'/artists/{artist_id}', f'/artists/{artist_id}/edit']
+    return urls
+
+
+def use(mode, bytecode_cache):
+    env = app.jinja_env
+    env.bytecode_cache = bytecode_cache if mode == 'bytecode' else None
+    # rendered fragments would skip their templates; every mode renders them again
+    fragment_cache.local.clear()
+    if mode != 'warm':
+        env.cache.clear()
+
+
+def measure_page(client, url, mode, bytecode_cache, repeat):
+    timings = []
+    for _ in range(repeat):
+        use(mode, bytecode_cache)
+        start = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        timings.append((time.perf_counter() - start) * 1000)
+        response.close()
+    return {'median_ms': round(statistics.median(timings), 3), 'min_ms': round(min(timings), 3)}
+
+
+def measure_load(mode, bytecode_cache, repeat):
+    env = app.jinja_env
+    timings = []
+    for _ in range(repeat):
+        use(mode, bytecode_cache)
+        start = time.perf_counter()
+        for name in env.list_templates(extensions=('html',)):
+            env.get_template(name)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    configured = app.jinja_env.bytecode_cache
+    bytecode_cache = TemplateBytecodeCache(tempfile.mkdtemp(prefix='fyyur-templates-'))
+    app.jinja_env.bytecode_cache = bytecode_cache
+    names = precompile(app.jinja_env)
+
+    client = app.test_client()
+    with app.app_context():
+        urls = pages()
+    for url in urls:
+        # the database and lookup caches are warm for every mode; only templates differ
+        client.get(url).close()
+
+    report = {
+        'templates': len(names),
+        'load_all_ms': {mode: measure_load(mode, bytecode_cache, args.repeat) for mode in MODES},
+        'pages': {url: {mode: measure_page(client, url, mode, bytecode_cache, args.repeat) for mode in MODES}
+                  for url in urls},
+    }
+    app.jinja_env.bytecode_cache = configured
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
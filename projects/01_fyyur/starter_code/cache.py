@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+
+# ----------------------------------------------------------------------------#
+# Fragment cache.
+#
+# Rendered page fragments are cached per entity under a key that includes the
+# entity's version stamp, so invalidating an entity is a single version bump
+# and stale fragments simply age out of the LRU. Fragments are kept in an
+# in-process LRU; an optional shared backend (anything with the cachelib
+# get/set/delete/inc interface, e.g. cachelib.RedisCache) also holds the
+# version stamps and fragments so that every worker sees the same state.
+# ----------------------------------------------------------------------------#
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires and expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._items[key] = (value, expires)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class LocalBackend:
+    """In-memory stand-in for a shared cache server, with the cachelib interface."""
+
+    def __init__(self, max_size=10000, default_timeout=300):
+        self.default_timeout = default_timeout
+        self._items = LRUCache(max_size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._items.get(key)
+
+    def set(self, key, value, timeout=None):
+        self._items.set(key, value, self.default_timeout if timeout is None else timeout)
+        return True
+
+    def delete(self, key):
+        self._items.delete(key)
+        return True
+
+    def inc(self, key, delta=1):
+        with self._lock:
+            value = (self._items.get(key) or 0) + delta
+            self._items.set(key, value, 0)
+            return value
+
+
+class FragmentCache:
+    def __init__(self, app=None):
+        self.local = LRUCache(1000)
+        self.backend = None
+        self.timeout = 60
+        self._versions = {}
+        # local version stamps start over with the process, the epoch keeps them from repeating
+        self.epoch = time.time_ns()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.shared_hits = self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.local = LRUCache(app.config.get('FRAGMENT_CACHE_SIZE', 1000))
+        self.timeout = app.config.get('FRAGMENT_CACHE_TIMEOUT', 60)
+        backend = app.config.get('FRAGMENT_CACHE_BACKEND')
+        if backend:
+            module, _, name = backend.rpartition('.')
+            factory = getattr(import_module(module), name)
+            self.backend = factory(**app.config.get('FRAGMENT_CACHE_BACKEND_OPTIONS', {}))
+        app.extensions['fragment_cache'] = self
+
+    def version(self, kind, key):
+        if self.backend is not None:
+            return self.backend.get(f'version:{kind}:{key}') or 0
+        return self._versions.get(f'{kind}:{key}', 0)
+
+    def stamp(self, kind, key):
+        """A value that changes whenever (kind, key) is invalidated, for page validators."""
+        if self.backend is not None:
+            return self.version(kind, key)
+        return f'{self.epoch}.{self.version(kind, key)}'
+
+    def invalidate(self, kind, *keys):
+        for key in keys:
+            if self.backend is not None:
+                self.backend.inc(f'version:{kind}:{key}')
+            else:
+                with self._lock:
+                    self._versions[f'{kind}:{key}'] = self._versions.get(f'{kind}:{key}', 0) + 1
+            self.invalidations += 1
+
+    def get_or_render(self, kind, key, render):
+        """Cached fragment for (kind, key), calling `render()` on a miss.
+
+        A render that returns None (e.g. unknown id) is not cached.
+        """
+        cache_key = f'fragment:{kind}:{key}:{self.version(kind, key)}'
+
+        value = self.local.get(cache_key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.backend is not None:
+            value = self.backend.get(cache_key)
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(cache_key, value, self.timeout)
+                return value
+
+        self.misses += 1
+        value = render()
+        if value is not None:
+            self.local.set(cache_key, value, self.timeout)
+            if self.backend is not None:
+                self.backend.set(cache_key, value, self.timeout)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.shared_hits) / lookups, 4) if lookups else None,
+            'invalidations': self.invalidations,
+            'local_entries': len(self.local),
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+        }
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+
+# app.py reads its configuration once per process, when the first test module imports it, so the
+# throwaway database is chosen here, before any test module is collected; never the configured one
+TEST_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DIR, 'fyyur_test.db')
+os.environ['LOG_FILE'] = os.path.join(TEST_DIR, 'fyyur_test.log')
+os.environ['TEMPLATE_CACHE_DIR'] = os.path.join(TEST_DIR, 'template_cache')
+
+
+@pytest.fixture
+def database(request):
+    """An app context over empty tables, dropped again after the test.
+
+    Unittest classes take it with @pytest.mark.usefixtures('database'); it is
+    also set as `self.app`.
+    """
+    import availability
+    import lookups
+    import search
+    from app import app
+    from cache import fragment_cache
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        search.create_schema()
+        availability.create_schema()
+        lookups.cities.invalidate()
+        lookups.genres.invalidate()
+        fragment_cache.local.clear()
+        if request.instance is not None:
+            request.instance.app = app
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+        # the SQLite search and availability tables are not in the metadata; triggers go with their tables
+        for (name,) in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                               "AND sql LIKE 'CREATE VIRTUAL TABLE%'")).all():
+            db.session.execute(text(f'DROP TABLE IF EXISTS {name}'))
+        db.session.commit()
+        db.session.remove()
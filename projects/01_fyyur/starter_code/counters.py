@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, case
+
+from models import db, Venue, Artist, Show, CounterMark
+
+# ----------------------------------------------------------------------------#
+# Show counters.
+#
+# Venue and Artist carry num_upcoming_shows / num_past_shows so listing pages
+# never have to count the shows table. A show counts as upcoming while its
+# start_time is after the 'shows_rolled_until' mark; roll_shows() advances the
+# mark and moves every show it passes over from upcoming to past. Writers read
+# the mark under a shared lock and roll_shows() under an exclusive one, so a
+# roll never runs between a writer classifying its shows and committing them.
+# ----------------------------------------------------------------------------#
+
+MARK_NAME = 'shows_rolled_until'
+
+
+def get_mark(lock=None):
+    """The mark row, locked until commit with lock='share' (writers) or lock='update' (rolls)."""
+    query = CounterMark.query.filter_by(name=MARK_NAME)
+    if lock and db.session.get_bind().dialect.name == 'sqlite':
+        # no row locks: take the database write lock before reading, which orders every writer
+        db.session.execute(CounterMark.__table__.update().where(CounterMark.name == MARK_NAME)
+                           .values(name=CounterMark.name))
+        query = query.populate_existing()
+    elif lock:
+        query = query.with_for_update(read=lock == 'share')
+    mark = query.first()
+
+    if mark is None:
+        mark = CounterMark(name=MARK_NAME, value=datetime.utcnow())
+        db.session.add(mark)
+        db.session.flush()
+    return mark
+
+
+def add_shows(criterion):
+    # call after the matching shows are flushed, inside the writing transaction
+    _shift_shows(criterion, 1)
+
+
+def remove_shows(criterion):
+    # call before the matching shows are deleted, inside the writing transaction
+    _shift_shows(criterion, -1)
+
+
+def add_show_rows(rows):
+    # for shows inserted in bulk: dicts with venue_id, artist_id and start_time
+    mark = _utc(get_mark(lock='share').value)
+    venue_deltas = defaultdict(lambda: [0, 0])
+    artist_deltas = defaultdict(lambda: [0, 0])
+    for row in rows:
+        slot = 0 if _utc(row['start_time']) > mark else 1
+        venue_deltas[row['venue_id']][slot] += 1
+        artist_deltas[row['artist_id']][slot] += 1
+
+    _apply(Venue, venue_deltas)
+    _apply(Artist, artist_deltas)
+
+
+def _utc(value):
+    # naive UTC, whether the value came from the database or from user input
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def record_show_created(show):
+    db.session.flush()
+    add_shows(Show.id == show.id)
+
+
+def _shift_shows(criterion, sign):
+    mark = get_mark(lock='share').value
+    is_upcoming = case((Show.start_time > mark, 1), else_=0)
+
+    rows = db.session.query(Show.venue_id, Show.artist_id,
+                            db.func.sum(is_upcoming), db.func.count(Show.id)) \
+        .filter(criterion) \
+        .group_by(Show.venue_id, Show.artist_id).all()
+
+    venue_deltas = defaultdict(lambda: [0, 0])
+    artist_deltas = defaultdict(lambda: [0, 0])
+    for venue_id, artist_id, upcoming, total in rows:
+        upcoming = int(upcoming or 0)
+        for deltas, key in ((venue_deltas, venue_id), (artist_deltas, artist_id)):
+            deltas[key][0] += sign * upcoming
+            deltas[key][1] += sign * (total - upcoming)
+
+    _apply(Venue, venue_deltas)
+    _apply(Artist, artist_deltas)
+
+
+def _apply(model, deltas):
+    if not deltas:
+        return
+    table = model.__table__
+    statement = table.update() \
+        .where(table.c.id == bindparam('_id')) \
+        .values(num_upcoming_shows=table.c.num_upcoming_shows + bindparam('_upcoming'),
+                num_past_shows=table.c.num_past_shows + bindparam('_past'))
+
+    db.session.execute(statement, [{'_id': key, '_upcoming': upcoming, '_past': past}
+                                   for key, (upcoming, past) in deltas.items()])
+
+
+def roll_shows(now=None):
+    # move shows whose start_time passed since the last roll from upcoming to past
+    now = now or datetime.utcnow()
+    mark = get_mark(lock='update')
+
+    passed = (Show.start_time > mark.value) & (Show.start_time <= now)
+    moved = 0
+    for model, column in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        rows = db.session.query(column, db.func.count(Show.id)) \
+            .filter(passed) \
+            .group_by(column).all()
+        _apply(model, {key: (-count, count) for key, count in rows})
+        if model is Venue:
+            moved = sum(count for _, count in rows)
+
+    mark.value = now
+    db.session.commit()
+    return moved
+
+
+def rebuild_counters(now=None):
+    # recompute every counter from the shows table and reset the mark
+    now = now or datetime.utcnow()
+    mark = get_mark(lock='update')
+
+    for model, column in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        upcoming = db.select(db.func.count(Show.id)) \
+            .where((column == model.id) & (Show.start_time > now)).scalar_subquery()
+        past = db.select(db.func.count(Show.id)) \
+            .where((column == model.id) & (Show.start_time <= now)).scalar_subquery()
+        db.session.query(model).update({model.num_upcoming_shows: upcoming, model.num_past_shows: past},
+                                       synchronize_session=False)
+
+    mark.value = now
+    db.session.commit()
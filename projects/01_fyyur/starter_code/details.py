@@ -0,0 +1,92 @@
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy.orm import joinedload
+
+from formatting import format_datetimes
+from models import db, Venue, Artist, Show
+
+# ----------------------------------------------------------------------------#
+# Detail pages.
+#
+# The venue and artist pages are built from two queries: the entity with its
+# city and genres joined in, and every show of the entity joined to the other
+# side, flagged past/upcoming by the database. Both pages get plain dicts and
+# tuples back, so rendering never touches (or dirties) ORM instances.
+# ----------------------------------------------------------------------------#
+
+ShowItem = namedtuple('ShowItem', ['venue_id', 'venue_name', 'venue_image_link',
+                                   'artist_id', 'artist_name', 'artist_image_link', 'start_time'])
+
+
+def venue_details(venue_id, now=None):
+    venue = Venue.query.options(joinedload(Venue.city), joinedload(Venue.genres)) \
+        .filter(Venue.id == venue_id).first()
+    if venue is None:
+        return None
+
+    past_shows, upcoming_shows = load_shows(Show.venue_id == venue_id, now)
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": [genre.name for genre in venue.genres],
+        "address": venue.address,
+        "city": venue.city.name,
+        "state": venue.city.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows),
+    }
+
+
+def artist_details(artist_id, now=None):
+    artist = Artist.query.options(joinedload(Artist.city), joinedload(Artist.genres)) \
+        .filter(Artist.id == artist_id).first()
+    if artist is None:
+        return None
+
+    past_shows, upcoming_shows = load_shows(Show.artist_id == artist_id, now)
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": [genre.name for genre in artist.genres],
+        "city": artist.city.name,
+        "state": artist.city.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "image_link": artist.image_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows),
+    }
+
+
+def load_shows(criterion, now=None):
+    """(past, upcoming) shows matching `criterion`, most recent past show first."""
+    now = now or datetime.utcnow()
+    rows = db.session.query(Show.venue_id, Venue.name, Venue.image_link,
+                            Show.artist_id, Artist.name, Artist.image_link,
+                            Show.start_time, (Show.start_time >= now).label('upcoming')) \
+        .join(Venue, Venue.id == Show.venue_id) \
+        .join(Artist, Artist.id == Show.artist_id) \
+        .filter(criterion) \
+        .order_by(Show.start_time, Show.id).all()
+
+    past_shows, upcoming_shows = [], []
+    start_times = format_datetimes([row.start_time for row in rows], 'full')
+    for (*fields, _, upcoming), start_time in zip(rows, start_times):
+        show = ShowItem(*fields, start_time)
+        (upcoming_shows if upcoming else past_shows).append(show)
+    past_shows.reverse()
+    return past_shows, upcoming_shows
@@ -0,0 +1,118 @@
+from collections import namedtuple
+
+from sqlalchemy import update
+
+import geo
+import lookups
+import rollups
+import search
+from models import db, Venue, Artist, City, Genre, Show, venue_genres, artist_genres
+
+# ----------------------------------------------------------------------------#
+# Edit forms.
+#
+# The edit forms are filled from one projection query: the row's own columns,
+# its city and one joined row per genre, never the ORM instance and its
+# relationships. A submission is compared against the same projection and
+# written as a single UPDATE of the changed columns, guarded by the row's
+# version, and genre links are diffed as sets, so an unchanged genre list
+# costs nothing. A venue moving city or an artist changing genres also moves
+# their shows in the analytics rollups.
+# ----------------------------------------------------------------------------#
+
+# rollup_fields: the changes that move the row's shows to other rollup keys
+Editable = namedtuple('Editable', ['link_key', 'columns', 'rollup_fields', 'show_key', 'index'])
+
+EDITABLE = {
+    Venue: Editable(venue_genres.c.venue_id, ['name', 'address', 'phone', 'image_link', 'facebook_link'],
+                    {'city_id'}, Show.venue_id, search.index_venues),
+    Artist: Editable(artist_genres.c.artist_id, ['name', 'phone', 'image_link', 'facebook_link'],
+                     {'genres'}, Show.artist_id, search.index_artists),
+}
+
+
+class EditConflict(Exception):
+    """The row was changed or deleted after the form was loaded."""
+
+
+def form_data(model, key):
+    """The edit form's fields of one venue or artist, or None if it does not exist."""
+    link_key, columns = EDITABLE[model].link_key, EDITABLE[model].columns
+    links = link_key.table
+    rows = db.session.query(model.id, model.version, model.city_id, City.name, City.state,
+                            Genre.id, Genre.name, *[getattr(model, column) for column in columns]) \
+        .join(City, City.id == model.city_id) \
+        .outerjoin(links, link_key == model.id) \
+        .outerjoin(Genre, Genre.id == links.c.genre_id) \
+        .filter(model.id == key) \
+        .all()
+    if not rows:
+        return None
+
+    row_id, version, city_id, city, state = rows[0][:5]
+    data = dict(zip(columns, rows[0][7:]))
+    data.update(id=row_id, version=version, city_id=city_id, city=city, state=state,
+                genre_ids={row[5]: row[6] for row in rows if row[5] is not None})
+    data['genres'] = sorted(data['genre_ids'].values())
+    return data
+
+
+def save(model, key, version, form):
+    """Apply a submitted edit form; returns the names of the fields that changed.
+
+    Only the fields present in `form` are considered. Raises EditConflict when
+    the row is gone or its version is no longer `version`.
+    """
+    editable = EDITABLE[model]
+    link_key, columns = editable.link_key, editable.columns
+    current = form_data(model, key)
+    if current is None or current['version'] != version:
+        raise EditConflict()
+
+    values = {column: form[column] for column in columns
+              if column in form and (form[column] or None) != (current[column] or None)}
+    changed = set(values)
+
+    if 'city' in form and 'state' in form:
+        city_key = lookups.city_key(form['city'], form['state'])
+        if city_key != (current['city'], current['state']):
+            city_id = lookups.resolve_cities([city_key])[city_key]
+            if city_id != current['city_id']:
+                values['city_id'] = city_id
+                changed.add('city_id')
+
+    added = removed = set()
+    if 'genres' in form:
+        wanted = set(lookups.resolve_genres(form.getlist('genres')).values())
+        added, removed = wanted - current['genre_ids'].keys(), current['genre_ids'].keys() - wanted
+        if added or removed:
+            changed.add('genres')
+
+    if not changed:
+        return changed
+
+    if model is Venue and changed & {'address', 'city_id'}:
+        # the old coordinates are wrong now; geocode-venues looks up the new ones
+        values.update(geo.located(None, None))
+
+    moves_shows = bool(changed & editable.rollup_fields)
+    if moves_shows:
+        rollups.remove_shows(editable.show_key == key)
+
+    result = db.session.execute(update(model.__table__)
+                                .where(model.id == key, model.version == version)
+                                .values(version=model.version + 1, **values))
+    if result.rowcount != 1:
+        raise EditConflict()
+
+    links = link_key.table
+    if removed:
+        db.session.execute(links.delete().where(link_key == key, links.c.genre_id.in_(removed)))
+    if added:
+        db.session.execute(links.insert(), [{link_key.name: key, 'genre_id': genre_id} for genre_id in added])
+
+    if moves_shows:
+        rollups.add_shows(editable.show_key == key)
+    if changed & {'name', 'city_id', 'genres'}:
+        editable.index([key])
+    return changed
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import babel.dates
+import dateutil.parser
+from babel import Locale
+
+# ----------------------------------------------------------------------------#
+# Date formatting, shared by the Jinja filter and the page loaders.
+#
+# Babel patterns and locales are resolved once per (format, locale) and kept;
+# datetime values skip parsing altogether. Route code formatting a whole
+# result set should call format_datetimes() once rather than the filter per row.
+# ----------------------------------------------------------------------------#
+
+PATTERNS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+# left to babel, which builds them from the locale's date and time formats
+NAMED_FORMATS = ('short', 'long')
+
+
+@lru_cache(maxsize=64)
+def compiled(format='medium', locale=None):
+    pattern = babel.dates.parse_pattern(PATTERNS.get(format, format))
+    return pattern, Locale.parse(locale or babel.dates.LC_TIME)
+
+
+def to_datetime(value):
+    if isinstance(value, datetime):
+        date = value
+    else:
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            date = dateutil.parser.parse(value)
+    # babel treats naive values as UTC
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def format_datetime(value, format='medium', locale=None):
+    return format_datetimes([value], format, locale)[0]
+
+
+def format_datetimes(values, format='medium', locale=None):
+    if format in NAMED_FORMATS:
+        return [babel.dates.format_datetime(to_datetime(value), format, locale=locale or babel.dates.LC_TIME)
+                for value in values]
+    pattern, locale = compiled(format, locale)
+    return [pattern.apply(to_datetime(value), locale) for value in values]
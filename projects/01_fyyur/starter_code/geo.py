@@ -0,0 +1,143 @@
+import heapq
+import math
+
+from flask import current_app
+from sqlalchemy import or_
+
+from models import db, Venue, City
+
+# ----------------------------------------------------------------------------#
+# Nearby venues.
+#
+# Venues carry a latitude, a longitude and a geohash. The geohash is stored
+# as an integer: the two coordinates quantized to 26 bits each and
+# interleaved, longitude first. That is the bit layout of the usual base-32
+# geohash strings, and it means every geohash prefix is one contiguous range
+# of a plain B-tree index, on any database. A radius search covers the
+# circle's bounding box with at most MAX_CELLS_PER_AXIS² cells of a suitable
+# prefix length. It reads the coordinates of the venues in those ranges,
+# keeps the nearest by exact (haversine) distance, then loads names and
+# cities for those only. With NEARBY_POSTGIS set, Postgres answers with
+# ST_DWithin over the GiST index from the migration instead.
+# ----------------------------------------------------------------------------#
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_BITS = 26
+MAX_CELLS_PER_AXIS = 4
+
+
+def encode(latitude, longitude):
+    """The integer geohash of a point."""
+    return _interleave(_cell(longitude + 180, 360, GEOHASH_BITS) % (1 << GEOHASH_BITS),
+                       min(_cell(latitude + 90, 180, GEOHASH_BITS), (1 << GEOHASH_BITS) - 1), GEOHASH_BITS)
+
+
+def located(latitude, longitude):
+    """Venue column values for a point, or cleared ones when it is unknown."""
+    if latitude is None or longitude is None:
+        return {'latitude': None, 'longitude': None, 'geohash': None}
+    return {'latitude': latitude, 'longitude': longitude, 'geohash': encode(latitude, longitude)}
+
+
+def _cell(offset, span, bits):
+    return math.floor(offset / span * (1 << bits))
+
+
+def _interleave(x, y, bits):
+    value = 0
+    for bit in range(bits - 1, -1, -1):
+        value = (value << 2) | ((x >> bit) & 1) << 1 | ((y >> bit) & 1)
+    return value
+
+
+def distance_km(latitude, longitude, other_latitude, other_longitude):
+    phi, other_phi = math.radians(latitude), math.radians(other_latitude)
+    a = math.sin((other_phi - phi) / 2) ** 2 + \
+        math.cos(phi) * math.cos(other_phi) * math.sin(math.radians(other_longitude - longitude) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(south, north, west, east) around the circle; west > east when it crosses the antimeridian."""
+    angle = radius_km / EARTH_RADIUS_KM
+    south, north = latitude - math.degrees(angle), latitude + math.degrees(angle)
+    if south <= -90 or north >= 90 or angle >= math.pi / 2:
+        # the circle contains a pole: every longitude
+        return max(south, -90), min(north, 90), -180.0, 180.0
+    spread = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(latitude)))))
+    west, east = longitude - spread, longitude + spread
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, north, west, east
+
+
+def cover(south, north, west, east):
+    """Sorted, merged [low, high) geohash ranges whose cells cover the box."""
+    width = east - west if west <= east else east - west + 360
+    bits = GEOHASH_BITS
+    while bits > 0 and (_cell(north + 90, 180, bits) - _cell(south + 90, 180, bits) >= MAX_CELLS_PER_AXIS or
+                        _cell(west + 180 + width, 360, bits) - _cell(west + 180, 360, bits) >= MAX_CELLS_PER_AXIS):
+        bits -= 1
+
+    size, shift = 1 << bits, 2 * (GEOHASH_BITS - bits)
+    first_x = _cell(west + 180, 360, bits)
+    xs = {x % size for x in range(first_x, _cell(west + 180 + width, 360, bits) + 1)}
+    ys = range(min(_cell(south + 90, 180, bits), size - 1), min(_cell(north + 90, 180, bits), size - 1) + 1)
+
+    ranges = []
+    for prefix in sorted(_interleave(x, y, bits) for x in xs for y in ys):
+        low, high = prefix << shift, (prefix + 1) << shift
+        if ranges and ranges[-1][1] == low:
+            ranges[-1][1] = high
+        else:
+            ranges.append([low, high])
+    return [tuple(bounds) for bounds in ranges]
+
+
+def nearby(latitude, longitude, radius_km, limit=20):
+    """Venues within `radius_km` of a point, nearest first."""
+    if current_app.config.get('NEARBY_POSTGIS') and db.session.get_bind().dialect.name == 'postgresql':
+        nearest = _nearest_postgis(latitude, longitude, radius_km, limit)
+    else:
+        nearest = _nearest_geohash(latitude, longitude, radius_km, limit)
+    if not nearest:
+        return []
+
+    rows = db.session.query(Venue.id, Venue.name, Venue.address, City.name.label('city'), City.state) \
+        .join(City, City.id == Venue.city_id) \
+        .filter(Venue.id.in_([venue_id for venue_id, _ in nearest]))
+    details = {row.id: row for row in rows}
+    return [{
+        'id': venue_id,
+        'name': details[venue_id].name,
+        'address': details[venue_id].address,
+        'city': details[venue_id].city,
+        'state': details[venue_id].state,
+        'distance_km': round(distance, 3),
+    } for venue_id, distance in nearest if venue_id in details]
+
+
+def _nearest_geohash(latitude, longitude, radius_km, limit):
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    query = db.session.query(Venue.id, Venue.latitude, Venue.longitude) \
+        .filter(or_(*(Venue.geohash.between(low, high - 1) for low, high in cover(south, north, west, east)))) \
+        .filter(Venue.latitude.between(south, north))
+    if west <= east:
+        query = query.filter(Venue.longitude.between(west, east))
+
+    candidates = ((row.id, distance_km(latitude, longitude, row.latitude, row.longitude)) for row in query)
+    return heapq.nsmallest(limit, (candidate for candidate in candidates if candidate[1] <= radius_km),
+                           key=lambda candidate: (candidate[1], candidate[0]))
+
+
+def _nearest_postgis(latitude, longitude, radius_km, limit):
+    here = db.func.geography(db.func.ST_MakePoint(longitude, latitude))
+    there = db.func.geography(db.func.ST_MakePoint(Venue.longitude, Venue.latitude))
+    distance = db.func.ST_Distance(there, here)
+    rows = db.session.query(Venue.id, distance / 1000) \
+        .filter(db.func.ST_DWithin(there, here, radius_km * 1000)) \
+        .order_by(distance, Venue.id) \
+        .limit(limit)
+    return [(venue_id, distance) for venue_id, distance in rows]
@@ -0,0 +1,107 @@
+import csv
+import hashlib
+import math
+from importlib import import_module
+
+import click
+from flask import current_app
+from sqlalchemy import bindparam
+
+import geo
+from models import db, Venue, City
+
+# ----------------------------------------------------------------------------#
+# Geocoding.
+#
+# A geocoder is any object with geocode(address, city, state) that returns
+# (latitude, longitude), or None when it cannot place the address. GEOCODER
+# names its class and GEOCODER_OPTIONS are its keyword arguments, the same
+# way FRAGMENT_CACHE_BACKEND names a cache. Geocoding stays out of the
+# request path: `flask geocode-venues` fills in the venues that have no
+# coordinates, in batches. A venue whose address or city is edited loses its
+# coordinates until the next run.
+# ----------------------------------------------------------------------------#
+
+
+class LocalGeocoder:
+    """Offline stand-in for a geocoding service.
+
+    City centres come from an optional CSV gazetteer with name, state,
+    latitude and longitude columns. A city missing from it gets a stable
+    made-up centre in the continental US. Addresses are spread
+    deterministically within `spread_km` of their city's centre.
+    """
+
+    def __init__(self, path=None, spread_km=5):
+        self.spread_km = spread_km
+        self.cities = {}
+        if path:
+            with open(path, newline='') as file:
+                for row in csv.DictReader(file):
+                    self.cities[row['name'].strip().lower(), row.get('state') or None] = \
+                        (float(row['latitude']), float(row['longitude']))
+
+    def geocode(self, address, city, state):
+        centre = self.cities.get((city.strip().lower(), state or None))
+        if centre is None:
+            centre = self._made_up(f'{city.strip().lower()}|{state}')
+        if not address:
+            return centre
+        return self._spread(centre, address)
+
+    def _made_up(self, key):
+        digest = hashlib.sha1(key.encode()).digest()
+        return 25 + 24 * digest[0] / 255, -124 + 57 * digest[1] / 255
+
+    def _spread(self, centre, address):
+        digest = hashlib.sha1(address.strip().lower().encode()).digest()
+        bearing = 2 * math.pi * int.from_bytes(digest[:2], 'big') / 65536
+        distance = self.spread_km * math.sqrt(int.from_bytes(digest[2:4], 'big') / 65536)
+        latitude, longitude = centre
+        latitude += math.degrees(distance * math.cos(bearing) / geo.EARTH_RADIUS_KM)
+        longitude += math.degrees(distance * math.sin(bearing) / geo.EARTH_RADIUS_KM) \
+            / max(math.cos(math.radians(latitude)), 0.01)
+        return latitude, longitude
+
+
+def configured_geocoder():
+    if 'geocoder' not in current_app.extensions:
+        module, _, name = current_app.config.get('GEOCODER', 'geocoding.LocalGeocoder').rpartition('.')
+        factory = getattr(import_module(module), name)
+        current_app.extensions['geocoder'] = factory(**current_app.config.get('GEOCODER_OPTIONS', {}))
+    return current_app.extensions['geocoder']
+
+
+def geocode_venues(batch_size=500, echo=click.echo, geocoder=None):
+    """Give coordinates to every venue without them; returns (located, unplaced) counts."""
+    geocoder = geocoder or configured_geocoder()
+    table = Venue.__table__
+    statement = table.update() \
+        .where(table.c.id == bindparam('_id')) \
+        .values(latitude=bindparam('_latitude'), longitude=bindparam('_longitude'), geohash=bindparam('_geohash'))
+    located = unplaced = last_id = 0
+
+    while True:
+        rows = db.session.query(Venue.id, Venue.address, City.name, City.state) \
+            .join(City, City.id == Venue.city_id) \
+            .filter(Venue.latitude.is_(None), Venue.id > last_id) \
+            .order_by(Venue.id) \
+            .limit(batch_size).all()
+        if not rows:
+            return located, unplaced
+
+        values = []
+        for venue_id, address, city, state in rows:
+            point = geocoder.geocode(address, city, state)
+            if point is None:
+                unplaced += 1
+                continue
+            place = geo.located(*point)
+            values.append({'_id': venue_id, '_latitude': place['latitude'], '_longitude': place['longitude'],
+                           '_geohash': place['geohash']})
+        if values:
+            db.session.execute(statement, values)
+        db.session.commit()
+        located += len(values)
+        last_id = rows[-1].id
+        echo(f'{located} venues located, {unplaced} could not be placed')
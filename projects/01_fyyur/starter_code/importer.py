@@ -0,0 +1,313 @@
+import csv
+import io
+import json
+import os
+import re
+import time
+from itertools import islice
+
+import click
+import dateutil.parser
+from sqlalchemy import insert
+
+import counters
+import geo
+import lookups
+import rollups
+import search
+from cache import fragment_cache
+from models import db, Venue, Artist, Show, SHOW_LENGTH, venue_genres, artist_genres
+
+# ----------------------------------------------------------------------------#
+# Bulk import.
+#
+# Streams CSV or NDJSON files in batches: cities and genres of a batch are
+# resolved through the lookup caches, entities are inserted with executemany (COPY
+# for shows on Postgres), and counters / search documents are updated per
+# batch. Each batch is its own transaction. POST /shows/batch goes through
+# the same path for shows sent by API, with the errors reported per record.
+# ----------------------------------------------------------------------------#
+
+VENUE_FIELDS = ['name', 'address', 'phone', 'image_link', 'facebook_link', 'website',
+                'seeking_talent', 'seeking_description']
+ARTIST_FIELDS = ['name', 'phone', 'image_link', 'facebook_link', 'website',
+                 'seeking_venue', 'seeking_description']
+# ids are 32-bit integer columns; a larger one would fail the whole batch when it is sent
+MAX_ID = 2 ** 31 - 1
+
+
+class ImportStats:
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        rate = self.rows / self.elapsed if self.elapsed else 0
+        return f'{self.kind}: {self.rows} imported, {self.skipped} skipped in {self.elapsed:.1f}s ({rate:.0f} rows/s)'
+
+
+def read_records(path, stats, echo):
+    """Yield (line number, record) from a .csv or .ndjson/.jsonl file.
+
+    NDJSON lines that are not a JSON object are reported and skipped.
+    """
+    _, extension = os.path.splitext(path)
+    with open(path, newline='') as f:
+        if extension == '.csv':
+            for number, record in enumerate(csv.DictReader(f), start=2):
+                yield number, record
+            return
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                echo(f'line {number}: not valid JSON ({error.msg}), skipped')
+                stats.skipped += 1
+                continue
+            if not isinstance(record, dict):
+                echo(f'line {number}: not a JSON object, skipped')
+                stats.skipped += 1
+                continue
+            yield number, record
+
+
+def batches(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace('|', ',').split(',')
+    return [item.strip() for item in value if item and item.strip()]
+
+
+def parse_point(record):
+    # optional latitude / longitude columns; venues without them are left to geocode-venues
+    try:
+        latitude, longitude = float(record['latitude']), float(record['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None, None
+    if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        return latitude, longitude
+    return None, None
+
+
+def missing_field(record, required):
+    # the first required field that is absent or blank
+    for field in required:
+        value = record.get(field)
+        if value is None or not str(value).strip():
+            return field
+    return None
+
+
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value) if value is not None else None
+
+
+def import_entities(model, path, batch_size, echo=click.echo):
+    """Import venues or artists, with their city and genres."""
+    fields, links, key, index = {
+        Venue: (VENUE_FIELDS, venue_genres, 'venue_id', search.index_venues),
+        Artist: (ARTIST_FIELDS, artist_genres, 'artist_id', search.index_artists),
+    }[model]
+    stats = ImportStats(model.__tablename__)
+    # a name and a city, and every NOT NULL column filled from the record, so one bad row cannot fail its batch
+    required = ['name', 'city'] + [field for field in fields if not model.__table__.c[field].nullable]
+
+    for batch in batches(read_records(path, stats, echo), batch_size):
+        valid = []
+        for number, record in batch:
+            field = missing_field(record, required)
+            if field:
+                echo(f'line {number}: {field} is required, skipped')
+                stats.skipped += 1
+                continue
+            valid.append(record)
+        if not valid:
+            continue
+
+        cities = lookups.resolve_cities(lookups.city_key(r['city'], r.get('state')) for r in valid)
+        genres = lookups.resolve_genres(name for r in valid for name in parse_list(r.get('genres')))
+
+        rows = []
+        for record in valid:
+            row = {field: record.get(field) or None for field in fields}
+            for flag in ('seeking_talent', 'seeking_venue'):
+                if flag in row:
+                    row[flag] = parse_bool(row[flag])
+            row['city_id'] = cities[lookups.city_key(record['city'], record.get('state'))]
+            if model is Venue:
+                row.update(geo.located(*parse_point(record)))
+            rows.append(row)
+
+        ids = [entity_id for (entity_id,) in db.session.execute(
+            insert(model.__table__).returning(model.__table__.c.id, sort_by_parameter_order=True), rows)]
+        genre_rows = [{key: entity_id, 'genre_id': genres[name]}
+                      for entity_id, record in zip(ids, valid)
+                      for name in set(parse_list(record.get('genres')))]
+        if genre_rows:
+            db.session.execute(links.insert(), genre_rows)
+
+        index(ids)
+        db.session.commit()
+        stats.rows += len(ids)
+        echo(stats.report())
+
+    return stats
+
+
+def import_shows(path, batch_size, echo=click.echo):
+    stats = ImportStats('shows')
+
+    for batch in batches(read_records(path, stats, echo), batch_size):
+        rows = []
+        for number, record in batch:
+            try:
+                rows.append(parse_show(record))
+            except ValueError as error:
+                echo(f'line {number}: {error}, skipped')
+                stats.skipped += 1
+        rows = known_shows(rows, stats, echo)
+        if not rows:
+            continue
+
+        save_shows(rows)
+        stats.rows += len(rows)
+        echo(stats.report())
+
+    return stats
+
+
+def ingest_shows(records):
+    """Create shows from API records in one transaction; returns (created, errors).
+
+    Each error is {'index': position in records, 'error': reason}; the valid
+    records are created all the same.
+    """
+    rows, positions, errors = [], [], []
+    for index, record in enumerate(records):
+        try:
+            rows.append(parse_show(record))
+            positions.append(index)
+        except ValueError as error:
+            errors.append({'index': index, 'error': str(error)})
+
+    unknown = unknown_references(rows) if rows else {}
+    if unknown:
+        errors = sorted(errors + [{'index': positions[n], 'error': reason} for n, reason in unknown.items()],
+                        key=lambda error: error['index'])
+        rows = [row for n, row in enumerate(rows) if n not in unknown]
+    if rows:
+        save_shows(rows)
+    return len(rows), errors
+
+
+def parse_show(record):
+    """Show row from a record; raises ValueError with the reason when it is not valid."""
+    if not isinstance(record, dict):
+        raise ValueError('a show must be an object')
+    row = {}
+    for key in ('venue_id', 'artist_id', 'start_time'):
+        if record.get(key) in (None, ''):
+            raise ValueError(f'{key} is required')
+    for key in ('venue_id', 'artist_id'):
+        row[key] = parse_id(record[key], key)
+        if not 1 <= row[key] <= MAX_ID:
+            raise ValueError(f'{key} is out of range')
+    for key in ('start_time', 'end_time'):
+        if record.get(key) in (None, ''):
+            continue
+        try:
+            row[key] = dateutil.parser.parse(record[key])
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f'{key} is not a date and time') from None
+    if 'end_time' not in row:
+        try:
+            row['end_time'] = row['start_time'] + SHOW_LENGTH
+        except OverflowError:
+            raise ValueError('start_time is too late for a show without end_time') from None
+    try:
+        ordered = row['end_time'] > row['start_time']
+    except TypeError:
+        raise ValueError('start_time and end_time must both have a time zone, or neither') from None
+    if not ordered:
+        raise ValueError('end_time must be after start_time')
+    return row
+
+
+def parse_id(value, key):
+    # JSON integers, or digit strings from CSV files and forms; int() would take true as 1 and cut 2.7 to 2
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and re.fullmatch(r'\s*[+-]?[0-9]+\s*', value):
+        return int(value)
+    raise ValueError(f'{key} must be an integer')
+
+
+def known_shows(rows, stats, echo):
+    # drop shows pointing at venues or artists that do not exist instead of failing the batch
+    unknown = unknown_references(rows) if rows else {}
+    if unknown:
+        echo(f'{len(unknown)} shows reference unknown venues or artists, skipped')
+        stats.skipped += len(unknown)
+    return [row for n, row in enumerate(rows) if n not in unknown]
+
+
+def unknown_references(rows):
+    """{position: reason} for the rows whose venue or artist does not exist."""
+    venue_ids = {venue_id for (venue_id,) in
+                 db.session.query(Venue.id).filter(Venue.id.in_({row['venue_id'] for row in rows}))}
+    artist_ids = {artist_id for (artist_id,) in
+                  db.session.query(Artist.id).filter(Artist.id.in_({row['artist_id'] for row in rows}))}
+
+    unknown = {}
+    for n, row in enumerate(rows):
+        if row['venue_id'] not in venue_ids:
+            unknown[n] = f"venue {row['venue_id']} does not exist"
+        elif row['artist_id'] not in artist_ids:
+            unknown[n] = f"artist {row['artist_id']} does not exist"
+    return unknown
+
+
+def save_shows(rows):
+    # one transaction for the whole batch: a single insert, counter and rollup update, and commit
+    insert_shows(rows)
+    counters.add_show_rows(rows)
+    rollups.add_show_rows(rows)
+    db.session.commit()
+    fragment_cache.invalidate('venue', *{row['venue_id'] for row in rows})
+    fragment_cache.invalidate('artist', *{row['artist_id'] for row in rows})
+
+
+def insert_shows(rows):
+    connection = db.session.connection()
+    if connection.dialect.driver != 'psycopg2':
+        db.session.execute(Show.__table__.insert(), rows)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row['venue_id'], row['artist_id'], row['start_time'].isoformat(), row['end_time'].isoformat()])
+    buffer.seek(0)
+    with connection.connection.driver_connection.cursor() as cursor:
+        cursor.copy_expert('COPY shows (venue_id, artist_id, start_time, end_time) FROM STDIN WITH (FORMAT csv)',
+                           buffer)
@@ -0,0 +1,86 @@
+import threading
+
+from sqlalchemy import insert
+
+from models import db, City, Genre
+
+# ----------------------------------------------------------------------------#
+# City and genre lookups.
+#
+# Both tables are small and only ever grow, so each process keeps a name -> id
+# map of them. The map is filled by one query on first use; names it does not
+# know are looked up with a single IN query and, if still unknown, inserted.
+# Inserted rows are not cached until a later lookup finds them committed, so a
+# rolled back insert can never leave a dangling id behind.
+# ----------------------------------------------------------------------------#
+
+
+class LookupCache:
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = [getattr(model, column) for column in columns]
+        self.names = columns
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _key(self, row):
+        return tuple(row[1:]) if len(self.columns) > 1 else row[1]
+
+    def _criterion(self, keys):
+        # match on the leading column only, (name, NULL) pairs would never match a tuple IN
+        if len(self.columns) > 1:
+            return self.columns[0].in_({key[0] for key in keys})
+        return self.columns[0].in_(keys)
+
+    def load(self):
+        rows = db.session.query(self.model.id, *self.columns).all()
+        with self._lock:
+            self._ids = {self._key(row): row[0] for row in rows}
+
+    def invalidate(self):
+        with self._lock:
+            self._ids = None
+
+    def resolve(self, keys, create=True):
+        """Map every key to an id, inserting the unknown ones when `create` is set."""
+        if self._ids is None:
+            self.load()
+
+        keys = set(keys)
+        with self._lock:
+            found = {key: self._ids[key] for key in keys if key in self._ids}
+
+        missing = keys - found.keys()
+        if missing:
+            # refresh on miss: another process may have inserted them
+            rows = db.session.query(self.model.id, *self.columns).filter(self._criterion(list(missing))).all()
+            fresh = {self._key(row): row[0] for row in rows if self._key(row) in missing}
+            with self._lock:
+                self._ids.update(fresh)
+            found.update(fresh)
+            missing -= fresh.keys()
+
+        if missing and create:
+            missing = list(missing)
+            values = [dict(zip(self.names, key if len(self.columns) > 1 else (key,))) for key in missing]
+            table = self.model.__table__
+            rows = db.session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), values)
+            found.update({key: row_id for key, (row_id,) in zip(missing, rows)})
+
+        return found
+
+
+cities = LookupCache(City, ['name', 'state'])
+genres = LookupCache(Genre, ['name'])
+
+
+def city_key(name, state):
+    return name.strip().lower(), state or None
+
+
+def resolve_cities(pairs):
+    return cities.resolve(pairs)
+
+
+def resolve_genres(names):
+    return genres.resolve(names)
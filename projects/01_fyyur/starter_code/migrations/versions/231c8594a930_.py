@@ -5,9 +5,10 @@ Revises: 834aead14a01
 Create Date: 2020-08-01 00:41:03.534872
 
 """
-from alembic import op
 import sqlalchemy as sa
 
+from online_migrations import drop_not_null, set_not_null
+
 
 # revision identifiers, used by Alembic.
 revision = '231c8594a930'
@@ -17,52 +18,21 @@ depends_on = None
 
 
 def upgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('artists', 'phone',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    op.alter_column('artists', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    op.alter_column('artists', 'seeking_venue',
-               existing_type=sa.BOOLEAN(),
-               nullable=False)
-    op.alter_column('venues', 'address',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    op.alter_column('venues', 'phone',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    op.alter_column('venues', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    op.alter_column('venues', 'seeking_talent',
-               existing_type=sa.BOOLEAN(),
-               nullable=False)
-    # ### end Alembic commands ###
+    # on Postgres through a validated check constraint: no long exclusive lock on large tables
+    set_not_null('artists', 'phone', existing_type=sa.VARCHAR(length=120))
+    set_not_null('artists', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    set_not_null('artists', 'seeking_venue', existing_type=sa.BOOLEAN())
+    set_not_null('venues', 'address', existing_type=sa.VARCHAR(length=120))
+    set_not_null('venues', 'phone', existing_type=sa.VARCHAR(length=120))
+    set_not_null('venues', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    set_not_null('venues', 'seeking_talent', existing_type=sa.BOOLEAN())
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('venues', 'seeking_talent',
-               existing_type=sa.BOOLEAN(),
-               nullable=True)
-    op.alter_column('venues', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    op.alter_column('venues', 'phone',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    op.alter_column('venues', 'address',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    op.alter_column('artists', 'seeking_venue',
-               existing_type=sa.BOOLEAN(),
-               nullable=True)
-    op.alter_column('artists', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    op.alter_column('artists', 'phone',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    # ### end Alembic commands ###
+    drop_not_null('venues', 'seeking_talent', existing_type=sa.BOOLEAN())
+    drop_not_null('venues', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    drop_not_null('venues', 'phone', existing_type=sa.VARCHAR(length=120))
+    drop_not_null('venues', 'address', existing_type=sa.VARCHAR(length=120))
+    drop_not_null('artists', 'seeking_venue', existing_type=sa.BOOLEAN())
+    drop_not_null('artists', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    drop_not_null('artists', 'phone', existing_type=sa.VARCHAR(length=120))
@@ -0,0 +1,48 @@
+"""venue coordinates and geohash for the nearby venues search
+
+Revision ID: 2b9e5c71d4f8
+Revises: 5d0b7f93e6a2
+Create Date: 2026-10-18 21:48:36.190254
+
+Fill the columns with "flask geocode-venues" after upgrading. When the
+postgis extension is installed, Postgres also gets the GiST index used with
+NEARBY_POSTGIS; both indexes are built concurrently.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b9e5c71d4f8'
+down_revision = '5d0b7f93e6a2'
+branch_labels = None
+depends_on = None
+
+
+def has_postgis():
+    bind = op.get_bind()
+    return bind.dialect.name == 'postgresql' and \
+        bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")).first() is not None
+
+
+def upgrade():
+    op.add_column('venues', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('venues', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('venues', sa.Column('geohash', sa.BigInteger(), nullable=True))
+
+    postgis = has_postgis()
+    with op.get_context().autocommit_block():
+        op.create_index('ix_venues_geohash', 'venues', ['geohash'], postgresql_concurrently=True)
+        if postgis:
+            op.execute('CREATE INDEX CONCURRENTLY ix_venues_geography '
+                       'ON venues USING gist (geography(ST_MakePoint(longitude, latitude)))')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_venues_geography')
+    op.drop_index('ix_venues_geohash', table_name='venues')
+    with op.batch_alter_table('venues') as batch_op:
+        batch_op.drop_column('geohash')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
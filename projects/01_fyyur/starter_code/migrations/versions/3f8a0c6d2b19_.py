@@ -0,0 +1,51 @@
+"""full-text search documents for venues and artists
+
+Revision ID: 3f8a0c6d2b19
+Revises: e4b7c2a91f05
+Create Date: 2026-10-18 11:25:03.902114
+
+Postgres gets a search_vector tsvector column with a GIN index on venues and
+artists, SQLite gets FTS5 shadow tables. Fill them with
+"flask rebuild-search-index" after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8a0c6d2b19'
+down_revision = 'e4b7c2a91f05'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_TABLES = {'venues': 'venue_search', 'artists': 'artist_search'}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        for table in SEARCH_TABLES:
+            op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        with op.get_context().autocommit_block():
+            for table in SEARCH_TABLES:
+                op.create_index(f'ix_{table}_search_vector', table, ['search_vector'],
+                                postgresql_using='gin', postgresql_concurrently=True)
+    elif dialect == 'sqlite':
+        for search_table in SEARCH_TABLES.values():
+            op.execute(f'CREATE VIRTUAL TABLE {search_table} USING fts5(name, city, genres)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        for table in SEARCH_TABLES:
+            op.drop_index(f'ix_{table}_search_vector', table_name=table)
+            op.drop_column(table, 'search_vector')
+    elif dialect == 'sqlite':
+        for search_table in SEARCH_TABLES.values():
+            op.execute(f'DROP TABLE {search_table}')
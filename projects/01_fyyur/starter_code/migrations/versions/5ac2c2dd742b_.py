@@ -5,9 +5,10 @@ Revises: 231c8594a930
 Create Date: 2020-08-05 00:24:47.695635
 
 """
-from alembic import op
 import sqlalchemy as sa
 
+from online_migrations import drop_not_null, set_not_null
+
 
 # revision identifiers, used by Alembic.
 revision = '5ac2c2dd742b'
@@ -17,34 +18,15 @@ depends_on = None
 
 
 def upgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('artists', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    op.alter_column('artists', 'seeking_venue',
-               existing_type=sa.BOOLEAN(),
-               nullable=True)
-    op.alter_column('venues', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=True)
-    op.alter_column('venues', 'seeking_talent',
-               existing_type=sa.BOOLEAN(),
-               nullable=True)
-    # ### end Alembic commands ###
+    # catalog-only on Postgres, under a lock timeout so it never queues in front of the app's queries
+    drop_not_null('artists', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    drop_not_null('artists', 'seeking_venue', existing_type=sa.BOOLEAN())
+    drop_not_null('venues', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    drop_not_null('venues', 'seeking_talent', existing_type=sa.BOOLEAN())
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('venues', 'seeking_talent',
-               existing_type=sa.BOOLEAN(),
-               nullable=False)
-    op.alter_column('venues', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    op.alter_column('artists', 'seeking_venue',
-               existing_type=sa.BOOLEAN(),
-               nullable=False)
-    op.alter_column('artists', 'seeking_description',
-               existing_type=sa.VARCHAR(length=120),
-               nullable=False)
-    # ### end Alembic commands ###
+    set_not_null('venues', 'seeking_talent', existing_type=sa.BOOLEAN())
+    set_not_null('venues', 'seeking_description', existing_type=sa.VARCHAR(length=120))
+    set_not_null('artists', 'seeking_venue', existing_type=sa.BOOLEAN())
+    set_not_null('artists', 'seeking_description', existing_type=sa.VARCHAR(length=120))
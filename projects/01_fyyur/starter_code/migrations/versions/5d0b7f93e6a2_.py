@@ -0,0 +1,47 @@
+"""updated_at on venues, artists and shows for conditional GETs
+
+Revision ID: 5d0b7f93e6a2
+Revises: a84c3e6f0d19
+Create Date: 2026-10-18 20:31:09.527441
+
+Postgres evaluates the now() default once for the existing rows, so adding
+the columns does not rewrite the tables; the indexes are built concurrently.
+SQLite cannot add a column with a non-constant default, so existing rows are
+stamped with an UPDATE instead.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0b7f93e6a2'
+down_revision = 'a84c3e6f0d19'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venues', 'artists', 'shows')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    for table in TABLES:
+        if dialect == 'postgresql':
+            op.add_column(table, sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False,
+                                           server_default=sa.func.now()))
+        else:
+            op.add_column(table, sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False,
+                                           server_default='1970-01-01 00:00:00'))
+            op.execute(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP')
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(f'ix_{table}_updated_at', table, ['updated_at'], postgresql_concurrently=True)
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        # not batch mode: rebuilding shows on SQLite would drop the show_periods triggers
+        op.drop_column(table, 'updated_at')
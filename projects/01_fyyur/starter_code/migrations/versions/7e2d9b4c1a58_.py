@@ -0,0 +1,34 @@
+"""show rollups for the analytics endpoint
+
+Revision ID: 7e2d9b4c1a58
+Revises: c61f4a8e2d07
+Create Date: 2026-10-18 17:12:45.061937
+
+Fill the table with "flask rebuild-show-rollups" after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2d9b4c1a58'
+down_revision = 'c61f4a8e2d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('show_rollups',
+                    sa.Column('dimension', sa.String(length=10), nullable=False),
+                    sa.Column('key', sa.Integer(), nullable=False),
+                    sa.Column('period', sa.String(length=7), nullable=False),
+                    sa.Column('shows', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('dimension', 'key', 'period')
+                    )
+    op.create_index('ix_show_rollups_top', 'show_rollups', ['dimension', 'period', 'shows'])
+
+
+def downgrade():
+    op.drop_index('ix_show_rollups_top', table_name='show_rollups')
+    op.drop_table('show_rollups')
@@ -0,0 +1,35 @@
+"""show counters on venues and artists
+
+Revision ID: 9d1e6b0f3a27
+Revises: 5ac2c2dd742b
+Create Date: 2026-10-18 09:12:40.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1e6b0f3a27'
+down_revision = '5ac2c2dd742b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('counter_marks',
+    sa.Column('name', sa.String(length=60), nullable=False),
+    sa.Column('value', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    for table in ('venues', 'artists'):
+        op.add_column(table, sa.Column('num_upcoming_shows', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('num_past_shows', sa.Integer(), server_default='0', nullable=False))
+    # existing rows are filled in by "flask rebuild-show-counters"
+
+
+def downgrade():
+    for table in ('artists', 'venues'):
+        op.drop_column(table, 'num_past_shows')
+        op.drop_column(table, 'num_upcoming_shows')
+    op.drop_table('counter_marks')
@@ -0,0 +1,30 @@
+"""row versions for optimistic concurrency on venue and artist edits
+
+Revision ID: a84c3e6f0d19
+Revises: 7e2d9b4c1a58
+Create Date: 2026-10-18 19:05:27.482913
+
+A constant server default makes the new columns a catalog-only change on
+Postgres 11+, so existing rows are not rewritten.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a84c3e6f0d19'
+down_revision = '7e2d9b4c1a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venues', 'artists'):
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in ('venues', 'artists'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,36 @@
+"""keyset pagination indexes
+
+Revision ID: b52d7e1c8f43
+Revises: 3f8a0c6d2b19
+Create Date: 2026-10-18 12:40:51.230778
+
+Covers the (name, id) order of /artists and the (start_time, id) order of
+/shows, built concurrently on Postgres.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52d7e1c8f43'
+down_revision = '3f8a0c6d2b19'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_artists_name_id', 'artists', ['name', 'id']),
+    ('ix_shows_start_time_id', 'shows', ['start_time', 'id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
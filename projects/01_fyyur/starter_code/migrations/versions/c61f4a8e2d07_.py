@@ -0,0 +1,83 @@
+"""show end times and the venue availability index
+
+Revision ID: c61f4a8e2d07
+Revises: b52d7e1c8f43
+Create Date: 2026-10-18 15:40:12.318604
+
+Adds shows.end_time, backfilled as start_time + 2 hours in batches of show
+ids, then made NOT NULL through a validated check, so writes to shows are
+never blocked for the length of the backfill. Deploy the app code that sets
+end_time before running it, or shows created meanwhile fail the check.
+Postgres gets a GiST
+index on (venue_id, tstzrange(start_time, end_time)), built concurrently and
+needing the btree_gist extension. SQLite gets the show_periods R*Tree with
+the triggers that keep it in step with shows.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from online_migrations import backfill, create_index, set_not_null
+
+
+# revision identifiers, used by Alembic.
+revision = 'c61f4a8e2d07'
+down_revision = 'b52d7e1c8f43'
+branch_labels = None
+depends_on = None
+
+
+START_MIN = "CAST(strftime('%s', {0}.start_time) AS INTEGER) / 60"
+END_MIN = "(CAST(strftime('%s', {0}.end_time) AS INTEGER) + 59) / 60"
+
+SQLITE_SCHEMA = [
+    'CREATE VIRTUAL TABLE show_periods USING rtree_i32(id, venue_lo, venue_hi, start_min, end_min)',
+    'CREATE TRIGGER show_periods_insert AFTER INSERT ON shows BEGIN '
+    'INSERT INTO show_periods VALUES (new.id, new.venue_id, new.venue_id, '
+    f'{START_MIN.format("new")}, {END_MIN.format("new")}); END',
+    'CREATE TRIGGER show_periods_update AFTER UPDATE OF venue_id, start_time, end_time ON shows BEGIN '
+    'UPDATE show_periods SET venue_lo = new.venue_id, venue_hi = new.venue_id, '
+    f'start_min = {START_MIN.format("new")}, end_min = {END_MIN.format("new")} WHERE id = new.id; END',
+    'CREATE TRIGGER show_periods_delete AFTER DELETE ON shows BEGIN '
+    'DELETE FROM show_periods WHERE id = old.id; END',
+    'INSERT INTO show_periods SELECT shows.id, shows.venue_id, shows.venue_id, '
+    f'{START_MIN.format("shows")}, {END_MIN.format("shows")} FROM shows',
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    op.add_column('shows', sa.Column('end_time', sa.TIMESTAMP(timezone=True), nullable=True))
+    if dialect == 'postgresql':
+        end_time = sa.text("start_time + interval '2 hours'")
+    else:
+        end_time = sa.text("datetime(start_time, '+2 hours')")
+    backfill('shows', {'end_time': end_time}, where='end_time IS NULL')
+    set_not_null('shows', 'end_time', existing_type=sa.TIMESTAMP(timezone=True))
+
+    create_index('ix_venues_city_id_name_id', 'venues', ['city_id', 'name', 'id'])
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        with op.get_context().autocommit_block():
+            op.execute('CREATE INDEX CONCURRENTLY ix_shows_venue_period '
+                       'ON shows USING gist (venue_id, tstzrange(start_time, end_time))')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_SCHEMA:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.drop_index('ix_shows_venue_period', table_name='shows')
+    elif dialect == 'sqlite':
+        for trigger in ('show_periods_insert', 'show_periods_update', 'show_periods_delete'):
+            op.execute(f'DROP TRIGGER {trigger}')
+        op.execute('DROP TABLE show_periods')
+
+    op.drop_index('ix_venues_city_id_name_id', table_name='venues')
+    with op.batch_alter_table('shows') as batch_op:
+        batch_op.drop_column('end_time')
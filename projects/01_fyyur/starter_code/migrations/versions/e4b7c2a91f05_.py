@@ -0,0 +1,41 @@
+"""indexes for show, city and genre lookups
+
+Revision ID: e4b7c2a91f05
+Revises: 9d1e6b0f3a27
+Create Date: 2026-10-18 10:02:17.554310
+
+Indexes are built with CREATE INDEX CONCURRENTLY on Postgres so the upgrade
+can run against a live database. Concurrent builds cannot run inside a
+transaction, hence the autocommit block. The unique indexes fail if
+duplicate city (name, state) or genre names already exist; merge those
+rows before upgrading.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c2a91f05'
+down_revision = '9d1e6b0f3a27'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_shows_venue_id_start_time', 'shows', ['venue_id', 'start_time'], False),
+    ('ix_shows_artist_id_start_time', 'shows', ['artist_id', 'start_time'], False),
+    ('ix_cities_name_state', 'cities', ['name', 'state'], True),
+    ('ix_genres_name', 'genres', ['name'], True),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+
+import dateutil.parser
+from flask_sqlalchemy import SQLAlchemy
+
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# shows entered without an end time are booked for this long
+SHOW_LENGTH = timedelta(hours=2)
+
+# ----------------------------------------------------------------------------#
+# Models.
+# ----------------------------------------------------------------------------#
+
+
+venue_genres = db.Table('venue_genures',
+                        db.Column('venue_id', db.Integer, db.ForeignKey('venues.id'), primary_key=True),
+                        db.Column('genre_id', db.Integer, db.ForeignKey('genres.id'), primary_key=True)
+                        )
+
+artist_genres = db.Table('artist_genres',
+                         db.Column('artist_id', db.Integer, db.ForeignKey('artists.id'), primary_key=True),
+                         db.Column('genre_id', db.Integer, db.ForeignKey('genres.id'), primary_key=True)
+                         )
+
+
+class Venue(db.Model):
+    __tablename__ = 'venues'
+    __table_args__ = (
+        db.Index('ix_venues_city_id_name_id', 'city_id', 'name', 'id'),
+        db.Index('ix_venues_updated_at', 'updated_at'),
+        db.Index('ix_venues_geohash', 'geohash'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city_id = db.Column(db.Integer, db.ForeignKey('cities.id'), nullable=False)
+    address = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_description = db.Column(db.String(120), nullable=True)
+    seeking_talent = db.Column(db.Boolean, nullable=True)
+
+    # filled in by geocoding.py; geohash is the integer geohash of the point (geo.py)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.BigInteger, nullable=True)
+
+    # denormalized show counters, maintained by counters.py
+    num_upcoming_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    num_past_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # bumped by every edit; edits.py and ORM flushes only write the version they read
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+
+    # set by every write to the row, show counters included; read by validators.py
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), nullable=False, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, server_default=db.func.now())
+
+    # ******************* Relationships ******************* #
+    genres = db.relationship('Genre', secondary=venue_genres, backref=db.backref('venue_genres', lazy=True))
+    shows = db.relationship('Show', backref='venue_shows', lazy=True)
+
+    # def __repr__(self):
+    #     return f'<Venue id: {self.id}, name: {self.name}, city: {self.city}>'
+
+
+class Artist(db.Model):
+    __tablename__ = 'artists'
+    __table_args__ = (
+        db.Index('ix_artists_name_id', 'name', 'id'),
+        db.Index('ix_artists_updated_at', 'updated_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city_id = db.Column(db.Integer, db.ForeignKey('cities.id'), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String(120))
+    seeking_description = db.Column(db.String(120), nullable=True)
+    seeking_venue = db.Column(db.Boolean, nullable=True)
+
+    # denormalized show counters, maintained by counters.py
+    num_upcoming_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    num_past_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # bumped by every edit; edits.py and ORM flushes only write the version they read
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+
+    # set by every write to the row, show counters included; read by validators.py
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), nullable=False, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, server_default=db.func.now())
+
+    # ******************* Relationships ******************* #
+
+    genres = db.relationship('Genre', secondary=artist_genres, backref=db.backref('artist_genres', lazy=True))
+    shows = db.relationship('Show', backref='artist_shows', lazy=True)
+
+
+def default_end_time(context):
+    start_time = context.get_current_parameters().get('start_time') or datetime.utcnow()
+    if isinstance(start_time, str):
+        start_time = dateutil.parser.parse(start_time)
+    return start_time + SHOW_LENGTH
+
+
+class Show(db.Model):
+    __tablename__ = 'shows'
+    __table_args__ = (
+        db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_shows_start_time_id', 'start_time', 'id'),
+        db.Index('ix_shows_updated_at', 'updated_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable=False)
+    start_time = db.Column(db.TIMESTAMP(timezone=True), default=datetime.utcnow, nullable=False)
+    end_time = db.Column(db.TIMESTAMP(timezone=True), default=default_end_time, nullable=False)
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), nullable=False, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, server_default=db.func.now())
+
+    def __repr__(self):
+        return f'<Show id: {self.id}, venue_id: {self.venue_id}, artist_id:' \
+               f' {self.artist_id}, start_time: {self.start_time}, end_time: {self.end_time}>'
+
+
+class City(db.Model):
+    __tablename__ = 'cities'
+    __table_args__ = (
+        db.Index('ix_cities_name_state', 'name', 'state', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(2), nullable=True)
+
+    city_artist = db.relationship('Artist', backref='city', lazy=True)
+    city_venue = db.relationship('Venue', backref='city', lazy=True)
+
+    def __repr__(self):
+        return f'<City id: {self.id}, name: {self.name}, state: {self.state}>'
+
+
+class Genre(db.Model):
+    __tablename__ = 'genres'
+    __table_args__ = (
+        db.Index('ix_genres_name', 'name', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+
+
+class CounterMark(db.Model):
+    __tablename__ = 'counter_marks'
+
+    name = db.Column(db.String(60), primary_key=True)
+    value = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f'<CounterMark name: {self.name}, value: {self.value}>'
+
+
+class ShowRollup(db.Model):
+    __tablename__ = 'show_rollups'
+    __table_args__ = (
+        db.Index('ix_show_rollups_top', 'dimension', 'period', 'shows'),
+    )
+
+    # dimension is 'venue', 'artist', 'city' or 'genre'; period is 'YYYY-MM' or 'all'
+    dimension = db.Column(db.String(10), primary_key=True)
+    key = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(7), primary_key=True)
+    shows = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ShowRollup {self.dimension} {self.key} {self.period}: {self.shows}>'
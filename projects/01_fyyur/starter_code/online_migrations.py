@@ -0,0 +1,241 @@
+import logging
+import os
+import time
+
+import sqlalchemy as sa
+from alembic import op
+from flask import current_app
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+# ----------------------------------------------------------------------------#
+# Online migrations.
+#
+# Helpers for revisions that touch large tables without a maintenance window.
+# On Postgres, each step commits on its own instead of sharing the
+# migration's transaction, so a lock is held for one short statement rather
+# than until the whole upgrade ends. A step that needs an ACCESS EXCLUSIVE
+# lock gives up after MIGRATION_LOCK_TIMEOUT and is retried, rather than
+# queueing behind a long transaction while every query on the table queues
+# behind it. Constraints are added NOT VALID, then validated under a lock
+# that lets reads and writes continue. Indexes are built CONCURRENTLY.
+# Backfills update one bounded key range per transaction.
+#
+# Every step first logs its lock level and the rows involved. Under
+# `flask db upgrade --sql` (Alembic's offline mode) the same estimates are
+# written as comments above the SQL and nothing is run: that is the dry run.
+# Other dialects get the plain operation.
+# ----------------------------------------------------------------------------#
+
+LOCK_TIMEOUT = os.environ.get('MIGRATION_LOCK_TIMEOUT', '5s')
+LOCK_RETRIES = 5
+BATCH_SIZE = 10000
+
+# what each Postgres lock level lets other sessions do while it is held
+LOCK_EFFECTS = {
+    'ACCESS EXCLUSIVE': 'blocks reads and writes',
+    'SHARE UPDATE EXCLUSIVE': 'reads and writes continue',
+    'ROW EXCLUSIVE': 'locks only the updated rows',
+}
+
+logger = logging.getLogger('alembic.online')
+
+
+def set_not_null(table, column, existing_type):
+    """SET NOT NULL through a validated check, so the exclusive lock does not scan the table."""
+    if not _postgres():
+        # SQLite can only change nullability by copying the table
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=existing_type, nullable=False)
+        return
+    check = f'{table}_{column}_not_null'
+    add_check_constraint(check, table, f'{column} IS NOT NULL')
+    # Postgres 12+ skips the scan when a valid check already proves the column has no nulls
+    _plan(table, f'ALTER COLUMN {column} SET NOT NULL', 'ACCESS EXCLUSIVE', 'no scan')
+    _run(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL', lock=True)
+    _plan(table, f'DROP CONSTRAINT {check}', 'ACCESS EXCLUSIVE', 'no scan')
+    _run(f'ALTER TABLE {table} DROP CONSTRAINT {check}', lock=True)
+
+
+def drop_not_null(table, column, existing_type):
+    if not _postgres():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=existing_type, nullable=True)
+        return
+    _plan(table, f'ALTER COLUMN {column} DROP NOT NULL', 'ACCESS EXCLUSIVE', 'no scan')
+    _run(f'ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL', lock=True)
+
+
+def add_check_constraint(name, table, condition):
+    if not _postgres():
+        op.create_check_constraint(name, table, condition)
+        return
+    _plan(table, f'ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID', 'ACCESS EXCLUSIVE', 'no scan')
+    _run(f'ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID', lock=True)
+    _validate(name, table)
+
+
+def add_foreign_key(name, source, referent, local_columns, remote_columns, **kw):
+    if not _postgres():
+        op.create_foreign_key(name, source, referent, local_columns, remote_columns, **kw)
+        return
+    # SHARE ROW EXCLUSIVE on both tables, but only for the catalog change
+    _plan(source, f'ADD CONSTRAINT {name} FOREIGN KEY NOT VALID (and on {referent})', 'ACCESS EXCLUSIVE', 'no scan')
+    _run(lambda: op.create_foreign_key(name, source, referent, local_columns, remote_columns,
+                                       postgresql_not_valid=True, **kw), lock=True)
+    _validate(name, source)
+
+
+def create_index(name, table, columns, **kw):
+    if not _postgres():
+        op.create_index(name, table, columns, **kw)
+        return
+    _plan(table, f'CREATE INDEX CONCURRENTLY {name}', 'SHARE UPDATE EXCLUSIVE', 'scans the table twice')
+    if _invalid_index(name):
+        # left behind by an interrupted concurrent build; it slows writes and answers no query
+        _run(lambda: op.drop_index(name, table_name=table, postgresql_concurrently=True))
+    _run(lambda: op.create_index(name, table, columns, postgresql_concurrently=True, **kw))
+
+
+def drop_index(name, table):
+    if not _postgres():
+        op.drop_index(name, table_name=table)
+        return
+    _plan(table, f'DROP INDEX CONCURRENTLY {name}', 'SHARE UPDATE EXCLUSIVE', 'no scan')
+    _run(lambda: op.drop_index(name, table_name=table, postgresql_concurrently=True))
+
+
+def backfill(table, values, where=None, batch_size=BATCH_SIZE, key='id', pause=0):
+    """UPDATE table SET values [WHERE where], one range of `batch_size` keys per transaction.
+
+    `values` maps columns to values or SQL expressions, `where` is an optional
+    SQL condition string. `pause` seconds between batches let replicas keep up.
+    """
+    target = sa.table(table, sa.column(key), *(sa.column(column) for column in values))
+    statement = target.update().values({column: value if isinstance(value, sa.ClauseElement) else sa.literal(value)
+                                        for column, value in values.items()})
+    if where is not None:
+        statement = statement.where(sa.text(where))
+    low, high = _key_range(table, key)
+    batches = 0 if low is None else (high - low) // batch_size + 1
+    _plan(table, f'backfill {", ".join(values)} in {batches} batches of {batch_size} keys',
+          'ROW EXCLUSIVE', f'at most {batch_size} rows per transaction')
+    if low is None:
+        return
+
+    if op.get_context().as_sql:
+        first = statement.where(target.c[key] >= low, target.c[key] < low + batch_size)
+        op.execute(first)
+        _comment(f'... and so on for each range of {batch_size} {key} values up to {high}')
+        return
+
+    updated = 0
+    started = time.monotonic()
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, batch_size):
+            result = op.get_bind().execute(
+                statement.where(target.c[key] >= start, target.c[key] < start + batch_size))
+            updated += max(result.rowcount, 0)
+            done = min(start + batch_size, high + 1) - low
+            logger.info('%s: %d/%d keys (%d%%), %d rows updated in %.1fs', table, done, high - low + 1,
+                        100 * done // (high - low + 1), updated, time.monotonic() - started)
+            if pause:
+                time.sleep(pause)
+    return updated
+
+
+def estimated_rows(table):
+    """Row count from the planner statistics on Postgres, counted elsewhere; None when unknown."""
+    if _stats_dialect() == 'postgresql':
+        row = _stat('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)', table=table)
+        return row[0] if row and row[0] is not None and row[0] >= 0 else None
+    row = _stat(f'SELECT count(*) FROM {table}')
+    return row[0] if row else None
+
+
+def lock_holders(table):
+    """(sessions, longest open transaction in seconds) holding any lock on the table, on Postgres."""
+    if _stats_dialect() != 'postgresql':
+        return 0, 0
+    row = _stat('SELECT count(DISTINCT a.pid), coalesce(max(extract(epoch FROM now() - a.xact_start)), 0) '
+                'FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid '
+                'WHERE l.relation = to_regclass(:table) AND a.pid <> pg_backend_pid()', table=table)
+    return (row[0], float(row[1])) if row else (0, 0)
+
+
+def _postgres():
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _stats_dialect():
+    if not op.get_context().as_sql:
+        return op.get_bind().dialect.name
+    return current_app.extensions['migrate'].db.engine.dialect.name
+
+
+def _stat(sql, **params):
+    # online, on the migration's connection; offline, a read on the app's engine, which cannot
+    # answer for a table created earlier in the same script
+    if not op.get_context().as_sql:
+        return op.get_bind().execute(sa.text(sql), params).one_or_none()
+    try:
+        with current_app.extensions['migrate'].db.engine.connect() as connection:
+            return connection.execute(sa.text(sql), params).one_or_none()
+    except DBAPIError:
+        return None
+
+
+def _plan(table, action, lock, scan):
+    rows = estimated_rows(table)
+    message = f'{table}: {action} | {lock} ({LOCK_EFFECTS[lock]}), {scan} | ' \
+              f'{"unknown number of" if rows is None else f"~{rows}"} rows'
+    if lock == 'ACCESS EXCLUSIVE':
+        sessions, oldest = lock_holders(table)
+        message += f' | waits for {sessions} sessions (oldest transaction {oldest:.0f}s), ' \
+                   f'at most {LOCK_TIMEOUT} per try' if sessions else f' | at most {LOCK_TIMEOUT} per try'
+    if op.get_context().as_sql:
+        _comment(message)
+    else:
+        logger.info(message)
+
+
+def _comment(text):
+    op.get_context().impl.static_output(f'-- {text}')
+
+
+def _validate(name, table):
+    _plan(table, f'VALIDATE CONSTRAINT {name}', 'SHARE UPDATE EXCLUSIVE', 'scans the table')
+    _run(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def _run(step, lock=False):
+    """Run one step in its own transaction; with `lock`, under lock_timeout and retried."""
+    execute = step if callable(step) else lambda: op.execute(step)
+    with op.get_context().autocommit_block():
+        if not lock:
+            execute()
+            return
+        op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        try:
+            for attempt in range(1, LOCK_RETRIES + 1):
+                try:
+                    execute()
+                    break
+                except OperationalError as error:
+                    if getattr(error.orig, 'pgcode', None) != '55P03' or attempt == LOCK_RETRIES:
+                        raise
+                    logger.warning('lock not granted within %s, try %d of %d', LOCK_TIMEOUT, attempt, LOCK_RETRIES)
+                    time.sleep(attempt)
+        finally:
+            op.execute('RESET lock_timeout')
+
+
+def _invalid_index(name):
+    if op.get_context().as_sql:
+        return False
+    return op.get_bind().execute(sa.text('SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)'),
+                                 {'name': name}).scalar() or False
+
+
+def _key_range(table, key):
+    row = _stat(f'SELECT min({key}), max({key}) FROM {table}')
+    return tuple(row) if row else (None, None)
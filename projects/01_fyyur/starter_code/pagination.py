@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app, request
+
+from models import db
+
+# ----------------------------------------------------------------------------#
+# Keyset pagination.
+#
+# Pages are addressed by an opaque cursor holding the sort key of the row they
+# start after (or end before) rather than by an offset, so every page costs
+# the same index range scan no matter how deep into the listing it is.
+# ----------------------------------------------------------------------------#
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor', 'page_size'])
+
+
+def encode_cursor(values):
+    values = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, columns):
+    """Values for `columns` from a cursor; None when it is missing or not one encode_cursor wrote for them."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('wrong number of values')
+        return [decode_value(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+
+def decode_value(value, column):
+    if isinstance(value, dict):
+        if list(value) != ['dt']:
+            raise ValueError('unknown cursor value')
+        value = datetime.fromisoformat(value['dt'])
+    elif isinstance(value, (list, bool)) or isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError('unknown cursor value')
+    if value is None:
+        return value
+
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        # e.g. a computed rank; any scalar compares
+        return value
+    if expected is float:
+        expected = (int, float)
+    if not isinstance(value, expected):
+        raise ValueError(f'{column} does not take {value!r}')
+    return value
+
+
+def page_size():
+    default = current_app.config.get('PAGE_SIZE', 50)
+    maximum = current_app.config.get('MAX_PAGE_SIZE', 200)
+    size = request.values.get('page_size', default, type=int)
+    return max(1, min(size, maximum))
+
+
+def paginate(query, columns, key, size=None):
+    """One page of `query` ordered by `columns`, all ascending, the last one unique.
+
+    `key` maps a result row to its values for `columns`. The page position is
+    read from the `after` / `before` request arguments.
+    """
+    size = size or page_size()
+    after = decode_cursor(request.values.get('after'), columns)
+    before = decode_cursor(request.values.get('before'), columns)
+    position = db.tuple_(*columns)
+
+    if before:
+        rows = query.filter(position < db.tuple_(*before)) \
+            .order_by(None).order_by(*(column.desc() for column in columns)) \
+            .limit(size + 1).all()
+        has_prev = len(rows) > size
+        rows = rows[:size][::-1]
+        has_next = True
+    else:
+        if after:
+            query = query.filter(position > db.tuple_(*after))
+        rows = query.order_by(None).order_by(*columns).limit(size + 1).all()
+        has_next = len(rows) > size
+        rows = rows[:size]
+        has_prev = bool(after)
+
+    return Page(items=rows,
+                next_cursor=encode_cursor(key(rows[-1])) if rows and has_next else None,
+                prev_cursor=encode_cursor(key(rows[0])) if rows and has_prev else None,
+                page_size=size)
+
+
+def count_capped(query, cap):
+    # counting every match is as slow as rendering them all; stop at `cap`
+    return db.session.query(db.func.count()).select_from(query.order_by(None).limit(cap).subquery()).scalar()
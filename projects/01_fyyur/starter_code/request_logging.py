@@ -0,0 +1,114 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# Logging.
+#
+# Request threads only put records on an in-memory queue; a QueueListener
+# thread formats them as JSON lines and does the file/stream I/O. Every
+# request produces one 'request' record with its route, status, latency and
+# the time spent in the database.
+# ----------------------------------------------------------------------------#
+
+RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in RESERVED})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """Queues records with the traceback as text, instead of folded into the message."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def init_logging(app):
+    level = app.config.get('LOG_LEVEL') or ('DEBUG' if app.debug else 'INFO')
+
+    handlers = []
+    if app.config.get('LOG_FILE'):
+        handlers.append(logging.FileHandler(app.config['LOG_FILE']))
+    if app.debug or not handlers:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(JSONFormatter())
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(RecordQueueHandler(records))
+    app.logger.setLevel(level)
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_timer)
+    app.after_request(_log_request(app))
+
+    app.extensions['log_listener'] = listener
+    return listener
+
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.db_time = 0.0
+    g.db_queries = 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is not None and has_request_context() and 'db_time' in g:
+        g.db_time += time.perf_counter() - started
+        g.db_queries += 1
+
+
+def _log_request(app):
+    def log_request(response):
+        if 'request_started' in g and app.logger.isEnabledFor(logging.INFO):
+            app.logger.info('request', extra={
+                'method': request.method,
+                'route': request.url_rule.rule if request.url_rule else None,
+                'path': request.path,
+                'status': response.status_code,
+                'latency_ms': round((time.perf_counter() - g.request_started) * 1000, 2),
+                'db_ms': round(g.db_time * 1000, 2),
+                'db_queries': g.db_queries,
+            })
+        return response
+    return log_request
@@ -0,0 +1,176 @@
+from collections import Counter, defaultdict
+from datetime import timezone
+
+from sqlalchemy import literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Venue, Artist, City, Genre, Show, ShowRollup, artist_genres
+
+# ----------------------------------------------------------------------------#
+# Analytics rollups.
+#
+# show_rollups holds show counts per (dimension, key, period): venues, artists,
+# venue cities and artist genres, per calendar month (UTC) and for 'all' time.
+# Writes keep it up to date in their own transaction, the same way as the show
+# counters; reports read a handful of index rows and never touch shows.
+# The edit forms move a venue's shows when it changes city and an artist's
+# when their genres change (edits.py); run rebuild() (flask
+# rebuild-show-rollups) after making such changes in bulk outside the app.
+# ----------------------------------------------------------------------------#
+
+ALL = 'all'
+
+DIMENSIONS = {
+    'venue': (Venue, [Venue.name]),
+    'artist': (Artist, [Artist.name]),
+    'city': (City, [City.name, City.state]),
+    'genre': (Genre, [Genre.name]),
+}
+
+
+# where each dimension's key comes from, and the join that reaches it from shows
+SOURCES = {
+    'venue': (Show.venue_id, None),
+    'artist': (Show.artist_id, None),
+    'city': (Venue.city_id, (Venue, Venue.id == Show.venue_id)),
+    'genre': (artist_genres.c.genre_id, (artist_genres, artist_genres.c.artist_id == Show.artist_id)),
+}
+
+
+def add_shows(criterion):
+    # call after the matching shows are flushed, inside the writing transaction
+    _shift_shows(criterion, 1)
+
+
+def remove_shows(criterion):
+    # call before the matching shows are deleted, inside the writing transaction
+    _shift_shows(criterion, -1)
+
+
+def add_show_rows(rows):
+    # for shows inserted in bulk: dicts with venue_id, artist_id and start_time
+    groups = Counter((row['venue_id'], row['artist_id'], month_of(row['start_time'])) for row in rows)
+    _shift([{'venue_id': venue_id, 'artist_id': artist_id, 'month': month, 'shows': shows}
+            for (venue_id, artist_id, month), shows in groups.items()], 1)
+
+
+def record_show_created(show):
+    db.session.flush()
+    add_shows(Show.id == show.id)
+
+
+def month_of(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m')
+
+
+def _shift_shows(criterion, sign):
+    # counted and applied in the database, one statement per dimension and kind of period, so a
+    # venue with years of shows is never read back row by row
+    for query in _counts(criterion, sign):
+        insert = _insert()
+        db.session.execute(_upsert(insert.from_select(['dimension', 'key', 'period', 'shows'], query), insert))
+
+
+def _counts(criterion=None, sign=1):
+    """(dimension, key, period, shows) selects over the shows matching criterion."""
+    month = _month(Show.start_time)
+    shows = db.func.count(Show.id) if sign > 0 else -db.func.count(Show.id)
+    for dimension, (key, join) in SOURCES.items():
+        for period in (month, literal(ALL)):
+            query = db.select(literal(dimension), key, period, shows).select_from(Show)
+            if join is not None:
+                query = query.join(*join)
+            if criterion is not None:
+                query = query.where(criterion)
+            yield query.group_by(key, period) if period is month else query.group_by(key)
+
+
+def _shift(rows, sign):
+    rows = list(rows)
+    if not rows:
+        return
+
+    venue_cities = dict(db.session.query(Venue.id, Venue.city_id)
+                        .filter(Venue.id.in_({row['venue_id'] for row in rows})))
+    genres = defaultdict(list)
+    for artist_id, genre_id in db.session.query(artist_genres.c.artist_id, artist_genres.c.genre_id) \
+            .filter(artist_genres.c.artist_id.in_({row['artist_id'] for row in rows})):
+        genres[artist_id].append(genre_id)
+
+    deltas = Counter()
+    for row in rows:
+        keys = [('venue', row['venue_id']), ('artist', row['artist_id']),
+                ('city', venue_cities.get(row['venue_id']))]
+        keys += [('genre', genre_id) for genre_id in genres[row['artist_id']]]
+        for dimension, key in keys:
+            if key is not None:
+                deltas[dimension, key, row['month']] += sign * row['shows']
+                deltas[dimension, key, ALL] += sign * row['shows']
+    _apply(deltas)
+
+
+def forget(dimension, key):
+    # drop the rows of a deleted venue or artist; remove_shows has zeroed them
+    ShowRollup.query.filter_by(dimension=dimension, key=key).delete(synchronize_session=False)
+
+
+def _apply(deltas):
+    values = [{'dimension': dimension, 'key': key, 'period': period, 'shows': shows}
+              for (dimension, key, period), shows in deltas.items() if shows]
+    if not values:
+        return
+
+    insert = _insert()
+    db.session.execute(_upsert(insert, insert), values)
+
+
+def _upsert(statement, insert):
+    # rows that already exist get the count added to theirs
+    return statement.on_conflict_do_update(index_elements=['dimension', 'key', 'period'],
+                                           set_={'shows': ShowRollup.__table__.c.shows + insert.excluded.shows})
+
+
+def _insert():
+    dialect = db.session.get_bind().dialect.name
+    return {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[dialect](ShowRollup.__table__)
+
+
+def _month(column):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return db.func.to_char(db.func.timezone('UTC', column), 'YYYY-MM')
+    return db.func.strftime('%Y-%m', column)
+
+
+def rebuild():
+    """Recompute every rollup from the shows table."""
+    ShowRollup.query.delete()
+
+    table = ShowRollup.__table__
+    for query in _counts():
+        db.session.execute(table.insert().from_select(['dimension', 'key', 'period', 'shows'], query))
+
+    db.session.commit()
+    return db.session.query(ShowRollup).count()
+
+
+def top(dimension, period=ALL, limit=10):
+    """The `limit` keys of a dimension with the most shows in `period`."""
+    model, labels = DIMENSIONS[dimension]
+    rows = db.session.query(ShowRollup.key, ShowRollup.shows, *labels) \
+        .join(model, model.id == ShowRollup.key) \
+        .filter(ShowRollup.dimension == dimension, ShowRollup.period == period, ShowRollup.shows > 0) \
+        .order_by(ShowRollup.shows.desc(), ShowRollup.key) \
+        .limit(limit)
+    return [dict(id=key, shows=shows, **{label.key: value for label, value in zip(labels, values)})
+            for key, shows, *values in rows]
+
+
+def monthly(dimension, key):
+    """Shows per month of one venue, artist, city or genre, oldest month first."""
+    rows = db.session.query(ShowRollup.period, ShowRollup.shows) \
+        .filter(ShowRollup.dimension == dimension, ShowRollup.key == key,
+                ShowRollup.period != ALL, ShowRollup.shows > 0) \
+        .order_by(ShowRollup.period)
+    return [{'period': period, 'shows': shows} for period, shows in rows]
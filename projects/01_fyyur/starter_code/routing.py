@@ -0,0 +1,44 @@
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# ----------------------------------------------------------------------------#
+# Read replica routing.
+#
+# With a 'replica' bind configured, GET and HEAD requests read from it and
+# everything else uses the primary. Writes always go to the primary, whatever
+# the request. A client that made a write keeps reading from the primary for
+# READ_YOUR_WRITES_SECONDS, through a timestamp in its session cookie, so it
+# sees its own new venue even while the replica lags behind.
+# ----------------------------------------------------------------------------#
+
+REPLICA = 'replica'
+READ_METHODS = frozenset(['GET', 'HEAD'])
+PRIMARY_UNTIL = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase) \
+                and has_request_context() and g.get('db_replica'):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_routing(app, db):
+    app.config.setdefault('READ_YOUR_WRITES_SECONDS', 5)
+
+    @app.before_request
+    def choose_bind():
+        g.db_replica = REPLICA in db.engines and request.method in READ_METHODS \
+            and session.get(PRIMARY_UNTIL, 0) < time.time()
+
+    @app.after_request
+    def remember_write(response):
+        if REPLICA in db.engines and request.method not in READ_METHODS and response.status_code < 400:
+            session[PRIMARY_UNTIL] = time.time() + app.config['READ_YOUR_WRITES_SECONDS']
+        if app.debug:
+            response.headers['X-DB-Route'] = REPLICA if g.get('db_replica') else 'primary'
+        return response
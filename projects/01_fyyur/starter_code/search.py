@@ -0,0 +1,159 @@
+import re
+from collections import defaultdict
+
+from sqlalchemy import Float, Integer, bindparam, literal, literal_column, text
+
+from models import db, Venue, Artist, City, Genre, venue_genres, artist_genres
+
+# ----------------------------------------------------------------------------#
+# Search.
+#
+# Venues and artists are searchable by name, city and genres. On Postgres each
+# table carries a weighted `search_vector` tsvector with a GIN index; on SQLite
+# the same documents live in FTS5 shadow tables. Either way the documents are
+# refreshed by index_venues() / index_artists() whenever an entity is written.
+# ----------------------------------------------------------------------------#
+
+INDEX_BATCH_SIZE = 1000
+
+SEARCH_TABLES = {
+    Venue: ('venue_search', venue_genres.c.venue_id),
+    Artist: ('artist_search', artist_genres.c.artist_id),
+}
+
+
+def dialect():
+    return db.session.get_bind().dialect.name
+
+
+def create_schema():
+    # for databases built with db.create_all() rather than the migrations
+    if dialect() == 'postgresql':
+        for model in SEARCH_TABLES:
+            table = model.__tablename__
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector'))
+            db.session.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_search_vector '
+                                    f'ON {table} USING gin (search_vector)'))
+    elif dialect() == 'sqlite':
+        for table, _ in SEARCH_TABLES.values():
+            db.session.execute(text(f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(name, city, genres)'))
+    db.session.commit()
+
+
+def index_venues(ids):
+    _index(Venue, ids)
+
+
+def index_artists(ids):
+    _index(Artist, ids)
+
+
+def remove_venues(ids):
+    _remove(Venue, ids)
+
+
+def remove_artists(ids):
+    _remove(Artist, ids)
+
+
+def rebuild(model):
+    ids = [row.id for row in db.session.query(model.id).order_by(model.id)]
+    for start in range(0, len(ids), INDEX_BATCH_SIZE):
+        _index(model, ids[start:start + INDEX_BATCH_SIZE])
+        db.session.commit()
+    return len(ids)
+
+
+def documents(model, ids):
+    _, genre_key = SEARCH_TABLES[model]
+    genres = defaultdict(list)
+    for key, name in db.session.query(genre_key, Genre.name) \
+            .join(Genre, Genre.id == genre_key.table.c.genre_id) \
+            .filter(genre_key.in_(ids)):
+        genres[key].append(name)
+
+    rows = db.session.query(model.id, model.name, City.name, City.state) \
+        .join(City, City.id == model.city_id) \
+        .filter(model.id.in_(ids))
+    return [{
+        'id': key,
+        'name': name or '',
+        'city': ' '.join(part for part in (city, state) if part),
+        'genres': ' '.join(genres[key]),
+    } for key, name, city, state in rows]
+
+
+def _index(model, ids):
+    ids = list(ids)
+    if not ids:
+        return
+    docs = documents(model, ids)
+    if not docs:
+        return
+
+    if dialect() == 'postgresql':
+        db.session.execute(text(
+            f'UPDATE {model.__tablename__} SET search_vector = '
+            "setweight(to_tsvector('simple', :name), 'A') || "
+            "setweight(to_tsvector('simple', :city), 'B') || "
+            "setweight(to_tsvector('simple', :genres), 'C') "
+            'WHERE id = :id'), docs)
+    elif dialect() == 'sqlite':
+        table, _ = SEARCH_TABLES[model]
+        _remove(model, ids)
+        db.session.execute(text(
+            f'INSERT INTO {table} (rowid, name, city, genres) VALUES (:id, :name, :city, :genres)'), docs)
+
+
+def _remove(model, ids):
+    ids = list(ids)
+    if ids and dialect() == 'sqlite':
+        table, _ = SEARCH_TABLES[model]
+        db.session.execute(text(f'DELETE FROM {table} WHERE rowid IN :ids')
+                           .bindparams(bindparam('ids', expanding=True)), {'ids': ids})
+
+
+def search_venues(term):
+    return search(Venue, term)
+
+
+def search_artists(term):
+    return search(Artist, term)
+
+
+def search(model, term):
+    """Ranked, de-duplicated matches for `term`.
+
+    Every word of the term has to prefix-match the name, city or genres.
+    Returns the query for (id, name, num_upcoming_shows, score) rows and its
+    sort order: `score` ascending (lower is a better match), then id.
+    """
+    hits = _hits(model, re.findall(r'[^\W_]+', term.lower()))
+    order = [hits.c.score, model.id]
+    query = db.session.query(model.id, model.name, model.num_upcoming_shows, hits.c.score) \
+        .join(hits, hits.c.id == model.id) \
+        .order_by(*order)
+    return query, order
+
+
+def _hits(model, words):
+    table, _ = SEARCH_TABLES[model]
+
+    if not words:
+        return db.select(model.id.label('id'), literal(0.0).label('score')).subquery()
+
+    if dialect() == 'postgresql':
+        vector = literal_column(f'{model.__tablename__}.search_vector')
+        query = db.func.to_tsquery('simple', ' & '.join(word + ':*' for word in words))
+        return db.select(model.id.label('id'), (-db.func.ts_rank(vector, query)).label('score')) \
+            .where(vector.op('@@')(query)).subquery()
+
+    if dialect() == 'sqlite':
+        return text(f'SELECT rowid AS id, bm25({table}, 10.0, 5.0, 2.0) AS score '
+                    f'FROM {table} WHERE {table} MATCH :query') \
+            .bindparams(query=' '.join(f'"{word}"*' for word in words)) \
+            .columns(id=Integer, score=Float).subquery()
+
+    name = db.func.lower(model.name)
+    return db.select(model.id.label('id'), literal(0.0).label('score')) \
+        .where(db.and_(*(name.contains(word) for word in words))).subquery()
@@ -0,0 +1,54 @@
+import logging
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+# ----------------------------------------------------------------------------#
+# Template bytecode cache.
+#
+# Jinja compiles a template to Python source and then to a code object the
+# first time each worker renders it. With TEMPLATE_CACHE_DIR set, the code
+# objects are also stored on disk and shared by every worker: a new worker
+# only unmarshals them. `flask precompile-templates` fills the cache as a
+# build step, so the first worker after a deploy does not compile anything
+# either. Each entry is keyed by template path and checked against the
+# source checksum and the Python version, so an edited template or a
+# different interpreter compiles again instead of using stale code.
+# ----------------------------------------------------------------------------#
+
+TEMPLATE_EXTENSIONS = ('html',)
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache that renders anyway when the directory is not writable."""
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as error:
+            logger.warning('could not write template bytecode to %s: %s', self.directory, error)
+
+
+def init_templates(app):
+    directory = app.config.get('TEMPLATE_CACHE_DIR')
+    if not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as error:
+        app.logger.warning('template bytecode cache disabled, cannot create %s: %s', directory, error)
+        return
+    app.jinja_env.bytecode_cache = TemplateBytecodeCache(directory)
+
+
+def precompile(env, clear=False):
+    """Compile every template into the environment's bytecode cache; returns their names."""
+    if clear:
+        env.bytecode_cache.clear()
+    names = env.list_templates(extensions=TEMPLATE_EXTENSIONS)
+    for name in names:
+        # through the loader rather than get_template, which would answer from the in-memory cache
+        env.loader.load(env, name, env.globals)
+    return names
@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+
+import availability
+from models import db, Venue, Artist, City, Show
+
+
+@pytest.mark.usefixtures('database')
+class AvailabilityTestCase(unittest.TestCase):
+    """A venue is free when none of its shows overlaps the window, edges excluded"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf, ny = City(name='san francisco', state='CA'), City(name='new york', state='NY')
+        self.venues = [Venue(name=name, city=city, address='1015 Folsom Street', phone='123-123-1234')
+                       for name, city in [('The Musical Hop', sf), ('Park Square Live Music & Coffee', sf),
+                                          ('The Dueling Pianos Bar', sf), ('Brooklyn Bowl', ny)]]
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000')
+        db.session.add_all(self.venues + [artist])
+        db.session.commit()
+        self.city_id = self.venues[0].city_id
+
+        self.shows = [Show(venue_id=self.venues[venue].id, artist_id=artist.id, start_time=start, end_time=end)
+                      for venue, start, end in [(0, datetime(2026, 11, 1, 18), datetime(2026, 11, 1, 20, 0, 30)),
+                                                (1, datetime(2026, 11, 1, 22), datetime(2026, 11, 1, 23, 30)),
+                                                (3, datetime(2026, 11, 1, 12), datetime(2026, 11, 2, 12))]]
+        db.session.add_all(self.shows)
+        db.session.commit()
+
+    def free(self, start, end):
+        return [row.name for row in availability.free_venues(self.city_id, start, end).order_by(Venue.name)]
+
+    def test_overlapping_shows_make_venues_busy(self):
+        self.assertEqual(self.free(datetime(2026, 11, 1, 17), datetime(2026, 11, 1, 19)),
+                         ['Park Square Live Music & Coffee', 'The Dueling Pianos Bar'])
+        self.assertEqual(self.free(datetime(2026, 11, 1, 19), datetime(2026, 11, 2, 1)), ['The Dueling Pianos Bar'])
+
+    def test_edges_and_minute_rounding(self):
+        # the Musical Hop's show ends 30 seconds into its R*Tree minute, the Park Square show starts at 22:00
+        self.assertEqual(self.free(datetime(2026, 11, 1, 20, 0, 45), datetime(2026, 11, 1, 22)),
+                         ['Park Square Live Music & Coffee', 'The Dueling Pianos Bar', 'The Musical Hop'])
+        self.assertEqual(self.free(datetime(2026, 11, 1, 20, 0, 15), datetime(2026, 11, 1, 22)),
+                         ['Park Square Live Music & Coffee', 'The Dueling Pianos Bar'])
+
+    def test_periods_follow_show_changes(self):
+        self.shows[0].start_time, self.shows[0].end_time = datetime(2026, 11, 3, 18), datetime(2026, 11, 3, 20)
+        db.session.delete(self.shows[1])
+        db.session.commit()
+
+        self.assertEqual(len(self.free(datetime(2026, 11, 1, 17), datetime(2026, 11, 2))), 3)
+        self.assertEqual(self.free(datetime(2026, 11, 3, 19), datetime(2026, 11, 3, 21)),
+                         ['Park Square Live Music & Coffee', 'The Dueling Pianos Bar'])
+        self.assertEqual(db.session.execute(text('SELECT count(*) FROM show_periods')).scalar(), 2)
+
+    def test_answered_from_the_rtree(self):
+        query = availability.free_venues(self.city_id, datetime(2026, 11, 1, 17), datetime(2026, 11, 1, 19))
+        statement = str(query.statement.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+
+        plan = ' | '.join(row[-1] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + statement)))
+
+        self.assertIn('SCAN show_periods VIRTUAL TABLE INDEX', plan)
+        self.assertNotIn('SCAN shows', plan)
+
+    def test_route(self):
+        res = self.client().get('/venues/availability?city=San Francisco&state=CA'
+                                '&start=2026-11-01T17:00&end=2026-11-01T19:00')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([venue['name'] for venue in res.get_json()['venues']],
+                         ['Park Square Live Music & Coffee', 'The Dueling Pianos Bar'])
+        self.assertEqual(self.client().get('/venues/availability?city=Oakland&state=CA'
+                                           '&start=2026-11-01T17:00&end=2026-11-01T19:00').get_json()['venues'], [])
+        self.assertEqual(self.client().get('/venues/availability?city=San Francisco&start=2026-11-01T17:00')
+                         .status_code, 400)
+        self.assertEqual(self.client().get('/venues/availability?city=San Francisco'
+                                           '&start=2026-11-01T19:00&end=2026-11-01T17:00').status_code, 400)
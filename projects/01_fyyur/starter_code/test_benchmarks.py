@@ -0,0 +1,66 @@
+import io
+import random
+import unittest
+from argparse import Namespace
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+
+import pytest
+
+from benchmarks import routes, seed
+from models import db, Venue, Artist, Show, City, Genre
+
+
+@pytest.mark.usefixtures('database')
+class BenchmarkTestCase(unittest.TestCase):
+    """The seeder fills every table consistently, and the route benchmark reports every page"""
+
+    def seed(self, **options):
+        args = dict(create=False, seed=1, cities=5, genres=4, venues=12, artists=20, shows=300, genres_per_entity=2,
+                    past_days=30, future_days=30, batch_size=5, show_batch_size=100)
+        args.update(options)
+        return seed.seed(Namespace(**args), echo=lambda message: None)
+
+    def test_seed(self):
+        summary = self.seed()
+
+        self.assertEqual((summary['cities'], summary['genres'], summary['venues'], summary['artists'],
+                          summary['shows']), (5, 4, 12, 20, 300))
+        self.assertEqual((City.query.count(), Genre.query.count(), Venue.query.count(), Artist.query.count(),
+                          Show.query.count()), (5, 4, 12, 20, 300))
+        self.assertEqual(len(Venue.query.first().genres), 2)
+        self.assertEqual(Venue.query.filter(Venue.latitude.is_(None)).count(), 0)
+        upcoming, past = db.session.query(db.func.sum(Venue.num_upcoming_shows), db.func.sum(Venue.num_past_shows)).one()
+        self.assertEqual(upcoming + past, 300)
+
+    def test_show_rows_are_reproducible(self):
+        now = datetime(2026, 5, 21)
+        rows = lambda: list(seed.show_rows(random.Random(7), 50, [1, 2, 3], [4, 5], now, 10, 10))
+
+        self.assertEqual(rows(), rows())
+        self.assertTrue(all(row['start_time'].minute == 0 and row['end_time'] > row['start_time'] for row in rows()))
+
+    def test_routes_report(self):
+        self.seed()
+
+        with redirect_stderr(io.StringIO()):
+            report = routes.run('test', requests=3, samples=2, warmup=1, use_server=False, seed=1,
+                                only=r'^/(venues|artists)/<int', exclude='edit')
+
+        self.assertEqual(set(report['routes']), {'/venues/<int:venue_id>', '/artists/<int:artist_id>'})
+        for name, result in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertEqual(result['status'], {'200': 3})
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(report['rows'], {'venues': 12, 'artists': 20})
+
+    def test_compare_flags_regressions(self):
+        route = {'p95_ms': 10.0, 'queries_per_request': 2}
+        before = {'label': 'a', 'peak_rss_kb': 1, 'routes': {'/venues': route, '/shows': route, '/artists': route}}
+        after = {'label': 'b', 'peak_rss_kb': 1, 'routes': {
+            '/venues': {'p95_ms': 11.0, 'queries_per_request': 2},
+            '/shows': {'p95_ms': 13.0, 'queries_per_request': 2},
+            '/artists': {'p95_ms': 9.0, 'queries_per_request': 3}}}
+
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(routes.compare(before, after, 0.2), ['/shows', '/artists'])
@@ -0,0 +1,112 @@
+import unittest
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import LRUCache, LocalBackend, FragmentCache, fragment_cache
+from models import db, Venue, Artist, City, Show
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    """The LRU keeps the most recently used entries and drops expired ones"""
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entries_are_misses(self):
+        cache = LRUCache(2)
+        cache.set('a', 1, timeout=-1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class FragmentCacheTestCase(unittest.TestCase):
+    """Fragments are rendered once per version, and a version bump invalidates them"""
+
+    def setUp(self):
+        self.cache = FragmentCache()
+        self.renders = []
+
+    def render(self, value):
+        def render():
+            self.renders.append(value)
+            return value
+        return render
+
+    def test_hits_until_invalidated(self):
+        self.assertEqual(self.cache.get_or_render('venue', 1, self.render('one')), 'one')
+        self.assertEqual(self.cache.get_or_render('venue', 1, self.render('two')), 'one')
+        self.cache.invalidate('venue', 1)
+        self.assertEqual(self.cache.get_or_render('venue', 1, self.render('three')), 'three')
+
+        self.assertEqual(self.renders, ['one', 'three'])
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_missing_entities_are_not_cached(self):
+        self.cache.get_or_render('venue', 1000, self.render(None))
+        self.cache.get_or_render('venue', 1000, self.render(None))
+
+        self.assertEqual(self.renders, [None, None])
+
+    def test_shared_backend_is_seen_by_every_worker(self):
+        backend = LocalBackend()
+        first, second = FragmentCache(), FragmentCache()
+        first.backend = second.backend = backend
+
+        first.get_or_render('artist', 4, self.render('page'))
+        self.assertEqual(second.get_or_render('artist', 4, self.render('again')), 'page')
+        first.invalidate('artist', 4)
+        self.assertEqual(second.get_or_render('artist', 4, self.render('new page')), 'new page')
+
+        self.assertEqual(self.renders, ['page', 'new page'])
+        self.assertEqual(second.stats()['shared_hits'], 1)
+
+
+@pytest.mark.usefixtures('database')
+class PageCacheTestCase(unittest.TestCase):
+    """Detail pages are served from the fragment cache until a show changes them"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf = City(name='san francisco', state='CA')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234')
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000')
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        self.venue_id, self.artist_id = venue.id, artist.id
+
+    def test_new_shows_invalidate_the_venue_page(self):
+        before = fragment_cache.stats()
+        self.client().get(f'/venues/{self.venue_id}')
+        self.client().get(f'/venues/{self.venue_id}')
+        stats = fragment_cache.stats()
+        self.assertEqual((stats['hits'] - before['hits'], stats['misses'] - before['misses']), (1, 1))
+
+        start_time = (datetime.utcnow() + timedelta(days=3)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.client().post('/shows/batch', json={'shows': [{'venue_id': self.venue_id, 'artist_id': self.artist_id,
+                                                             'start_time': start_time}]})
+        self.assertEqual(Show.query.count(), 1)
+        page = self.client().get(f'/venues/{self.venue_id}').get_data(as_text=True)
+
+        self.assertIn('Guns N Petals', page)
+        self.assertEqual(fragment_cache.stats()['misses'] - before['misses'], 2)
+
+    def test_stats_route(self):
+        self.client().get(f'/artists/{self.artist_id}')
+
+        stats = self.client().get('/cache/stats').get_json()
+
+        self.assertGreaterEqual(stats['misses'], 1)
+        self.assertEqual(stats['local_entries'], 1)
+        self.assertIsNone(stats['backend'])
@@ -0,0 +1,105 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+
+import pytest
+
+import counters
+from models import db, Venue, Artist, City, Show
+
+
+@pytest.mark.usefixtures('database')
+class CounterTestCase(unittest.TestCase):
+    """Show counters follow creations, deletions and rolls, and agree with a rebuild"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf = City(name='san francisco', state='CA')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234')
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000')
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        self.venue_id, self.artist_id = venue.id, artist.id
+        self.now = datetime.utcnow()
+        counters.get_mark().value = self.now - timedelta(days=2)
+        db.session.commit()
+
+    def create_show(self, start_time):
+        show = Show(venue_id=self.venue_id, artist_id=self.artist_id, start_time=start_time)
+        db.session.add(show)
+        counters.record_show_created(show)
+        return show
+
+    def counts(self):
+        db.session.expire_all()
+        venue, artist = db.session.get(Venue, self.venue_id), db.session.get(Artist, self.artist_id)
+        return (venue.num_upcoming_shows, venue.num_past_shows), (artist.num_upcoming_shows, artist.num_past_shows)
+
+    def assert_matches_rebuild(self, expected):
+        self.assertEqual(self.counts(), (expected, expected))
+        counters.rebuild_counters(self.now)
+        self.assertEqual(self.counts(), (expected, expected))
+
+    def test_created_shows(self):
+        self.create_show(self.now + timedelta(days=3))
+        self.create_show(self.now - timedelta(days=3))
+        db.session.commit()
+
+        self.assert_matches_rebuild((1, 1))
+
+    def test_roll_moves_started_shows(self):
+        self.create_show(self.now - timedelta(days=1))
+        self.create_show(self.now + timedelta(days=1))
+        db.session.commit()
+        self.assertEqual(self.counts(), ((2, 0), (2, 0)))
+
+        self.assertEqual(counters.roll_shows(self.now), 1)
+
+        self.assert_matches_rebuild((1, 1))
+
+    def test_deleted_venue(self):
+        self.create_show(self.now + timedelta(days=1))
+        self.create_show(self.now - timedelta(days=3))
+        db.session.commit()
+
+        self.client().delete(f'/venues/{self.venue_id}')
+
+        artist = db.session.get(Artist, self.artist_id)
+        self.assertEqual((artist.num_upcoming_shows, artist.num_past_shows), (0, 0))
+
+    def test_show_form(self):
+        start = (self.now + timedelta(days=3)).replace(microsecond=0)
+        form = {'venue_id': str(self.venue_id), 'artist_id': str(self.artist_id),
+                'start_time': start.strftime('%Y-%m-%d %H:%M:%S')}
+
+        self.client().post('/shows/create', data=form)
+        self.client().post('/shows/create', data=dict(form, end_time=(start + timedelta(hours=3)).isoformat()))
+        res = self.client().post('/shows/create', data=dict(form, end_time=(start - timedelta(hours=1)).isoformat()))
+        self.client().post('/shows/create', data=dict(form, start_time='next friday-ish'))
+
+        self.assertIn('end_time must be after start_time', res.get_data(as_text=True))
+        self.assertEqual([show.end_time - show.start_time for show in Show.query.order_by(Show.id)],
+                         [timedelta(hours=2), timedelta(hours=3)])
+        self.assert_matches_rebuild((2, 0))
+
+    def test_roll_waits_for_a_writer_holding_the_mark(self):
+        # the show starts after the mark and before the roll: whichever commits first, it must end up past
+        self.create_show(self.now - timedelta(days=1))
+        rolled = []
+
+        def roll():
+            with self.app.app_context():
+                rolled.append(counters.roll_shows(self.now))
+                db.session.remove()
+
+        roller = threading.Thread(target=roll)
+        roller.start()
+        time.sleep(0.3)
+        self.assertEqual(rolled, [])
+        db.session.commit()
+        roller.join(10)
+
+        self.assertEqual(rolled, [1])
+        self.assert_matches_rebuild((0, 1))
@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime
+
+import pytest
+
+import rollups
+import search
+from models import db, Venue, Artist, City, Genre, Show, ShowRollup, venue_genres
+
+
+@pytest.mark.usefixtures('database')
+class EditTestCase(unittest.TestCase):
+    """The edit forms write only what changed and refuse stale submissions"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf, ny = City(name='san francisco', state='CA'), City(name='new york', state='NY')
+        jazz, folk = Genre(name='Jazz'), Genre(name='Folk')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234',
+                      facebook_link='https://www.facebook.com/TheMusicalHop', genres=[jazz, folk])
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000', genres=[jazz])
+        db.session.add_all([venue, artist, ny])
+        db.session.flush()
+        db.session.add(Show(venue_id=venue.id, artist_id=artist.id, start_time=datetime(2026, 5, 21, 21, 30)))
+        db.session.commit()
+        rollups.rebuild()
+        self.venue_id, self.artist_id, self.ny_id = venue.id, artist.id, ny.id
+
+    def venue_form(self, **changes):
+        form = {'version': '1', 'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA',
+                'address': '1015 Folsom Street', 'phone': '123-123-1234',
+                'facebook_link': 'https://www.facebook.com/TheMusicalHop', 'genres': ['Folk', 'Jazz']}
+        form.update(changes)
+        return form
+
+    def test_edit_venue_form_prefill(self):
+        res = self.client().get(f'/venues/{self.venue_id}/edit')
+        page = res.get_data(as_text=True)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('value="1015 Folsom Street"', page)
+        self.assertIn('name="version" value="1"', page)
+        self.assertIn('<option selected value="Jazz">', page)
+
+    def test_edit_missing_venue(self):
+        res = self.client().get('/venues/1000/edit')
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_edit_venue_changes_only_submitted_differences(self):
+        res = self.client().post(f'/venues/{self.venue_id}/edit',
+                                 data=self.venue_form(phone='555-000-1111', genres=['Jazz', 'Swing']))
+
+        venue = db.session.get(Venue, self.venue_id)
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(venue.phone, '555-000-1111')
+        self.assertEqual(venue.address, '1015 Folsom Street')
+        self.assertEqual(venue.version, 2)
+        self.assertEqual(sorted(genre.name for genre in venue.genres), ['Jazz', 'Swing'])
+        query, _ = search.search_venues('swing')
+        self.assertEqual([row.id for row in query], [self.venue_id])
+
+    def test_unchanged_submission_keeps_version(self):
+        self.client().post(f'/venues/{self.venue_id}/edit', data=self.venue_form())
+
+        self.assertEqual(db.session.get(Venue, self.venue_id).version, 1)
+
+    def test_stale_version_is_rejected(self):
+        self.client().post(f'/venues/{self.venue_id}/edit', data=self.venue_form(name='The Hop'))
+        res = self.client().post(f'/venues/{self.venue_id}/edit', data=self.venue_form(name='The Big Hop'))
+
+        venue = db.session.get(Venue, self.venue_id)
+        self.assertEqual(res.status_code, 302)
+        self.assertTrue(res.location.endswith(f'/venues/{self.venue_id}/edit'))
+        self.assertEqual(venue.name, 'The Hop')
+        self.assertEqual(venue.version, 2)
+
+    def test_venue_city_change_moves_rollups(self):
+        self.client().post(f'/venues/{self.venue_id}/edit', data=self.venue_form(city='New York', state='NY'))
+
+        self.assertEqual(db.session.get(Venue, self.venue_id).city_id, self.ny_id)
+        self.assertEqual(rollups.monthly('city', self.ny_id), [{'period': '2026-05', 'shows': 1}])
+        incremental = {(row.dimension, row.key, row.period): row.shows for row in ShowRollup.query if row.shows}
+        rollups.rebuild()
+        self.assertEqual(incremental, {(row.dimension, row.key, row.period): row.shows for row in ShowRollup.query})
+
+    def test_edit_artist_genres(self):
+        res = self.client().post(f'/artists/{self.artist_id}/edit',
+                                 data={'version': '1', 'name': 'Guns N Petals', 'city': 'San Francisco',
+                                       'state': 'CA', 'phone': '326-123-5000', 'genres': ['Folk']})
+
+        artist = db.session.get(Artist, self.artist_id)
+        folk = Genre.query.filter_by(name='Folk').one()
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual([genre.name for genre in artist.genres], ['Folk'])
+        self.assertEqual(artist.version, 2)
+        self.assertEqual(rollups.monthly('genre', folk.id), [{'period': '2026-05', 'shows': 1}])
+        self.assertEqual(db.session.query(venue_genres).count(), 2)
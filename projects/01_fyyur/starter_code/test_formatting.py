@@ -0,0 +1,39 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+
+import babel.dates
+
+from formatting import PATTERNS, compiled, format_datetime, format_datetimes
+
+
+class FormattingTestCase(unittest.TestCase):
+    """The precompiled patterns format exactly like babel does from scratch"""
+
+    def setUp(self):
+        self.values = [datetime(2026, 5, 21, 21, 30), datetime(2026, 12, 1, 9, 5, tzinfo=timezone.utc),
+                       datetime(2026, 7, 4, 20, 0, tzinfo=timezone(timedelta(hours=-7)))]
+
+    def babel(self, value, format):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return babel.dates.format_datetime(value, PATTERNS.get(format, format), locale='en_US')
+
+    def test_same_output_as_babel(self):
+        for format in ('full', 'medium', 'short', 'long', 'yyyy-MM-dd HH:mm'):
+            with self.subTest(format=format):
+                self.assertEqual(format_datetimes(self.values, format, 'en_US'),
+                                 [self.babel(value, format) for value in self.values])
+
+    def test_strings_are_parsed(self):
+        self.assertEqual(format_datetime('2026-05-21 21:30:00', 'full', 'en_US'), 'Thursday May, 21, 2026 at 9:30PM')
+        self.assertEqual(format_datetime('2026-05-21T21:30:00Z', 'full', 'en_US'), 'Thursday May, 21, 2026 at 9:30PM')
+        self.assertEqual(format_datetime('May 21 2026 9:30pm', 'full', 'en_US'), 'Thursday May, 21, 2026 at 9:30PM')
+
+    def test_patterns_are_compiled_once(self):
+        format_datetimes(self.values, 'full', 'en_US')
+        hits = compiled.cache_info().hits
+
+        format_datetimes(self.values, 'full', 'en_US')
+        format_datetime(self.values[0], 'full', 'en_US')
+
+        self.assertEqual(compiled.cache_info().hits, hits + 2)
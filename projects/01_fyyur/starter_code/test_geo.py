@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import pytest
+
+import geo
+import geocoding
+from models import db, Venue, City
+
+GAZETTEER = os.path.join(tempfile.mkdtemp(), 'cities.csv')
+with open(GAZETTEER, 'w') as file:
+    file.write('name,state,latitude,longitude\nsan francisco,CA,37.7749,-122.4194\n')
+
+
+@pytest.mark.usefixtures('database')
+class NearbyTestCase(unittest.TestCase):
+    """Radius search over the geohash index agrees with exact distances"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf, la = City(name='san francisco', state='CA'), City(name='los angeles', state='CA')
+        places = [('The Musical Hop', sf, 37.7749, -122.4194), ('Park Square Live Music & Coffee', sf, 37.8044, -122.2712),
+                  ('The Dueling Pianos Bar', sf, 37.3382, -121.8863), ('Hollywood Bowl', la, 34.1122, -118.3391)]
+        self.venues = [Venue(name=name, city=city, address=f'{n} Main Street', phone='123-123-1234',
+                             **geo.located(latitude, longitude))
+                       for n, (name, city, latitude, longitude) in enumerate(places, start=1)]
+        db.session.add_all(self.venues)
+        db.session.commit()
+
+    def test_geohash_matches_base32_geohash(self):
+        # the textbook geohash of (57.64911, 10.40744) is 'u4pruydqqvj'; 26 bits per axis give 10 characters
+        text = ''.join('0123456789bcdefghjkmnpqrstuvwxyz'[(geo.encode(57.64911, 10.40744) >> (47 - 5 * n)) & 31]
+                       for n in range(10))
+        self.assertEqual(text, 'u4pruydqqv')
+
+    def test_cover_stays_small(self):
+        for latitude, longitude, radius in ((37.77, -122.42, 0.5), (0, 179.99, 50), (89.9, 0, 200), (-33.9, 151.2, 200)):
+            ranges = geo.cover(*geo.bounding_box(latitude, longitude, radius))
+            self.assertLessEqual(len(ranges), 16)
+            self.assertIn(True, [low <= geo.encode(latitude, longitude) < high for low, high in ranges])
+
+    def test_nearby_sorted_by_distance(self):
+        res = self.client().get('/venues/nearby?lat=37.7749&lng=-122.4194&radius_km=80')
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([venue['name'] for venue in data['venues']],
+                         ['The Musical Hop', 'Park Square Live Music & Coffee', 'The Dueling Pianos Bar'])
+        self.assertEqual(data['venues'][0]['distance_km'], 0)
+        self.assertAlmostEqual(data['venues'][1]['distance_km'], 13.3, delta=0.2)
+        self.assertEqual(data['venues'][0]['city'], 'san francisco')
+
+    def test_nearby_limit(self):
+        res = self.client().get('/venues/nearby?lat=37.7749&lng=-122.4194&radius_km=60&limit=1')
+
+        self.assertEqual([venue['name'] for venue in res.get_json()['venues']], ['The Musical Hop'])
+
+    def test_nearby_bad_arguments(self):
+        for query in ('lng=-122.4', 'lat=91&lng=0', 'lat=37&lng=-122&radius_km=0',
+                      'lat=37&lng=-122&radius_km=5000', 'lat=nan&lng=0', 'lat=north&lng=0'):
+            self.assertEqual(self.client().get(f'/venues/nearby?{query}').status_code, 400, query)
+
+    def test_geocode_venues(self):
+        db.session.execute(Venue.__table__.update().values(geo.located(None, None)))
+        db.session.commit()
+
+        located, unplaced = geocoding.geocode_venues(2, echo=lambda message: None,
+                                                     geocoder=geocoding.LocalGeocoder(GAZETTEER, spread_km=5))
+
+        venue = db.session.get(Venue, self.venues[0].id)
+        self.assertEqual((located, unplaced), (4, 0))
+        self.assertLess(geo.distance_km(37.7749, -122.4194, venue.latitude, venue.longitude), 5)
+        self.assertEqual(venue.geohash, geo.encode(venue.latitude, venue.longitude))
+
+    def test_address_edit_clears_coordinates(self):
+        venue_id = self.venues[0].id
+
+        self.client().post(f'/venues/{venue_id}/edit', data={'version': '1', 'address': '1015 Folsom Street'})
+
+        venue = db.session.get(Venue, venue_id)
+        self.assertEqual(venue.address, '1015 Folsom Street')
+        self.assertIsNone(venue.geohash)
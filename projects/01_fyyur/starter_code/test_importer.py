@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pytest
+
+import importer
+from models import db, Venue, Artist, City, Show
+
+
+@pytest.mark.usefixtures('database')
+class ImportTestCase(unittest.TestCase):
+    """Bulk imports skip the rows they cannot load and report them by line number"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.messages = []
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        return path
+
+    def skipped(self):
+        return [message for message in self.messages if message.endswith('skipped')]
+
+    def test_csv_venues_with_genres(self):
+        path = self.write('venues.csv', [
+            'name,city,state,address,phone,genres',
+            'The Musical Hop,San Francisco,CA,1015 Folsom Street,123-123-1234,Jazz|Folk',
+            'Park Square Live Music & Coffee,San Francisco,CA,34 Whiskey Moore Ave,415-000-1234,Jazz',
+        ])
+
+        stats = importer.import_entities(Venue, path, 10, echo=self.messages.append)
+
+        self.assertEqual((stats.rows, stats.skipped), (2, 0))
+        self.assertEqual(City.query.count(), 1)
+        hop = Venue.query.filter_by(name='The Musical Hop').one()
+        self.assertEqual(sorted(genre.name for genre in hop.genres), ['Folk', 'Jazz'])
+
+    def test_rows_missing_a_required_column_are_skipped(self):
+        path = self.write('venues.ndjson', [
+            json.dumps({'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA',
+                        'address': '1015 Folsom Street', 'phone': '123-123-1234'}),
+            json.dumps({'name': 'The Dueling Pianos Bar', 'city': 'New York', 'state': 'NY', 'phone': '914-003-1132'}),
+            json.dumps({'name': 'Park Square', 'city': 'San Francisco', 'address': '34 Whiskey Moore Ave',
+                        'phone': '  '}),
+            json.dumps({'city': 'San Francisco', 'address': '1 Main Street', 'phone': '415-000-1234'}),
+        ])
+
+        stats = importer.import_entities(Venue, path, 10, echo=self.messages.append)
+
+        self.assertEqual((stats.rows, stats.skipped), (1, 3))
+        self.assertEqual(self.skipped(), ['line 2: address is required, skipped',
+                                          'line 3: phone is required, skipped',
+                                          'line 4: name is required, skipped'])
+        self.assertEqual([venue.name for venue in Venue.query], ['The Musical Hop'])
+
+    def test_lines_that_are_not_json_objects_are_skipped(self):
+        path = self.write('artists.ndjson', [
+            json.dumps({'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA', 'phone': '326-123-5000'}),
+            '{"name": "Matt Quevedo", "city": ',
+            '',
+            '["The Wild Sax Band", "San Francisco"]',
+            json.dumps({'name': 'The Wild Sax Band', 'city': 'San Francisco', 'state': 'CA', 'phone': '432-325-5432'}),
+        ])
+
+        stats = importer.import_entities(Artist, path, 1, echo=self.messages.append)
+
+        self.assertEqual((stats.rows, stats.skipped), (2, 2))
+        self.assertEqual(len(self.skipped()), 2)
+        self.assertTrue(self.skipped()[0].startswith('line 2: not valid JSON'))
+        self.assertEqual(self.skipped()[1], 'line 4: not a JSON object, skipped')
+
+    def test_shows_with_unknown_references_are_skipped(self):
+        sf = City(name='san francisco', state='CA')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234')
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000')
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        path = self.write('shows.ndjson', [
+            json.dumps({'venue_id': venue.id, 'artist_id': artist.id, 'start_time': '2099-05-21T21:30'}),
+            json.dumps({'venue_id': venue.id, 'artist_id': 1000, 'start_time': '2099-05-21T21:30'}),
+            json.dumps({'venue_id': venue.id, 'start_time': '2099-05-21T21:30'}),
+            'null',
+        ])
+
+        stats = importer.import_shows(path, 10, echo=self.messages.append)
+
+        self.assertEqual((stats.rows, stats.skipped), (1, 3))
+        self.assertEqual(Show.query.count(), 1)
+        self.assertEqual(db.session.get(Venue, venue.id).num_upcoming_shows, 1)
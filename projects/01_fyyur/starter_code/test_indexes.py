@@ -0,0 +1,41 @@
+import unittest
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from models import db, City, Genre
+
+
+@pytest.mark.usefixtures('database')
+class IndexTestCase(unittest.TestCase):
+    """The detail page and lookup predicates are answered from indexes, not table scans"""
+
+    def plan(self, statement, **params):
+        rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + statement), params).all()
+        return ' | '.join(row[-1] for row in rows)
+
+    def test_shows_by_venue_and_artist(self):
+        now = datetime(2026, 5, 21)
+        for column in ('venue_id', 'artist_id'):
+            with self.subTest(column=column):
+                plan = self.plan(f'SELECT * FROM shows WHERE {column} = :id AND start_time >= :now', id=1, now=now)
+
+                self.assertIn(f'USING INDEX ix_shows_{column}_start_time ({column}=? AND start_time>?)', plan)
+
+    def test_city_and_genre_lookups(self):
+        self.assertIn('USING COVERING INDEX ix_cities_name_state',
+                      self.plan('SELECT id FROM cities WHERE name = :name AND state = :state', name='x', state='CA'))
+        self.assertIn('USING COVERING INDEX ix_genres_name',
+                      self.plan('SELECT name FROM genres WHERE name = :name', name='Jazz'))
+
+    def test_lookup_indexes_are_unique(self):
+        db.session.add_all([Genre(name='Jazz'), Genre(name='Jazz')])
+        with self.assertRaises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+        db.session.add_all([City(name='san francisco', state='CA'), City(name='san francisco', state='CA')])
+        with self.assertRaises(IntegrityError):
+            db.session.commit()
@@ -0,0 +1,121 @@
+import unittest
+
+import pytest
+
+import counters
+import rollups
+from models import db, Venue, Artist, City, Show, ShowRollup
+
+
+@pytest.mark.usefixtures('database')
+class IngestTestCase(unittest.TestCase):
+    """A batch of shows is written in one transaction and its bad rows are reported one by one"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf = City(name='san francisco', state='CA')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234')
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000')
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        self.venue_id, self.artist_id = venue.id, artist.id
+
+    def post(self, shows):
+        return self.client().post('/shows/batch', json={'shows': shows})
+
+    def test_batch_creates_shows_counters_and_rollups(self):
+        res = self.post([{'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': f'2099-05-{day}T21:30'}
+                         for day in range(10, 20)])
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json(), {'created': 10, 'errors': []})
+        self.assertEqual(Show.query.count(), 10)
+        self.assertEqual(db.session.get(Venue, self.venue_id).num_upcoming_shows, 10)
+        self.assertEqual(db.session.get(Artist, self.artist_id).num_upcoming_shows, 10)
+        self.assertEqual(rollups.monthly('venue', self.venue_id), [{'period': '2099-05', 'shows': 10}])
+
+        incremental = {(row.dimension, row.key, row.period): row.shows for row in ShowRollup.query if row.shows}
+        rollups.rebuild()
+        counters.rebuild_counters()
+        self.assertEqual(incremental, {(row.dimension, row.key, row.period): row.shows for row in ShowRollup.query})
+        self.assertEqual(db.session.get(Venue, self.venue_id).num_upcoming_shows, 10)
+
+    def test_errors_are_reported_per_row(self):
+        res = self.post([
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': self.venue_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': 1000, 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': self.venue_id, 'artist_id': 'x', 'start_time': '2099-05-21T21:30'},
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': 'next friday-ish'},
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30',
+             'end_time': '2099-05-21T20:00'},
+            'a show',
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': '2099-05-22T21:30',
+             'end_time': '2099-05-23T01:00'},
+        ])
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json(), {'created': 2, 'errors': [
+            {'index': 1, 'error': 'artist_id is required'},
+            {'index': 2, 'error': 'venue 1000 does not exist'},
+            {'index': 3, 'error': 'artist_id must be an integer'},
+            {'index': 4, 'error': 'start_time is not a date and time'},
+            {'index': 5, 'error': 'end_time must be after start_time'},
+            {'index': 6, 'error': 'a show must be an object'},
+        ]})
+        self.assertEqual(Show.query.count(), 2)
+
+    def test_out_of_range_values_are_reported(self):
+        res = self.post([
+            {'venue_id': 2 ** 70, 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': self.venue_id, 'artist_id': -1, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': '9999-12-31T23:00'},
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': '9999-12-31T21:00',
+             'end_time': '9999-12-31T23:00'},
+        ])
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json(), {'created': 1, 'errors': [
+            {'index': 0, 'error': 'venue_id is out of range'},
+            {'index': 1, 'error': 'artist_id is out of range'},
+            {'index': 2, 'error': 'start_time is too late for a show without end_time'},
+        ]})
+
+    def test_ids_must_be_integers(self):
+        res = self.post([
+            {'venue_id': True, 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id + 0.7, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': f'{self.venue_id}.0', 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': [self.venue_id], 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+            {'venue_id': str(self.venue_id), 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'},
+        ])
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.get_json(), {'created': 1, 'errors': [
+            {'index': 0, 'error': 'venue_id must be an integer'},
+            {'index': 1, 'error': 'artist_id must be an integer'},
+            {'index': 2, 'error': 'venue_id must be an integer'},
+            {'index': 3, 'error': 'venue_id must be an integer'},
+        ]})
+
+    def test_nothing_valid(self):
+        res = self.post([{'venue_id': self.venue_id, 'artist_id': 1000, 'start_time': '2099-05-21T21:30'}])
+
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(res.get_json()['errors'], [{'index': 0, 'error': 'artist 1000 does not exist'}])
+        self.assertEqual(Show.query.count(), 0)
+
+        res = self.post([{'venue_id': 2 ** 70, 'artist_id': self.artist_id, 'start_time': '9999-12-31T23:00'}])
+
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(res.get_json()['errors'], [{'index': 0, 'error': 'venue_id is out of range'}])
+
+    def test_malformed_and_oversized_requests(self):
+        self.assertEqual(self.client().post('/shows/batch', data='not json').status_code, 400)
+        self.assertEqual(self.client().post('/shows/batch', json={'shows': []}).status_code, 400)
+        self.assertEqual(self.client().post('/shows/batch', json=[{'venue_id': 1}]).status_code, 400)
+
+        show = {'venue_id': self.venue_id, 'artist_id': self.artist_id, 'start_time': '2099-05-21T21:30'}
+        self.assertEqual(self.post([show] * (self.app.config['SHOWS_BATCH_MAX'] + 1)).status_code, 413)
+        self.assertEqual(Show.query.count(), 0)
@@ -0,0 +1,70 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+
+from request_logging import JSONFormatter, init_logging
+
+
+class RequestLoggingTestCase(unittest.TestCase):
+    """Every request writes one JSON line with its latency and database time, off the request thread"""
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        self.log_file = os.path.join(tempfile.mkdtemp(), 'requests.log')
+
+        self.app = Flask(__name__)
+        self.app.config.update(LOG_FILE=self.log_file, LOG_LEVEL='INFO')
+        self.listener = init_logging(self.app)
+
+        @self.app.route('/venues/<int:venue_id>')
+        def venue(venue_id):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1')).scalar()
+                return jsonify(connection.execute(text('SELECT :id'), {'id': venue_id}).scalar())
+
+        self.client = self.app.test_client
+
+    def records(self):
+        # stopping the listener drains the queue into the file
+        self.listener.stop()
+        atexit.unregister(self.listener.stop)
+        with open(self.log_file) as log:
+            return [json.loads(line) for line in log]
+
+    def test_request_record(self):
+        self.assertEqual(self.client().get('/venues/3').get_json(), 3)
+
+        [record] = self.records()
+        self.assertEqual((record['level'], record['message'], record['method']), ('INFO', 'request', 'GET'))
+        self.assertEqual((record['route'], record['path'], record['status']), ('/venues/<int:venue_id>', '/venues/3', 200))
+        self.assertEqual(record['db_queries'], 2)
+        self.assertGreaterEqual(record['latency_ms'], record['db_ms'])
+        self.assertGreaterEqual(record['db_ms'], 0)
+
+    def test_unknown_routes_and_exceptions(self):
+        self.client().get('/nowhere')
+        try:
+            raise ValueError('no such venue')
+        except ValueError:
+            self.app.logger.exception('lookup failed', extra={'venue_id': 3})
+
+        unknown, failed = self.records()
+        self.assertEqual((unknown['route'], unknown['status'], unknown['db_queries']), (None, 404, 0))
+        self.assertEqual((failed['level'], failed['venue_id']), ('ERROR', 3))
+        self.assertEqual(failed['message'], 'lookup failed')
+        self.assertIn('ValueError: no such venue', failed['exception'])
+
+    def test_formatter_keeps_unserializable_extras(self):
+        record = logging.LogRecord('fyyur', logging.INFO, __file__, 1, 'saved %s', ('venue',), None)
+        record.saved = object
+
+        entry = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(entry['message'], 'saved venue')
+        self.assertEqual(entry['saved'], str(object))
@@ -0,0 +1,58 @@
+import unittest
+
+import pytest
+from sqlalchemy import event
+
+import lookups
+from models import db, City, Genre
+
+
+@pytest.mark.usefixtures('database')
+class LookupTestCase(unittest.TestCase):
+    """City and genre names resolve from the process cache, and unknown ones are inserted once"""
+
+    def setUp(self):
+        db.session.add_all([City(name='san francisco', state='CA'), Genre(name='Jazz')])
+        db.session.commit()
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record)
+
+    def record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def test_known_names_come_from_the_cache(self):
+        sf = db.session.query(City.id).filter_by(name='san francisco').scalar()
+        lookups.resolve_cities([lookups.city_key('San Francisco ', 'CA')])
+        self.statements.clear()
+
+        self.assertEqual(lookups.resolve_cities([('san francisco', 'CA')]), {('san francisco', 'CA'): sf})
+        self.assertEqual(self.statements, [])
+
+    def test_unknown_names_are_inserted(self):
+        found = lookups.resolve_genres(['Jazz', 'Folk', 'Folk'])
+        db.session.commit()
+
+        self.assertEqual(set(found), {'Jazz', 'Folk'})
+        self.assertEqual(sorted(genre.name for genre in Genre.query), ['Folk', 'Jazz'])
+        self.assertEqual(lookups.genres.resolve(['Folk'], create=False), {'Folk': found['Folk']})
+
+    def test_rows_added_elsewhere_are_found(self):
+        lookups.resolve_genres(['Jazz'])
+        # another process inserts a genre after this one filled its cache
+        db.session.add(Genre(name='Soul'))
+        db.session.commit()
+
+        found = lookups.genres.resolve(['Soul'], create=False)
+
+        self.assertEqual(found, {'Soul': db.session.query(Genre.id).filter_by(name='Soul').scalar()})
+        self.assertEqual(Genre.query.count(), 2)
+
+    def test_rolled_back_inserts_are_not_cached(self):
+        lookups.resolve_cities([('new york', 'NY')])
+        db.session.rollback()
+
+        self.assertEqual(lookups.cities.resolve([('new york', 'NY')], create=False), {})
+        self.assertEqual(City.query.count(), 1)
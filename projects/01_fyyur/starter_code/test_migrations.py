@@ -0,0 +1,73 @@
+import io
+import unittest
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+import online_migrations
+from models import db, Venue, City
+
+
+@pytest.mark.usefixtures('database')
+class OnlineMigrationTestCase(unittest.TestCase):
+    """The helpers split Postgres changes into short-lock steps and backfill in bounded batches"""
+
+    def setUp(self):
+        sf = City(name='san francisco', state='CA')
+        db.session.add_all([Venue(name=f'Venue {n}', city=sf, address=f'{n} Main Street', phone='123-123-1234')
+                            for n in range(25)])
+        db.session.commit()
+
+    def dry_run(self, step):
+        # what `flask db upgrade --sql` does: Postgres SQL written to a buffer, nothing executed
+        output = io.StringIO()
+        migration = MigrationContext.configure(dialect_name='postgresql', opts={
+            'as_sql': True, 'output_buffer': output, 'literal_binds': True, 'transactional_ddl': True})
+        with Operations.context(migration), migration.begin_transaction():
+            step()
+        return output.getvalue()
+
+    def test_set_not_null_dry_run(self):
+        script = self.dry_run(lambda: online_migrations.set_not_null('venues', 'phone', sa.VARCHAR(120)))
+
+        steps = ['ADD CONSTRAINT venues_phone_not_null CHECK (phone IS NOT NULL) NOT VALID',
+                 'VALIDATE CONSTRAINT venues_phone_not_null', 'ALTER COLUMN phone SET NOT NULL',
+                 'DROP CONSTRAINT venues_phone_not_null']
+        positions = [script.index(f'ALTER TABLE venues {step};') for step in steps]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn('-- venues: VALIDATE CONSTRAINT venues_phone_not_null | SHARE UPDATE EXCLUSIVE '
+                      '(reads and writes continue), scans the table | ~25 rows', script)
+        self.assertIn("SET lock_timeout = '5s';", script)
+        # every step commits on its own, so no exclusive lock is held while the table is validated
+        self.assertEqual(script.count('COMMIT;'), len(steps) + 1)
+
+    def test_create_index_dry_run(self):
+        script = self.dry_run(lambda: online_migrations.create_index('ix_venues_name', 'venues', ['name']))
+
+        self.assertIn('CREATE INDEX CONCURRENTLY ix_venues_name ON venues (name);', script)
+        self.assertIn('SHARE UPDATE EXCLUSIVE (reads and writes continue), scans the table twice', script)
+
+    def test_backfill_dry_run_runs_nothing(self):
+        script = self.dry_run(lambda: online_migrations.backfill('venues', {'website': 'https://example.com'},
+                                                                 where='website IS NULL', batch_size=10))
+
+        self.assertIn("UPDATE venues SET website='https://example.com' WHERE website IS NULL AND "
+                      "venues.id >= 1 AND venues.id < 11;", script)
+        self.assertIn('in 3 batches of 10 keys', script)
+        self.assertEqual(Venue.query.filter(Venue.website.isnot(None)).count(), 0)
+
+    def test_backfill_in_batches(self):
+        statements = []
+        with db.engine.connect() as connection:
+            sa.event.listen(connection, 'before_cursor_execute',
+                            lambda *args: statements.append(args[2]) if args[2].startswith('UPDATE') else None)
+            migration = MigrationContext.configure(connection, opts={'transactional_ddl': True})
+            with Operations.context(migration), migration.begin_transaction():
+                updated = online_migrations.backfill('venues', {'website': 'https://example.com'},
+                                                     where='website IS NULL', batch_size=10)
+
+        self.assertEqual(updated, 25)
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(Venue.query.filter(Venue.website.is_(None)).count(), 0)
@@ -0,0 +1,121 @@
+import re
+import unittest
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import counters
+import details
+from app import get_venue_areas
+from models import db, Venue, Artist, City, Genre, Show, venue_genres
+
+
+@pytest.mark.usefixtures('database')
+class PagesTestCase(unittest.TestCase):
+    """The listing and detail pages show the right rows with a fixed number of queries"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf, ny = City(name='san francisco', state='CA'), City(name='new york', state='NY')
+        jazz = Genre(name='Jazz')
+        self.venues = [Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234',
+                             genres=[jazz]),
+                       Venue(name='Park Square Live Music & Coffee', city=sf, address='34 Whiskey Moore Ave',
+                             phone='415-000-1234'),
+                       Venue(name='The Dueling Pianos Bar', city=ny, address='335 Delancey Street',
+                             phone='914-003-1132')]
+        self.artists = [Artist(name='Guns N Petals', city=sf, phone='326-123-5000', genres=[jazz]),
+                        Artist(name='Matt Quevedo', city=ny, phone='300-400-5000')]
+        db.session.add_all(self.venues + self.artists)
+        db.session.commit()
+
+        now = datetime.utcnow()
+        for n, (venue, artist, days) in enumerate([(0, 0, 3), (0, 1, 10), (0, 0, -5), (2, 1, 1)]):
+            show = Show(venue_id=self.venues[venue].id, artist_id=self.artists[artist].id,
+                        start_time=now + timedelta(days=days))
+            db.session.add(show)
+            counters.record_show_created(show)
+        db.session.commit()
+
+    def count_queries(self, action):
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            return action(), statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+    def test_venue_areas_grouped_by_city_in_one_query(self):
+        areas, statements = self.count_queries(get_venue_areas)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(areas, [
+            {'city': 'san francisco', 'state': 'CA', 'venues': [
+                {'id': str(self.venues[1].id), 'name': 'Park Square Live Music & Coffee', 'num_upcoming_shows': 0},
+                {'id': str(self.venues[0].id), 'name': 'The Musical Hop', 'num_upcoming_shows': 2}]},
+            {'city': 'new york', 'state': 'NY', 'venues': [
+                {'id': str(self.venues[2].id), 'name': 'The Dueling Pianos Bar', 'num_upcoming_shows': 1}]},
+        ])
+
+    def test_venues_page(self):
+        res = self.client().get('/venues')
+
+        self.assertEqual(res.status_code, 200)
+        page = res.get_data(as_text=True)
+        self.assertLess(page.index('san francisco, CA'), page.index('new york, NY'))
+        self.assertLess(page.index('Park Square Live Music &amp; Coffee'), page.index('The Musical Hop'))
+
+    def test_venue_details_in_two_queries(self):
+        venue_id = self.venues[0].id
+        data, statements = self.count_queries(lambda: details.venue_details(venue_id))
+
+        self.assertEqual(len(statements), 2)
+        self.assertEqual((data['name'], data['city'], data['state'], data['genres']),
+                         ('The Musical Hop', 'san francisco', 'CA', ['Jazz']))
+        self.assertEqual((data['past_shows_count'], data['upcoming_shows_count']), (1, 2))
+        self.assertEqual([show.artist_name for show in data['upcoming_shows']], ['Guns N Petals', 'Matt Quevedo'])
+        self.assertEqual(data['past_shows'][0].artist_id, self.artists[0].id)
+        self.assertIsNone(details.venue_details(1000))
+
+    def test_artist_details_in_two_queries(self):
+        artist_id = self.artists[1].id
+        data, statements = self.count_queries(lambda: details.artist_details(artist_id))
+
+        self.assertEqual(len(statements), 2)
+        self.assertEqual([show.venue_name for show in data['upcoming_shows']],
+                         ['The Dueling Pianos Bar', 'The Musical Hop'])
+        self.assertEqual(data['past_shows'], [])
+
+    def test_detail_pages(self):
+        venue_page = self.client().get(f'/venues/{self.venues[0].id}')
+        artist_page = self.client().get(f'/artists/{self.artists[1].id}')
+
+        self.assertEqual((venue_page.status_code, artist_page.status_code), (200, 200))
+        self.assertIn('1015 Folsom Street', venue_page.get_data(as_text=True))
+        self.assertIn('The Dueling Pianos Bar', artist_page.get_data(as_text=True))
+        self.assertEqual(self.client().get('/venues/1000').status_code, 404)
+        self.assertEqual(self.client().get('/artists/1000').status_code, 404)
+
+    def test_streamed_shows_page(self):
+        res = self.client().get('/shows?stream=1')
+
+        self.assertTrue(res.is_streamed)
+        page = res.get_data(as_text=True)
+        self.assertEqual(re.findall(r'<a href="/venues/(\d+)">', page),
+                         [str(self.venues[n].id) for n in (0, 2, 0, 0)])
+        paged = self.client().get('/shows').get_data(as_text=True)
+        self.assertEqual(re.findall(r'<h4>(.*)</h4>', page), re.findall(r'<h4>(.*)</h4>', paged))
+
+    def test_venue_deletion_is_set_based(self):
+        busy, idle, quiet = (venue.id for venue in self.venues)
+        _, busy_statements = self.count_queries(lambda: self.client().delete(f'/venues/{busy}'))
+        _, quiet_statements = self.count_queries(lambda: self.client().delete(f'/venues/{quiet}'))
+
+        # three shows or one, the same statements
+        self.assertEqual(len(busy_statements), len(quiet_statements))
+        self.assertEqual(db.session.query(Venue.id).all(), [(idle,)])
+        self.assertEqual(Show.query.count(), 0)
+        self.assertEqual(db.session.query(venue_genres).count(), 0)
@@ -0,0 +1,73 @@
+import base64
+import json
+import unittest
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Venue, Artist, City, Show
+from pagination import paginate, encode_cursor
+
+
+@pytest.mark.usefixtures('database')
+class PaginationTestCase(unittest.TestCase):
+    """Keyset pages cover a listing once, in order, and bad cursors fall back to the first page"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf = City(name='san francisco', state='CA')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234')
+        artists = [Artist(name=name, city=sf, phone='326-123-5000') for name in ('Cello', 'Alto', 'Bass', 'Alto')]
+        start = datetime(2099, 5, 21, 21, 30)
+        # two shows share each start time, so the id breaks the tie
+        shows = [Show(venue_shows=venue, artist_shows=artists[n % 4], start_time=start + timedelta(days=n // 2))
+                 for n in range(7)]
+        db.session.add_all([venue, *artists, *shows])
+        db.session.commit()
+
+    def page(self, query, columns, key, **args):
+        with self.app.test_request_context('/', query_string=dict(page_size=2, **args)):
+            return paginate(query, columns, key)
+
+    def show_page(self, **args):
+        return self.page(Show.query, [Show.start_time, Show.id], lambda s: (s.start_time, s.id), **args)
+
+    def test_next_and_previous_pages(self):
+        seen, page = [], self.show_page()
+        while True:
+            seen += [show.id for show in page.items]
+            if not page.next_cursor:
+                break
+            page = self.show_page(after=page.next_cursor)
+
+        expected = [show.id for show in Show.query.order_by(Show.start_time, Show.id)]
+        self.assertEqual(seen, expected)
+        self.assertEqual([show.id for show in self.show_page(before=page.prev_cursor).items], expected[-3:-1])
+
+    def test_artists_by_name(self):
+        query = db.session.query(Artist.id, Artist.name)
+        first = self.page(query, [Artist.name, Artist.id], lambda a: (a.name, a.id))
+        second = self.page(query, [Artist.name, Artist.id], lambda a: (a.name, a.id), after=first.next_cursor)
+
+        self.assertEqual([a.name for a in first.items + second.items], ['Alto', 'Alto', 'Bass', 'Cello'])
+        self.assertIsNone(second.next_cursor)
+
+    def test_bad_cursors_give_the_first_page(self):
+        first = [show.id for show in self.show_page().items]
+        encode = lambda values: base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+        for cursor in ('not a cursor', encode({'dt': '2099-05-21'}), encode([{'x': 1}, 1]), encode([{'dt': 'x'}, 1]),
+                       encode([[1], 1]), encode([{'dt': '2099-05-21T21:30'}, '1']),
+                       encode([{'dt': '2099-05-21T21:30'}, 2 ** 70]), encode([{'dt': '2099-05-21T21:30'}])):
+            with self.subTest(cursor=cursor):
+                self.assertEqual([show.id for show in self.show_page(after=cursor).items], first)
+                self.assertEqual([show.id for show in self.show_page(before=cursor).items], first)
+                self.assertEqual(self.client().get('/shows', query_string={'after': cursor}).status_code, 200)
+
+    def test_datetime_cursor_round_trip(self):
+        cursor = encode_cursor((datetime(2099, 5, 22, 21, 30), 3))
+
+        self.assertEqual(self.client().get('/shows', query_string={'after': cursor}).status_code, 200)
+        self.assertEqual([show.start_time for show in self.show_page(after=cursor).items],
+                         [datetime(2099, 5, 22, 21, 30), datetime(2099, 5, 23, 21, 30)])
@@ -0,0 +1,63 @@
+import sqlite3
+import threading
+import time
+import unittest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError
+
+from pool import MeteredQueuePool, engine_options, pool_stats
+
+
+class PoolMetricsTestCase(unittest.TestCase):
+    """Checkouts count the time spent waiting for a connection, not the time spent opening one"""
+
+    def engine(self, connect_delay=0.0, **options):
+        def creator():
+            time.sleep(connect_delay)
+            return sqlite3.connect(':memory:', check_same_thread=False)
+        return create_engine('sqlite://', creator=creator, poolclass=MeteredQueuePool, **options)
+
+    def test_opening_a_connection_is_not_waiting(self):
+        engine = self.engine(connect_delay=0.2, pool_size=1, max_overflow=1, pool_pre_ping=True)
+
+        with engine.connect() as first, engine.connect() as second:
+            first.execute(text('SELECT 1'))
+            second.execute(text('SELECT 1'))
+        with self.assertNoLogs('pool', level='WARNING'):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+
+        stats = pool_stats(engine)
+        self.assertEqual((stats['checkouts'], stats['overflow_checkouts'], stats['slow_checkouts']), (3, 1, 0))
+        self.assertLess(stats['wait_ms_max'], 100)
+
+    def test_waiting_for_a_busy_pool(self):
+        engine = self.engine(pool_size=1, max_overflow=0, pool_timeout=2)
+        held = engine.connect()
+        threading.Timer(0.3, held.close).start()
+
+        with self.assertLogs('pool', level='WARNING') as logs:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+
+        stats = pool_stats(engine)
+        self.assertEqual((stats['checkouts'], stats['slow_checkouts'], stats['timeouts']), (2, 1, 0))
+        self.assertGreaterEqual(stats['wait_ms_max'], 250)
+        self.assertIn('waited', logs.output[0])
+
+    def test_timeouts_are_counted(self):
+        engine = self.engine(pool_size=1, max_overflow=0, pool_timeout=0.1)
+
+        with engine.connect(), self.assertLogs('pool', level='WARNING'):
+            with self.assertRaises(TimeoutError):
+                engine.connect()
+
+        stats = pool_stats(engine)
+        self.assertEqual((stats['checkouts'], stats['timeouts']), (2, 1))
+
+    def test_engine_options_from_environment(self):
+        options = engine_options({'DB_POOL_SIZE': '20', 'DB_POOL_PRE_PING': '0'})
+
+        self.assertIs(options['poolclass'], MeteredQueuePool)
+        self.assertEqual((options['pool_size'], options['max_overflow'], options['pool_pre_ping']), (20, 10, False))
@@ -0,0 +1,64 @@
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+
+from profiler import SQLProfiler, statement_shape
+
+
+class SQLProfilerTestCase(unittest.TestCase):
+    """Requests report their queries, and a statement repeated per row is flagged as an N+1"""
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE venues (id INTEGER PRIMARY KEY, name TEXT)'))
+            connection.execute(text("INSERT INTO venues (name) VALUES ('The Musical Hop'), ('Park Square'), "
+                                    "('The Dueling Pianos Bar'), ('Guns N Petals'), ('Matt Quevedo'), ('Sax')"))
+
+        self.app = Flask(__name__)
+        self.app.config.update(SQL_PROFILER=True, SQL_PROFILER_N_PLUS_ONE=5)
+        SQLProfiler(self.app)
+
+        @self.app.route('/venues')
+        def venues():
+            with engine.connect() as connection:
+                ids = connection.execute(text('SELECT id FROM venues')).scalars().all()
+                names = [connection.execute(text(f'SELECT name FROM venues WHERE id = {venue_id}')).scalar()
+                         for venue_id in ids]
+            return jsonify(names)
+
+        @self.app.route('/count')
+        def count():
+            with engine.connect() as connection:
+                return jsonify(connection.execute(text('SELECT count(*) FROM venues')).scalar())
+
+        self.client = self.app.test_client
+
+    def test_headers_and_n_plus_one(self):
+        with self.assertLogs(self.app.logger, level='WARNING') as logs:
+            res = self.client().get('/venues')
+
+        self.assertEqual(res.headers['X-SQL-Queries'], '7')
+        self.assertEqual(res.headers['X-SQL-N-Plus-One'], '1')
+        self.assertIn('6 x SELECT name FROM venues WHERE id = ?', logs.output[0])
+
+    def test_recent_requests(self):
+        self.client().get('/count')
+        self.client().get('/count?page=2')
+
+        requests = self.client().get('/_profiler').get_json()['requests']
+
+        self.assertEqual([r['path'] for r in requests], ['/count?page=2', '/count'])
+        self.assertEqual((requests[0]['queries'], requests[0]['n_plus_one']), (1, []))
+
+    def test_disabled_profiler_adds_nothing(self):
+        app = Flask(__name__)
+        SQLProfiler(app)
+
+        self.assertNotIn('sql_profiler', app.extensions)
+        self.assertEqual(app.test_client().get('/_profiler').status_code, 404)
+
+    def test_statement_shape(self):
+        self.assertEqual(statement_shape("SELECT * FROM shows WHERE venue_id IN (?, ?, ?) AND name = 'x''y'  AND id > 10"),
+                         'SELECT * FROM shows WHERE venue_id IN (...) AND name = ? AND id > ?')
@@ -0,0 +1,142 @@
+import unittest
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+import availability
+import counters
+import rollups
+from models import db, Venue, Artist, City, Genre, Show, ShowRollup, venue_genres
+
+
+@pytest.mark.usefixtures('database')
+class RollupTestCase(unittest.TestCase):
+    """Rollups kept up to date incrementally must equal a rebuild from scratch"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf, ny = City(name='san francisco', state='CA'), City(name='new york', state='NY')
+        jazz, rock, folk = Genre(name='Jazz'), Genre(name='Rock n Roll'), Genre(name='Folk')
+        self.venues = [Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234'),
+                       Venue(name='The Dueling Pianos Bar', city=ny, address='335 Delancey Street',
+                             phone='914-003-1132', genres=[jazz])]
+        self.artists = [Artist(name='Guns N Petals', city=sf, phone='326-123-5000', genres=[rock]),
+                        Artist(name='Matt Quevedo', city=ny, phone='300-400-5000', genres=[jazz]),
+                        Artist(name='The Wild Sax Band', city=sf, phone='432-325-5432', genres=[jazz, folk])]
+        db.session.add_all(self.venues + self.artists)
+        db.session.commit()
+
+    def add_show(self, venue, artist, start_time):
+        show = Show(venue_id=venue.id, artist_id=artist.id, start_time=start_time)
+        db.session.add(show)
+        counters.record_show_created(show)
+        rollups.record_show_created(show)
+        db.session.commit()
+
+    def add_shows(self):
+        self.add_show(self.venues[0], self.artists[0], datetime(2026, 5, 21, 21, 30))
+        self.add_show(self.venues[0], self.artists[2], datetime(2026, 5, 28, 20, 0))
+        self.add_show(self.venues[1], self.artists[1], datetime(2026, 6, 15, 23, 0))
+        self.add_show(self.venues[1], self.artists[2], datetime(2026, 6, 15, 19, 0))
+        self.add_show(self.venues[1], self.artists[2], datetime(2027, 1, 1, 20, 0))
+
+    def snapshot(self):
+        return {(row.dimension, row.key, row.period): row.shows
+                for row in ShowRollup.query.all() if row.shows}
+
+    def expected(self):
+        counts = Counter()
+        for show in Show.query.all():
+            month = show.start_time.strftime('%Y-%m')
+            keys = [('venue', show.venue_id), ('artist', show.artist_id), ('city', show.venue_shows.city_id)]
+            keys += [('genre', genre.id) for genre in show.artist_shows.genres]
+            for dimension, key in keys:
+                counts[dimension, key, month] += 1
+                counts[dimension, key, rollups.ALL] += 1
+        return dict(counts)
+
+    def test_rebuild_matches_shows(self):
+        self.add_shows()
+        ShowRollup.query.delete()
+        db.session.commit()
+
+        rollups.rebuild()
+
+        self.assertEqual(self.snapshot(), self.expected())
+        self.assertEqual(self.snapshot()[('genre', self.artists[2].genres[0].id, rollups.ALL)], 4)
+
+    def test_created_shows_match_rebuild(self):
+        self.add_shows()
+        incremental = self.snapshot()
+
+        rollups.rebuild()
+
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(incremental, self.expected())
+
+    def test_bulk_rows_match_rebuild(self):
+        rows = [{'venue_id': self.venues[i % 2].id, 'artist_id': self.artists[i % 3].id,
+                 'start_time': datetime(2026, 1 + i % 12, 1, 20, 0)} for i in range(30)]
+        db.session.execute(Show.__table__.insert(), rows)
+        rollups.add_show_rows(rows)
+        db.session.commit()
+        incremental = self.snapshot()
+
+        rollups.rebuild()
+
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(incremental[('venue', self.venues[0].id, rollups.ALL)], 15)
+
+    def test_deleted_venue_matches_rebuild(self):
+        self.add_shows()
+        venue_id, artist_id = self.venues[1].id, self.artists[2].id
+
+        res = self.client().delete(f'/venues/{venue_id}')
+        incremental = self.snapshot()
+        rollups.rebuild()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNone(db.session.get(Venue, venue_id))
+        self.assertEqual(Show.query.filter_by(venue_id=venue_id).count(), 0)
+        self.assertEqual(db.session.query(venue_genres).filter_by(venue_id=venue_id).count(), 0)
+        artist = db.session.get(Artist, artist_id)
+        self.assertEqual(artist.num_upcoming_shows + artist.num_past_shows, 1)
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(ShowRollup.query.filter_by(dimension='venue', key=venue_id).count(), 0)
+        # the availability index loses exactly the deleted shows
+        self.assertEqual(db.session.execute(db.select(db.func.count()).select_from(availability.periods)).scalar(),
+                         Show.query.count())
+
+    def test_delete_missing_venue(self):
+        res = self.client().delete('/venues/1000')
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_analytics_route(self):
+        self.add_shows()
+
+        res = self.client().get('/analytics?period=2026-06&limit=1')
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['busiest_venues'], [{'id': self.venues[1].id, 'name': 'The Dueling Pianos Bar',
+                                                   'shows': 2}])
+        self.assertEqual(data['top_cities'][0]['state'], 'NY')
+        self.assertEqual(data['most_booked_genres'][0], {'id': self.artists[1].genres[0].id, 'name': 'Jazz',
+                                                         'shows': 2})
+
+    def test_analytics_monthly_route(self):
+        self.add_shows()
+
+        res = self.client().get(f'/analytics/city/{self.venues[1].city_id}')
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['months'], [{'period': '2026-06', 'shows': 2}, {'period': '2027-01', 'shows': 1}])
+
+    def test_analytics_bad_period(self):
+        res = self.client().get('/analytics?period=June')
+
+        self.assertEqual(res.status_code, 400)
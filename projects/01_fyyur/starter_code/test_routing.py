@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from flask import Flask, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from routing import RoutingSession, init_routing
+
+
+class RoutingTestCase(unittest.TestCase):
+    """Reads go to the replica, writes to the primary, and a writer reads its own writes"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SECRET_KEY='test', DEBUG=True, READ_YOUR_WRITES_SECONDS=60,
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(directory, 'primary.db'),
+            SQLALCHEMY_BINDS={'replica': 'sqlite:///' + os.path.join(directory, 'replica.db')})
+        db = self.db = SQLAlchemy(self.app, session_options={'class_': RoutingSession})
+        init_routing(self.app, db)
+
+        class Venue(db.Model):
+            id = db.Column(db.Integer, primary_key=True)
+            name = db.Column(db.String, nullable=False)
+
+        with self.app.app_context():
+            for engine, name in [(db.engines[None], 'The Musical Hop'), (db.engines['replica'], 'Replica Hall')]:
+                db.metadata.create_all(engine)
+                with engine.begin() as connection:
+                    connection.execute(Venue.__table__.insert(), {'name': name})
+
+        @self.app.route('/venues', methods=['GET', 'POST'])
+        def venues():
+            if request.method == 'POST' or request.args.get('visit'):
+                db.session.add(Venue(name=request.values['name']))
+                db.session.commit()
+            return jsonify(sorted(venue.name for venue in Venue.query))
+
+        self.client = self.app.test_client()
+
+    def replica_names(self):
+        with self.app.app_context(), self.db.engines['replica'].connect() as connection:
+            return [name for (name,) in connection.execute(text('SELECT name FROM venue ORDER BY id'))]
+
+    def test_reads_go_to_the_replica(self):
+        res = self.client.get('/venues')
+
+        self.assertEqual(res.get_json(), ['Replica Hall'])
+        self.assertEqual(res.headers['X-DB-Route'], 'replica')
+
+    def test_writers_read_from_the_primary(self):
+        res = self.client.post('/venues', data={'name': 'Park Square'})
+
+        self.assertEqual(res.get_json(), ['Park Square', 'The Musical Hop'])
+        self.assertEqual(self.client.get('/venues').get_json(), ['Park Square', 'The Musical Hop'])
+        self.assertEqual(self.app.test_client().get('/venues').get_json(), ['Replica Hall'])
+        self.assertEqual(self.replica_names(), ['Replica Hall'])
+
+    def test_read_your_writes_window_expires(self):
+        self.app.config['READ_YOUR_WRITES_SECONDS'] = 0
+        self.client.post('/venues', data={'name': 'Park Square'})
+
+        self.assertEqual(self.client.get('/venues').get_json(), ['Replica Hall'])
+
+    def test_writes_in_get_requests_go_to_the_primary(self):
+        res = self.client.get('/venues?visit=1&name=Park Square')
+
+        self.assertEqual(res.get_json(), ['Replica Hall'])
+        self.assertEqual(self.replica_names(), ['Replica Hall'])
+        with self.app.app_context():
+            self.assertEqual(self.db.session.execute(text('SELECT count(*) FROM venue')).scalar(), 2)
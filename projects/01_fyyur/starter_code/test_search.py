@@ -0,0 +1,65 @@
+import unittest
+
+import pytest
+
+import search
+from models import db, Venue, Artist, City, Genre
+
+
+@pytest.mark.usefixtures('database')
+class SearchTestCase(unittest.TestCase):
+    """Searches match name, city and genre prefixes, ranked with name matches first"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf, ny = City(name='san francisco', state='CA'), City(name='new york', state='NY')
+        jazz, band = Genre(name='Jazz'), Genre(name='Band')
+        venues = [Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234'),
+                  Venue(name='Park Square Live Music & Coffee', city=sf, address='34 Whiskey Moore Ave',
+                        phone='415-000-1234', genres=[jazz]),
+                  Venue(name='The Dueling Pianos Bar', city=ny, address='335 Delancey Street', phone='914-003-1132')]
+        artists = [Artist(name='Guns N Petals', city=sf, phone='326-123-5000'),
+                   Artist(name='Matt Quevedo', city=ny, phone='300-400-5000', genres=[jazz]),
+                   Artist(name='The Wild Sax Band', city=sf, phone='432-325-5432'),
+                   Artist(name='Jazz Hands', city=ny, phone='432-325-0000', genres=[band])]
+        db.session.add_all(venues + artists)
+        db.session.commit()
+        search.rebuild(Venue)
+        search.rebuild(Artist)
+
+    def names(self, model, term):
+        query, _ = search.search(model, term)
+        return [row.name for row in query]
+
+    def test_prefixes_of_every_word(self):
+        self.assertEqual(sorted(self.names(Venue, 'mus')), ['Park Square Live Music & Coffee', 'The Musical Hop'])
+        self.assertEqual(self.names(Venue, 'the hop'), ['The Musical Hop'])
+        self.assertEqual(self.names(Venue, 'new york'), ['The Dueling Pianos Bar'])
+        self.assertEqual(self.names(Venue, 'jazz'), ['Park Square Live Music & Coffee'])
+        self.assertEqual(self.names(Venue, 'opera'), [])
+
+    def test_name_matches_rank_first(self):
+        self.assertEqual(self.names(Artist, 'jazz'), ['Jazz Hands', 'Matt Quevedo'])
+        self.assertEqual(self.names(Artist, 'band'), ['The Wild Sax Band', 'Jazz Hands'])
+
+    def test_punctuation_and_empty_terms(self):
+        self.assertEqual(self.names(Artist, '"guns" (n)'), ['Guns N Petals'])
+        self.assertEqual(len(self.names(Artist, '  ')), 4)
+
+    def test_writes_update_the_documents(self):
+        artist = Artist.query.filter_by(name='Guns N Petals').one()
+        artist.name = 'Guns N Roses'
+        search.index_artists([artist.id])
+        db.session.commit()
+
+        self.assertEqual(self.names(Artist, 'roses'), ['Guns N Roses'])
+        self.assertEqual(self.names(Artist, 'petals'), [])
+
+    def test_search_route(self):
+        res = self.client().post('/artists/search', data={'search_term': 'band'})
+
+        self.assertEqual(res.status_code, 200)
+        page = res.get_data(as_text=True)
+        self.assertIn('Number of search results for "band": 2', page)
+        self.assertLess(page.index('The Wild Sax Band'), page.index('Jazz Hands'))
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from app import app
+from templating import TemplateBytecodeCache, precompile
+
+
+class TemplateCacheTestCase(unittest.TestCase):
+    """Precompiled templates load without compiling in a new environment"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.env = app.create_jinja_environment()
+        self.env.bytecode_cache = TemplateBytecodeCache(self.directory)
+
+    def fresh_environment(self):
+        env = app.create_jinja_environment()
+        env.bytecode_cache = TemplateBytecodeCache(self.directory)
+        compiled = []
+        compile = env.compile
+        env.compile = lambda *args, **kwargs: compiled.append(args) or compile(*args, **kwargs)
+        return env, compiled
+
+    def test_precompile_writes_every_template(self):
+        names = precompile(self.env)
+
+        self.assertIn('pages/venues.html', names)
+        self.assertIn('fragments/show_venue.html', names)
+        self.assertNotIn('pages/home.css', names)
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.cache')]), len(names))
+
+    def test_new_environment_loads_bytecode(self):
+        precompile(self.env)
+        env, compiled = self.fresh_environment()
+
+        for name in ('pages/venues.html', 'pages/show_venue.html', 'pages/shows.html'):
+            env.get_template(name)
+
+        self.assertEqual(compiled, [])
+
+    def test_changed_source_compiles_again(self):
+        precompile(self.env)
+        env, compiled = self.fresh_environment()
+        source = env.loader.get_source
+        env.loader.get_source = lambda environment, name: \
+            (source(environment, name)[0] + '\n',) + source(environment, name)[1:]
+
+        env.get_template('pages/venues.html')
+
+        self.assertEqual(len(compiled), 1)
+
+    def test_unwritable_directory_still_renders(self):
+        env = app.create_jinja_environment()
+        env.bytecode_cache = TemplateBytecodeCache(os.path.join(self.directory, 'missing'))
+
+        self.assertIsNotNone(env.get_template('errors/404.html'))
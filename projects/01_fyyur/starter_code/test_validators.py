@@ -0,0 +1,102 @@
+import unittest
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import validators
+from models import db, Venue, Artist, City, Genre
+
+
+@pytest.mark.usefixtures('database')
+class ConditionalGetTestCase(unittest.TestCase):
+    """Pages answer 304 until a row they show changes"""
+
+    def setUp(self):
+        self.client = self.app.test_client
+
+        sf = City(name='san francisco', state='CA')
+        venue = Venue(name='The Musical Hop', city=sf, address='1015 Folsom Street', phone='123-123-1234',
+                      genres=[Genre(name='Jazz')])
+        artist = Artist(name='Guns N Petals', city=sf, phone='326-123-5000')
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        self.venue_id, self.artist_id = venue.id, artist.id
+        self.show_start = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+        self.add_show(self.show_start)
+
+    def add_show(self, start_time):
+        self.client().post('/shows/create', data={'venue_id': self.venue_id, 'artist_id': self.artist_id,
+                                                  'start_time': start_time.isoformat()})
+
+    def revalidate(self, url):
+        res = self.client().get(url)
+        return res, self.client().get(url, headers={'If-None-Match': res.headers['ETag']})
+
+    def test_unchanged_pages_answer_304(self):
+        for url in (f'/venues/{self.venue_id}', f'/artists/{self.artist_id}', '/venues', '/artists', '/shows'):
+            res, again = self.revalidate(url)
+            since = self.client().get(url, headers={'If-Modified-Since': res.headers['Last-Modified']})
+
+            self.assertEqual(res.status_code, 200, url)
+            self.assertTrue(res.headers['ETag'].startswith('W/'))
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again.get_data(), b'')
+            self.assertEqual(since.status_code, 304, url)
+
+    def test_new_show_changes_pages(self):
+        pages = {url: self.client().get(url).headers['ETag']
+                 for url in (f'/venues/{self.venue_id}', f'/artists/{self.artist_id}', '/venues', '/shows')}
+
+        self.add_show(self.show_start + timedelta(days=7))
+
+        for url, etag in pages.items():
+            self.assertEqual(self.client().get(url, headers={'If-None-Match': etag}).status_code, 200, url)
+
+    def test_edit_changes_venue_and_artist_pages(self):
+        venue_page, artist_page = (self.client().get(url).headers['ETag']
+                                   for url in (f'/venues/{self.venue_id}', f'/artists/{self.artist_id}'))
+
+        self.client().post(f'/venues/{self.venue_id}/edit', data={'version': '1', 'name': 'The Hop'})
+
+        self.assertEqual(self.client().get(f'/venues/{self.venue_id}',
+                                           headers={'If-None-Match': venue_page}).status_code, 200)
+        self.assertEqual(self.client().get(f'/artists/{self.artist_id}',
+                                           headers={'If-None-Match': artist_page}).status_code, 200)
+
+    def test_deleted_venue_changes_listing(self):
+        listing = self.client().get('/venues').headers['ETag']
+
+        self.client().delete(f'/venues/{self.venue_id}')
+
+        self.assertEqual(self.client().get('/venues', headers={'If-None-Match': listing}).status_code, 200)
+
+    def test_show_starting_changes_detail_validator(self):
+        before = validators.venue_page(self.venue_id, now=self.show_start - timedelta(minutes=1))
+        after = validators.venue_page(self.venue_id, now=self.show_start + timedelta(minutes=1))
+
+        self.assertNotEqual(before, after)
+
+    def test_detail_validator_does_not_scan_shows(self):
+        statements = []
+        record = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            validators.venue_page(self.venue_id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        [(statement, parameters)] = statements
+        plan = ' | '.join(row[-1] for row in db.session.connection().exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + statement, parameters))
+        self.assertIn('ix_shows_venue_id_start_time', plan)
+        self.assertNotIn('SCAN', plan)
+
+    def test_flashed_messages_are_not_conditional(self):
+        with self.client() as client:
+            with client.session_transaction() as session:
+                session['_flashes'] = [('message', 'Venue was successfully listed!')]
+            res = client.get(f'/venues/{self.venue_id}')
+
+        self.assertNotIn('ETag', res.headers)
+        self.assertIn('Venue was successfully listed!', res.get_data(as_text=True))
@@ -0,0 +1,111 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+from werkzeug.http import is_resource_modified
+
+from cache import fragment_cache
+from models import db, Venue, Artist, Show, CounterMark
+
+# ----------------------------------------------------------------------------#
+# Conditional GETs.
+#
+# Pages carry a weak ETag and a Last-Modified derived from the updated_at and
+# version columns of the rows they show. Both are read with one aggregate
+# query, which is a few index lookups for the listings. A revalidation that
+# still matches gets a 304 before anything is loaded or rendered. Deleted rows
+# leave no updated_at behind, so deletions stamp the 'rows_deleted_at' mark
+# that every validator includes. Detail pages do not look at their shows:
+# every write that changes one (shows, edits of the entity or of the venues and
+# artists it lists, deletions) bumps its fragment cache version stamp, which
+# the validator includes along with the entity's own row. They also change
+# when one of their shows starts and moves from upcoming to past, so they
+# include the start time of the latest show that has started, one index
+# lookup. Responses that carry flashed messages are never conditional.
+# ----------------------------------------------------------------------------#
+
+DELETED_MARK = 'rows_deleted_at'
+
+
+def record_deletion():
+    # call in the transaction that deletes venues, artists or shows
+    db.session.merge(CounterMark(name=DELETED_MARK, value=datetime.utcnow()))
+
+
+def conditional(validator):
+    """Answer If-None-Match / If-Modified-Since for a GET view before calling it.
+
+    `validator(**view_args)` returns the values the page depends on, or None
+    when the page does not exist (the view then runs and answers 404).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return view(**kwargs)
+            values = validator(**kwargs)
+            if values is None:
+                return view(**kwargs)
+
+            etag = hashlib.sha1(repr(values).encode()).hexdigest()[:20]
+            last_modified = max((_utc(value) for value in values if isinstance(value, datetime)), default=None)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(**kwargs))
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            # shared caches may store the page but have to revalidate it
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def _utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _deleted_mark():
+    return db.select(CounterMark.value).where(CounterMark.name == DELETED_MARK).scalar_subquery()
+
+
+def _latest(column):
+    return db.select(db.func.max(column)).scalar_subquery()
+
+
+def _detail(model, kind, show_key, key, now=None):
+    now = now or datetime.utcnow()
+    started = db.select(db.func.max(Show.start_time)).where(show_key == key, Show.start_time < now) \
+        .scalar_subquery()
+    row = db.session.query(model.version, model.updated_at, started, _deleted_mark()) \
+        .filter(model.id == key) \
+        .first()
+    if row is None:
+        return None
+    return tuple(row) + (fragment_cache.stamp(kind, key),)
+
+
+def venue_page(venue_id, now=None):
+    return _detail(Venue, 'venue', Show.venue_id, venue_id, now)
+
+
+def artist_page(artist_id, now=None):
+    return _detail(Artist, 'artist', Show.artist_id, artist_id, now)
+
+
+def venues_page():
+    return tuple(db.session.query(_latest(Venue.updated_at), _deleted_mark()).one())
+
+
+def artists_page():
+    return tuple(db.session.query(_latest(Artist.updated_at), _deleted_mark()).one())
+
+
+def shows_page():
+    # show rows name their venue and artist
+    return tuple(db.session.query(_latest(Show.updated_at), _latest(Venue.updated_at),
+                                  _latest(Artist.updated_at), _deleted_mark()).one())
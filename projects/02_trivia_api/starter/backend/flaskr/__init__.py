@@ -5,6 +5,8 @@ from flask_cors import CORS
 import random
 
 from .models import setup_db, Question, Category
+from .pool import engine_options, pool_stats
+from .profiler import SQLProfiler
 
 QUESTIONS_PER_PAGE = 10
 
@@ -12,7 +14,12 @@ QUESTIONS_PER_PAGE = 10
 def create_app(test_config=None):
     # create and configure the app
     app = Flask(__name__)
+    # pool size, overflow, timeout, recycle and pre-ping from the DB_POOL_* environment variables
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
     db = setup_db(app)
+    # SQL_PROFILER=1 adds X-SQL-* headers to every response and lists recent requests at /_profiler
+    app.config.setdefault('SQL_PROFILER', os.environ.get('SQL_PROFILER', '') in ('1', 'true'))
+    SQLProfiler(app)
 
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
@@ -184,6 +191,13 @@ def create_app(test_config=None):
             "previous_questions": prev_questions
         }
 
+    @app.route('/pool/stats')
+    def get_pool_stats():
+        return jsonify({
+            'success': True,
+            'pool': pool_stats(db.engine)
+        })
+
     @app.errorhandler(400)
     def bad_request(error):
         return jsonify({
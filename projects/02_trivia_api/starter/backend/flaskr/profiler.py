@@ -0,0 +1,114 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# SQL profiler.
+#
+# Opt-in (SQL_PROFILER = True) extension that counts the queries each request
+# issues, their total time and how often each statement shape repeats. A
+# shape is the statement with literals and IN lists collapsed, so the same
+# query issued in a loop with different ids shows up as one shape executed
+# many times: the usual signature of an N+1. Summaries are sent as X-SQL-*
+# response headers and the most recent ones are served at /_profiler.
+# ----------------------------------------------------------------------------#
+
+IN_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+|__\[POSTCOMPILE_\w+\])(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+))*\s*\)')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    shape = LITERAL.sub('?', statement)
+    shape = IN_LIST.sub('(...)', shape)
+    return SPACE.sub(' ', shape).strip()
+
+
+class SQLProfiler:
+    def __init__(self, app=None):
+        self.recent = deque(maxlen=50)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_PROFILER', False)
+        app.config.setdefault('SQL_PROFILER_N_PLUS_ONE', 5)
+        app.config.setdefault('SQL_PROFILER_HISTORY', 50)
+        if not app.config['SQL_PROFILER']:
+            return
+
+        self.recent = deque(maxlen=app.config['SQL_PROFILER_HISTORY'])
+        app.extensions['sql_profiler'] = self
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/_profiler', 'sql_profiler', self.view)
+
+    def _active(self):
+        return has_request_context() and current_app.extensions.get('sql_profiler') is self and 'sql_profile' in g
+
+    def _start(self):
+        g.sql_profile = {'queries': 0, 'time': 0.0, 'shapes': Counter(), 'shape_time': Counter()}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._active():
+            conn.info['profiler_started'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # only the profiler that started the timer takes it; other apps' profilers listen on Engine too
+        if not self._active():
+            return
+        started = conn.info.pop('profiler_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        shape = statement_shape(statement)
+        profile = g.sql_profile
+        profile['queries'] += 1
+        profile['time'] += elapsed
+        profile['shapes'][shape] += 1
+        profile['shape_time'][shape] += elapsed
+
+    def summary(self, profile):
+        threshold = current_app.config['SQL_PROFILER_N_PLUS_ONE']
+        repeated = [{
+            'statement': shape,
+            'count': count,
+            'time_ms': round(profile['shape_time'][shape] * 1000, 2),
+        } for shape, count in profile['shapes'].most_common() if count >= threshold]
+        return {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'queries': profile['queries'],
+            'time_ms': round(profile['time'] * 1000, 2),
+            'distinct_statements': len(profile['shapes']),
+            'n_plus_one': repeated,
+        }
+
+    def _finish(self, response):
+        if 'sql_profile' not in g or request.endpoint == 'sql_profiler':
+            return response
+
+        summary = self.summary(g.sql_profile)
+        with self._lock:
+            self.recent.appendleft(summary)
+
+        response.headers['X-SQL-Queries'] = str(summary['queries'])
+        response.headers['X-SQL-Time-ms'] = str(summary['time_ms'])
+        response.headers['X-SQL-N-Plus-One'] = str(len(summary['n_plus_one']))
+        for suspect in summary['n_plus_one']:
+            current_app.logger.warning('possible N+1 in %s: %d x %s',
+                                       summary['endpoint'], suspect['count'], suspect['statement'])
+        return response
+
+    def view(self):
+        with self._lock:
+            return jsonify({'requests': list(self.recent)})
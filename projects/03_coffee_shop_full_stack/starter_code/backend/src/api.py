@@ -4,7 +4,8 @@ from sqlalchemy import exc
 import json
 from flask_cors import CORS
 
-from .database.models import db_drop_and_create_all, setup_db, Drink
+from .database.models import db_drop_and_create_all, setup_db, Drink, db
+from .database.pool import pool_stats
 from .auth.auth import AuthError, requires_auth
 
 app = Flask(__name__)
@@ -189,6 +190,19 @@ def delete_drinks(id):
     except:
         abort(400)
 
+
+'''
+    GET /pool/stats
+        connection pool counters: checked out connections, checkout wait
+        times, overflow checkouts and timeouts
+    returns status code 200 and json {"success": True, "pool": stats}
+'''
+
+
+@app.route('/pool/stats', methods=['GET'])
+def get_pool_stats():
+    return jsonify({"success": True, "pool": pool_stats(db.engine)})
+
 # Error Handling
 
 
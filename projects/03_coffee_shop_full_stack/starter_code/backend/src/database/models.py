@@ -3,6 +3,8 @@ from sqlalchemy import Column, String, Integer
 from flask_sqlalchemy import SQLAlchemy
 import json
 
+from .pool import engine_options
+
 database_filename = "database.db"
 project_dir = os.path.dirname(os.path.abspath(__file__))
 database_path = "sqlite:///{}".format(os.path.join(project_dir, database_filename))
@@ -16,6 +18,8 @@ setup_db(app)
 def setup_db(app):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # pool size, overflow, timeout, recycle and pre-ping from the DB_POOL_* environment variables
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options())
     db.app = app
     db.init_app(app)
 
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+# ----------------------------------------------------------------------------#
+# Connection pool metrics.
+#
+# MeteredQueuePool is a QueuePool that times every checkout. Time spent
+# waiting for a free connection, checkouts beyond pool_size (overflow) and
+# checkout timeouts are counted per pool, and a checkout that waited longer
+# than the app's POOL_WAIT_WARNING_MS (default 100) is logged with the
+# request it held up. Opening a new connection and the pre-ping are not
+# waiting and are left out. A pool that is too small for the worker threads
+# shows up here first.
+# ----------------------------------------------------------------------------#
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(environ=os.environ):
+    """Engine options from the DB_POOL_* environment variables."""
+    return {
+        'poolclass': MeteredQueuePool,
+        'pool_size': int(environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+
+
+class MeteredQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkout = threading.local()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        checkout = self._checkout
+        if getattr(checkout, 'started', None) is not None:
+            # QueuePool retries by calling _do_get again; the outer call times the whole wait
+            return super()._do_get()
+        checkout.started, checkout.connecting = time.perf_counter(), 0.0
+        try:
+            entry = super()._do_get()
+        except TimeoutError:
+            self._record(self._waited(), timed_out=True)
+            raise
+        else:
+            self._record(self._waited())
+            return entry
+        finally:
+            checkout.started = None
+
+    def _create_connection(self):
+        # an overflow checkout opens its connection inside _do_get; that time is not spent waiting
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self._checkout.connecting = getattr(self._checkout, 'connecting', 0.0) + time.perf_counter() - started
+
+    def _waited(self):
+        return time.perf_counter() - self._checkout.started - self._checkout.connecting
+
+    def _record(self, waited, timed_out=False):
+        threshold = current_app.config.get('POOL_WAIT_WARNING_MS', 100) if has_app_context() else 100
+        slow = timed_out or waited * 1000 >= threshold
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.slow_checkouts += slow
+            self.timeouts += timed_out
+            self.overflow_checkouts += not timed_out and self.checkedout() > self.size()
+
+        if slow:
+            where = f' for {request.method} {request.path}' if has_request_context() else ''
+            (current_app.logger if has_app_context() else logger).warning(
+                '%s %.1f ms for a database connection%s (%d checked out, pool size %d, overflow %d)',
+                'timed out after' if timed_out else 'waited', waited * 1000, where,
+                self.checkedout(), self.size(), max(self.overflow(), 0))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'pool_size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': max(self.overflow(), 0),
+                'checkouts': self.checkouts,
+                'slow_checkouts': self.slow_checkouts,
+                'overflow_checkouts': self.overflow_checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms_total': round(self.wait_time * 1000, 2),
+                'wait_ms_max': round(self.max_wait * 1000, 2),
+                'wait_ms_mean': round(self.wait_time * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    if isinstance(pool, MeteredQueuePool):
+        return pool.stats()
+    return {'pool': pool.status()}
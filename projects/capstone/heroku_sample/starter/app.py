@@ -1,6 +1,7 @@
 import os
-from flask import Flask
-from models import setup_db
+from flask import Flask, jsonify
+from models import setup_db, db
+from pool import pool_stats
 
 def create_app(test_config=None):
 
@@ -19,6 +20,11 @@ def create_app(test_config=None):
     def be_cool():
         return "Be cool, man, be coooool! You're almost a FSND grad!"
 
+    @app.route('/pool/stats')
+    def get_pool_stats():
+        # connection pool counters: checked out connections, checkout waits, overflow and timeouts
+        return jsonify({"success": True, "pool": pool_stats(db.engine)})
+
     return app
 
 app = create_app()
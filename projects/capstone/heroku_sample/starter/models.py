@@ -2,6 +2,8 @@ from sqlalchemy import Column, String, create_engine
 from flask_sqlalchemy import SQLAlchemy
 import json
 
+from pool import engine_options
+
 database_path = os.environ['DATABASE_URL']
 
 db = SQLAlchemy()
@@ -13,6 +15,8 @@ setup_db(app)
 def setup_db(app, database_path=database_path):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # pool size, overflow, timeout, recycle and pre-ping from the DB_POOL_* environment variables
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options())
     db.app = app
     db.init_app(app)
     db.create_all()